@@ -39,8 +39,10 @@ import cray.cfs.operator.cfs.sources as cfs_sources
 import cray.cfs.operator.cfs.options as cfs_options
 from cray.cfs.utils import apply_configuration_limit
 from cray.cfs.utils.kubernetes_utils import get_configmap
+from cray.cfs.utils.tracing import get_tracer
 
 LOGGER = logging.getLogger("cray.cfs.clone")
+TRACER = get_tracer("cfs-clone")
 
 SHARED_DIRECTORY = "/inventory"
 
@@ -81,7 +83,8 @@ def main():
         else:
             clone_url = repo_info["clone_url"]
         commit = repo_info.get("commit")
-        clone_repo(clone_url, repo_dir, commit=commit, source=source, retry_limit=retry_limit, retry_delay=retry_delay)
+        with TRACER.span("clone.repo", attributes={"directory": repo_dir, "clone_url": clone_url}):
+            clone_repo(clone_url, repo_dir, commit=commit, source=source, retry_limit=retry_limit, retry_delay=retry_delay)
 
     return 0
 
@@ -149,7 +152,8 @@ if __name__ == "__main__":
     update_logging(update_options=True)
     exit_code = 0
     try:
-        exit_code = main()
+        with TRACER.span("clone"):
+            exit_code = main()
     except Exception as e:
         LOGGER.exception(e)
         exit_code = 1
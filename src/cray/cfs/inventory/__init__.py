@@ -29,6 +29,7 @@ HT: https://realpython.com/factory-method-python/
 """
 from collections import defaultdict
 import logging
+import os
 from pathlib import Path
 from typing import Dict, Iterable
 
@@ -98,8 +99,7 @@ class CFSInventoryBase(object):
         if inventory_dir.is_file():
             inventory_dir.unlink()
         inventory_dir.mkdir(exist_ok=True)
-        with open(self.inventory_file, 'w') as inventory_file:
-            safe_dump(inventory, inventory_file, default_flow_style=False, indent=2)
+        write_yaml(self.inventory_file, inventory, temporary_dir=inventory_dir.parent)
 
     def get_groups_members(self) -> Dict[str, Iterable]:
         """
@@ -135,3 +135,17 @@ class CFSInventoryBase(object):
             self.cfs_name, members_groups
         )
         return members_groups
+
+
+def write_yaml(path, data, temporary_dir=None):
+    """
+    Write data to a YAML file.  The file is replaced in one step, so that a
+    reader never sees it partly written, even while it is being updated.
+    The file is written first in temporary_dir, which must be on the same
+    filesystem, and defaults to the file's own directory.
+    """
+    path = Path(path)
+    temporary = Path(temporary_dir or path.parent) / '.{}.tmp'.format(path.name)
+    with open(temporary, 'w') as f:
+        safe_dump(data, f, default_flow_style=False, indent=2)
+    os.replace(temporary, path)
@@ -38,8 +38,10 @@ from cray.cfs.inventory.repo import RepositoryInventory
 from cray.cfs.inventory.dynamic import DynamicInventory
 from cray.cfs.logging import setup_logging, update_logging
 import cray.cfs.operator.cfs.sessions as cfs_sessions
+from cray.cfs.utils.tracing import get_tracer
 
 LOGGER = logging.getLogger('cray.cfs.inventory')
+TRACER = get_tracer('cfs-inventory')
 INVENTORY_COMPLETE_FILE = "/inventory/complete"
 
 
@@ -84,7 +86,10 @@ def main():
     # file that the Ansible container is waiting for continues rather than
     # blocking the job
     try:
-        inventory_generator.write(inventory=inventory_generator.generate())
+        with TRACER.span('inventory.generate', attributes={'target': inventory_target}):
+            inventory = inventory_generator.generate()
+        with TRACER.span('inventory.write'):
+            inventory_generator.write(inventory=inventory)
     except CFSInventoryError as err:
         LOGGER.error(
             "An error occurred while attempting to generate the inventory. "
@@ -102,7 +107,8 @@ if __name__ == "__main__":
     update_logging(update_options=True)
     exit_code = 0
     try:
-        exit_code = main()
+        with TRACER.span('inventory'):
+            exit_code = main()
     except Exception:
         exit_code = 1
     mark_completed(exit_code)
@@ -26,28 +26,25 @@ cray.cfs.inventory.image - Generate an inventory from the targets specification
 in a CFS session object when the target definition is 'image' for the purposes
 of image customization.
 """
-from datetime import datetime
+from concurrent.futures import as_completed, Future, ThreadPoolExecutor, TimeoutError
 import json
 import logging
-from multiprocessing import Queue, Process
 import os
-import paramiko
-from paramiko.ssh_exception import SSHException
-import socket
-import time
-from typing import Tuple, Iterable, Dict
+import threading
+from pathlib import Path
+from typing import Callable, Tuple, Iterable, Dict
 from urllib.parse import ParseResult, urlunparse
 
 from kubernetes import client, config
 from kubernetes.config.config_exception import ConfigException
 import requests
-from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
-from yaml import safe_dump
-
-from cray.cfs.inventory import CFSInventoryBase, CFSInventoryError
+from cray.cfs.inventory import CFSInventoryBase, CFSInventoryError, write_yaml
+from cray.cfs.inventory.image.readiness import SSHContainerWaiter
 import cray.cfs.operator.cfs.configurations as cfs_configurations
 import cray.cfs.operator.cfs.sessions as cfs_sessions
+from cray.cfs.utils.clients import PooledSessionFactory
+from cray.cfs.utils.job_poller import chain
 
 
 LOGGER = logging.getLogger('cray.cfs.inventory.image')
@@ -66,13 +63,62 @@ k8score = client.CoreV1Api(_api_client)
 
 
 IMAGE_HOST_GROUP = "cfs_image"
+IMAGE_TO_JOB_FILE = '/inventory/image_to_job.yaml'
+# In streaming mode, a file named for each image is written here once the
+# image is in the inventory.  It holds the --limit for configuring that image.
+READY_DIR = '/inventory/ready'
+STREAMING_ENV = 'CFS_INVENTORY_STREAMING'
+IMAGE_SETUP_CONCURRENCY = int(os.environ.get('CFS_IMAGE_SETUP_CONCURRENCY', 10))
+IMAGE_SETUP_TIMEOUT = float(os.environ.get('CFS_IMAGE_SETUP_TIMEOUT', 60 * 60))  # seconds
+# Image names are read one image at a time unless more than this many are
+# needed, when a single read of every image is cheaper
+IMAGE_NAMES_LIST_THRESHOLD = int(os.environ.get('CFS_IMAGE_NAMES_LIST_THRESHOLD', 50))
+
+# Connections to IMS are pooled and shared by all of the image setup threads
+ims_sessions = PooledSessionFactory(
+    'http', pool_maxsize=IMAGE_SETUP_CONCURRENCY,
+    retries=Retry(total=20, backoff_factor=2, status_forcelist=[502, 503, 504]))
+# A cheap endpoint used to check that IMS is available
+IMS_PROBE_PATH = 'healthz/ready'
+
+_ims_api = None
+_ims_api_lock = threading.Lock()
+# IMS image names by image id, for the life of the process
+_image_names = {}
+_image_names_lock = threading.Lock()
 
 
 def get_IMS_API() -> Tuple[str, str, requests.Session]:
     """
-    Retrieve the IMS service host and port and a resilient/retry session object,
-    attempt to contact it
+    Retrieve the IMS service host and port and a resilient/retry session object.
+    IMS is contacted on the first call in each process to ensure it is
+    available.  The session shares pooled connections with every other
+    session returned, and belongs to the calling thread.
+    """
+    global _ims_api
+    with _ims_api_lock:
+        if _ims_api is None:
+            _ims_api = _connect_IMS_API()
+    host, port = _ims_api
+    return host, port, ims_sessions()
+
+
+def _get_ims(host: str, port: str, path: str):
     """
+    Reads an IMS resource, such as the list of jobs, on the pooled IMS
+    connections.  Returns None if IMS does not have it.
+    """
+    try:
+        resp = ims_sessions().get("http://{}:{}/{}".format(host, port, path))
+        if resp.status_code == 404:
+            return None
+        resp.raise_for_status()
+    except requests.exceptions.HTTPError as err:
+        raise CFSInventoryError('Unable to get IMS job status. Reason: %s' % err) from err
+    return resp.json()
+
+
+def _connect_IMS_API() -> Tuple[str, str]:
     port = os.environ.get('CRAY_IMS_SERVICE_PORT', 80)
     host = os.environ.get('CRAY_IMS_SERVICE_HOST', 'cray-ims')
 
@@ -83,37 +129,100 @@ def get_IMS_API() -> Tuple[str, str, requests.Session]:
         )
 
     # Attempt to contact IMS to ensure it is available
-    retries = Retry(total=20, backoff_factor=2, status_forcelist=[502, 503, 504])
-    session = requests.Session()
-    session.mount("http://", HTTPAdapter(max_retries=retries))
+    session = ims_sessions()
     ims_url = ParseResult(
-        scheme="http", netloc="cray-ims:80", path="images",
+        scheme="http", netloc="cray-ims:80", path=IMS_PROBE_PATH,
         params=None, query=None, fragment=None
     )
     resp = session.get(urlunparse(ims_url))
     if resp.ok:
-        return host, port, session
+        return host, port
     else:
         raise CFSInventoryError(
             "Unable to talk with IMS to gather inventory data. Tried url=%s" % urlunparse(ims_url)
         )
 
 
+def get_image_names(image_ids: Iterable[str]) -> Dict[str, str]:
+    """
+    Returns the names of the given IMS images, by image id.  Names that are not
+    already known are read with a request per image, up to
+    IMAGE_SETUP_CONCURRENCY at a time on the pooled IMS connections.  If more
+    than IMAGE_NAMES_LIST_THRESHOLD are needed, the list of all images is read
+    instead.  Images that IMS does not have are left out.
+    """
+    image_ids = list(image_ids)
+    with _image_names_lock:
+        missing = [image_id for image_id in image_ids if image_id not in _image_names]
+    if missing:
+        host, port, _ = get_IMS_API()
+        LOGGER.debug("Retrieving IMS image names for ids=%s", missing)
+        if len(missing) > IMAGE_NAMES_LIST_THRESHOLD:
+            images = _get_images(host, port) or []
+        else:
+            workers = min(IMAGE_SETUP_CONCURRENCY, len(missing))
+            with ThreadPoolExecutor(max_workers=workers,
+                                    thread_name_prefix='ims_image_names') as executor:
+                images = [image for image in executor.map(
+                    lambda image_id: _get_images(host, port, image_id), missing) if image]
+        with _image_names_lock:
+            _image_names.update({image['id']: image['name'] for image in images
+                                 if 'id' in image and 'name' in image})
+    with _image_names_lock:
+        return {image_id: _image_names[image_id] for image_id in image_ids
+                if image_id in _image_names}
+
+
+def _get_images(host: str, port: str, image_id: str = None):
+    """
+    Returns the IMS image record, or the list of all image records if no id is
+    given.  Returns None if the image does not exist.
+    """
+    path = 'images/' + image_id if image_id else 'images'
+    resp = ims_sessions().get("http://{}:{}/{}".format(host, port, path))
+    if resp.status_code == 404:
+        return None
+    resp.raise_for_status()
+    return resp.json()
+
+
 class ImageRootInventory(CFSInventoryBase):
     """
     CFS Inventory class to generate an inventory from the target groups
     specified as IMS UUIDs in a CFS object.
+
+    In streaming mode, enabled by setting CFS_INVENTORY_STREAMING to true, the
+    inventory and image to job mapping are rewritten as each image's SSH
+    container becomes available, and the image is then listed in READY_DIR.
+    Each image can be configured as soon as it is listed, with its own play
+    limited to it, while slower images are still being set up.
     """
     image_to_job = {}
 
+    def __init__(self, session, inventory_file=None, namespace=None, streaming=None):
+        super(ImageRootInventory, self).__init__(session, inventory_file=inventory_file,
+                                                 namespace=namespace)
+        if streaming is None:
+            streaming = os.environ.get(STREAMING_ENV, '').lower() == 'true'
+        self.streaming = streaming
+
     def generate(self):
         images_groups = self.get_members_groups()
 
         # Request IMS customization SSH containers for each image
-        ssh_containers = self._setup_ssh_containers(images_groups)
+        on_ready = self._write_ready_image if self.streaming else None
+        ssh_containers = self._setup_ssh_containers(images_groups, on_ready=on_ready)
+        inventory = self._build_inventory(ssh_containers)
+        LOGGER.info("Generated image to job mapping=%s ", json.dumps(self.image_to_job, indent=2))
+        LOGGER.info("Inventory generated: %s ", json.dumps(inventory, indent=2))
+        return inventory
 
-        # Create an inventory file with the IMS images, their groups, and
-        # connection information, leave a breadcrumb of image to job info too.
+    def _build_inventory(self, ssh_containers: Dict[str, Tuple[str, str, str, int]]) -> dict:
+        """
+        Create an inventory with the IMS images that have SSH containers, their
+        groups, and connection information, leave a breadcrumb of image to job
+        info too.
+        """
         inventory = {}
         inventory[IMAGE_HOST_GROUP] = {}
         inventory[IMAGE_HOST_GROUP]['hosts'] = {}
@@ -122,6 +231,8 @@ class ImageRootInventory(CFSInventoryBase):
             inventory[group] = {}
             inventory[group]['hosts'] = {}
             for image in images:
+                if image not in ssh_containers:
+                    continue
                 job_id, image_name, host, port = ssh_containers[image]
                 self.image_to_job[image_name] = {
                     'job_id': job_id,
@@ -135,9 +246,6 @@ class ImageRootInventory(CFSInventoryBase):
                     'ansible_python_interpreter': '/usr/bin/env python3',
                     'ansible_ssh_private_key_file': '/etc/ansible/ssh/id_image',
                 }
-
-        LOGGER.info("Generated image to job mapping=%s ", json.dumps(self.image_to_job, indent=2))
-        LOGGER.info("Inventory generated: %s ", json.dumps(inventory, indent=2))
         return inventory
 
     def write(self, inventory=None):
@@ -145,57 +253,56 @@ class ImageRootInventory(CFSInventoryBase):
         super(ImageRootInventory, self).write(inventory=inventory)
 
         # Also write out the image_to_job mapping for the teardown phase
-        with open('/inventory/image_to_job.yaml', 'w') as i2j_file:
-            safe_dump(self.image_to_job, i2j_file, default_flow_style=False, indent=2)
+        write_yaml(IMAGE_TO_JOB_FILE, self.image_to_job)
+
+    def _write_ready_image(self, ims_id: str,
+                           ssh_containers: Dict[str, Tuple[str, str, str, int]]) -> None:
+        """
+        Writes the inventory for the images that are ready so far, then lists
+        ims_id as ready.  The image is always in the inventory by the time it
+        is listed, and stays in it.
+        """
+        self.write(inventory=self._build_inventory(ssh_containers))
+        ready_dir = Path(READY_DIR)
+        ready_dir.mkdir(parents=True, exist_ok=True)
+        ready_file = ready_dir / ims_id
+        temporary = ready_dir.parent / '.{}.ready.tmp'.format(ims_id)
+        temporary.write_text(ims_id + '\n')
+        os.replace(temporary, ready_file)
+        LOGGER.info("IMS image=%r is ready for configuration", ims_id)
 
     def _setup_ssh_containers(
-            self, image_groups: Dict[str, Iterable]
+            self, image_groups: Dict[str, Iterable],
+            on_ready: Callable[[str, Dict[str, Tuple[str, str, str, int]]], None] = None
             ) -> Dict[str, Tuple[str, str, str, int]]:
         """
         Given a mapping of IMS UUIDs as keys, ask IMS to create an SSH container
         for each. Use the public_key to establish passwordless ssh connection to
-        the established host.
+        the established host.  If on_ready is given, it is called with the image
+        id and the containers so far as each container becomes available.
 
         Returns a mapping of IMS UUIDs to (job id, image name, host, port) tuples
         used for ssh connections to the created ssh containers.
         """
         key_uuid = ImageRootInventory._upload_public_key(self.cfs_name, self.cfs_namespace)
         ssh_containers = {}
-        processes = []
-        mpq = Queue()
         require_dkms = configuration_requires_dkms(self.session.get("configuration").get("name"))
 
         try:
-            for ims_id in image_groups.keys():
-                LOGGER.info("Requesting access to IMS image=%r", ims_id)
-                processes.append(
-                    Process(
-                        target=ImageRootInventory._request_ims_ssh,
-                        args=(mpq, ims_id, self.cfs_name, key_uuid, self.session['target'], require_dkms)
-                    )
-                )
-
-            for process in processes:
-                process.start()
-
-            for process in processes:
-                process.join()
-
-            # Process results into dictionary
-            launched = set(image_groups)
-            completed = set()
-            # We have already joined all processes, we can iterate until empty
-            while not mpq.empty():
-                returned_ims_id, job_id, image_name, host, port = mpq.get()
+            for returned_ims_id, job_id, image_name, host, port in \
+                    ImageRootInventory._request_ssh_containers(
+                        image_groups, self.cfs_name, key_uuid, self.session['target'],
+                        require_dkms):
                 LOGGER.info(
                     "Received ssh container result=%s",
                     (returned_ims_id, job_id, image_name, host, port)
                 )
                 ssh_containers.update({returned_ims_id: (job_id, image_name, host, port)})
                 LOGGER.debug("ssh_containers= %s", ssh_containers)
-                completed.add(returned_ims_id)
+                if on_ready:
+                    on_ready(returned_ims_id, ssh_containers)
 
-            if completed != launched:
+            if set(ssh_containers) != set(image_groups):
                 raise CFSInventoryError('One or more IMS jobs failed to launch.')
 
             return ssh_containers
@@ -205,28 +312,153 @@ class ImageRootInventory(CFSInventoryBase):
             self._remove_public_key(key_uuid)
 
     @staticmethod
-    def _request_ims_ssh(mpq, ims_id: str, cfs_session: str, public_key_id: str,
-                         session_target: dict, require_dkms: bool = False) -> None:
-        """ Kick off IMS customization job and request an SSH jailed container """
-        host, port, session = get_IMS_API()
+    def _request_ssh_containers(
+            image_ids: Iterable[str], cfs_session: str, public_key_id: str,
+            session_target: dict, require_dkms: bool = False,
+            timeout: float = IMAGE_SETUP_TIMEOUT
+            ) -> Iterable[Tuple[str, str, str, str, str]]:
+        """
+        Request an SSH container for each image, and wait for them to be ready
+        for use.  IMS jobs are created on up to IMAGE_SETUP_CONCURRENCY threads,
+        and the status of all of the jobs is read with one request per poll.
+        Yields an (Image ID, job id, image name, host, port) tuple for each
+        container that becomes available within timeout seconds.
+
+        Logs the images whose containers could not be set up.  On timeout, the
+        IMS jobs for the images that are not ready are deleted, and the job
+        requests and SSH checks still in progress are stopped.
+        """
+        host, port, _ = get_IMS_API()
+        archive_names = ImageRootInventory._get_archive_names(
+            image_ids, cfs_session, session_target)
+        waiter = SSHContainerWaiter(cfs_session,
+                                    get_jobs=lambda: _get_ims(host, port, 'jobs'),
+                                    get_job=lambda job_id: _get_ims(host, port, 'jobs/' + job_id),
+                                    timeout=timeout)
+        executor = ThreadPoolExecutor(max_workers=IMAGE_SETUP_CONCURRENCY,
+                                      thread_name_prefix='ims_ssh')
+        try:
+            jobs, containers = ImageRootInventory._submit_ssh_requests(
+                executor, waiter, host, port, image_ids, archive_names, cfs_session,
+                public_key_id, require_dkms)
+            try:
+                yield from ImageRootInventory._collect_ssh_containers(containers, timeout)
+            except TimeoutError:
+                ImageRootInventory._abandon_ssh_requests(host, port, jobs, containers, timeout)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            waiter.close()
+
+    @staticmethod
+    def _submit_ssh_requests(
+            executor: ThreadPoolExecutor, waiter: SSHContainerWaiter, host: str, port: str,
+            image_ids: Iterable[str], archive_names: Dict[str, str], cfs_session: str,
+            public_key_id: str, require_dkms: bool
+            ) -> Tuple[Dict[str, Future], Dict[Future, str]]:
+        """
+        Submits an IMS job request for each image that has a name.  Returns the
+        Futures for the IMS job ids, by image id, and the Futures for the SSH
+        containers, mapped to their image ids.
+        """
+        jobs = {}
+        containers = {}
+        for ims_id in image_ids:
+            if ims_id not in archive_names:
+                LOGGER.error("Unable to determine the name of IMS image=%r", ims_id)
+                continue
+            LOGGER.info("Requesting access to IMS image=%r", ims_id)
+            job = jobs[ims_id] = executor.submit(
+                ImageRootInventory._request_ims_ssh, host, port, ims_id, archive_names[ims_id],
+                cfs_session, public_key_id, require_dkms)
+            container = chain(job, lambda job_id, ims_id=ims_id: waiter.wait(ims_id, job_id))
+            containers[container] = ims_id
+        return jobs, containers
+
+    @staticmethod
+    def _collect_ssh_containers(
+            containers: Dict[Future, str], timeout: float
+            ) -> Iterable[Tuple[str, str, str, str, str]]:
+        """
+        Yields the SSH containers as they become ready, logging any that fail.
+        Raises TimeoutError if they are not all done within timeout seconds.
+        """
+        for container in as_completed(containers, timeout=timeout):
+            try:
+                yield container.result()
+            except Exception as err:
+                LOGGER.error("Unable to set up an SSH container for IMS image=%r: %s",
+                             containers[container], err)
 
-        archive_name = ""
+    @staticmethod
+    def _abandon_ssh_requests(host: str, port: str, jobs: Dict[str, Future],
+                              containers: Dict[Future, str], timeout: float) -> None:
+        """
+        Gives up on the images whose SSH containers were not ready in time.
+        Job requests that have not been sent are cancelled, and the IMS jobs
+        that were created for these images are deleted, including any whose
+        request is still in progress, once it completes.
+        """
+        abandoned = sorted(ims_id for container, ims_id in containers.items()
+                           if not container.done())
+        LOGGER.error("SSH containers for IMS images=%s were not ready within %d seconds",
+                     abandoned, timeout)
+        for ims_id in abandoned:
+            job = jobs[ims_id]
+            job.cancel()
+            job.add_done_callback(
+                lambda job, ims_id=ims_id: ImageRootInventory._delete_ims_job(host, port, ims_id,
+                                                                              job))
+
+    @staticmethod
+    def _delete_ims_job(host: str, port: str, ims_id: str, job: Future) -> None:
+        """Deletes the IMS job created by a job request, if it created one"""
+        if job.cancelled() or job.exception() is not None:
+            return
+        job_id = job.result()
+        LOGGER.info("Deleting IMS job=%s for IMS image=%r", job_id, ims_id)
+        try:
+            resp = ims_sessions().delete("http://{}:{}/jobs/{}".format(host, port, job_id))
+            resp.raise_for_status()
+        except requests.exceptions.RequestException as err:
+            LOGGER.warning("Unable to delete IMS job=%s for IMS image=%r; it must be deleted "
+                           "manually. Reason: %s", job_id, ims_id, err)
+
+    @staticmethod
+    def _get_archive_names(image_ids: Iterable[str], cfs_session: str,
+                           session_target: dict) -> Dict[str, str]:
+        """
+        Returns the names for the customized images, by IMS image id.  Names
+        come from the session's image_map, or else from the IMS image name.
+        Images without a name are left out.
+        """
+        archive_names = {}
         image_map = session_target.get("image_map") or []
-        for mapping in image_map:
-            if mapping.get("source_id", "") == ims_id:
-                archive_name = mapping.get("result_name")
-                break
-        else:
-            # Call IMS to get the image name
-            LOGGER.debug("Retrieving IMS image name for id=%s", ims_id)
+        for ims_id in image_ids:
+            for mapping in image_map:
+                if mapping.get("source_id", "") == ims_id:
+                    archive_names[ims_id] = mapping.get("result_name")
+                    break
+        unmapped = [ims_id for ims_id in image_ids if ims_id not in archive_names]
+        if unmapped:
             try:
-                resp = session.get("http://{}:{}/images/{}".format(host, port, ims_id))
-                resp.raise_for_status()
+                image_names = get_image_names(unmapped)
             except requests.exceptions.HTTPError as err:
                 raise CFSInventoryError(
-                    'Unable to determine the name of IMS image=%r. Reason: %s' % (ims_id, err)
+                    'Unable to determine the names of IMS images=%r. Reason: %s' % (unmapped, err)
                 ) from err
-            archive_name = resp.json()['name'] + "_cfs_" + cfs_session
+            for ims_id, name in image_names.items():
+                archive_names[ims_id] = name + "_cfs_" + cfs_session
+        return archive_names
+
+    @staticmethod
+    def _request_ims_ssh(host: str, port: str, ims_id: str, archive_name: str,
+                         cfs_session: str, public_key_id: str,
+                         require_dkms: bool = False) -> str:
+        """
+        Kick off IMS customization job and request an SSH jailed container.
+        Returns the IMS job id.
+        """
+        session = ims_sessions()
 
         # Call IMS to kick off a customization job
         body = {
@@ -245,7 +477,7 @@ class ImageRootInventory(CFSInventoryBase):
             body["require_dkms"] = True
         LOGGER.debug("Submitting IMS job with parameters: %s", body)
         try:
-            resp = requests.post("http://{}:{}/jobs".format(host, port), json=body)
+            resp = session.post("http://{}:{}/jobs".format(host, port), json=body)
             resp.raise_for_status()
         except requests.exceptions.HTTPError as err:
             raise CFSInventoryError(
@@ -253,129 +485,9 @@ class ImageRootInventory(CFSInventoryBase):
                 'Reason: %s. See the IMS logs for more information.' % (ims_id, err)
             )
 
-        # Wait for the SSH container to become available, put the resulting SSH
-        # connection information into the processing queue.
         job_id = resp.json()['id']
         cfs_sessions.update_session_status(cfs_session, {'ims_job': job_id})
-        mpq.put(ImageRootInventory._wait_for_ssh_container(ims_id, job_id, cfs_session))
-
-    @staticmethod  # noqa: C901
-    def _wait_for_ssh_container(  # noqa: C901
-            ims_id: str, job_id: str, cfs_session: str, poll: int = 5
-            ) -> Tuple[str, str, str, str, str]:
-        """
-        Poll IMS to determine when the SSH container is ready for use. Return a
-        tuple of the (Image ID, job id, image name, host, port).
-
-        Raises CFSInventoryError if anything goes wrong in the process.
-        """
-        host, port, session = get_IMS_API()
-        start_time = datetime.now()
-        LOGGER.debug("Retrieving IMS job status for job=%s image=%s", job_id, ims_id)
-        while True:
-            try:
-                resp = session.get("http://{}:{}/jobs/{}".format(host, port, job_id))
-                resp.raise_for_status()
-            except requests.exceptions.HTTPError as err:
-                raise CFSInventoryError(
-                    'Unable to get IMS job status for IMS image=%r. Reason: %s', ims_id, err
-                )
-
-            response = resp.json()
-
-            # Eureka!
-            if response['status'] == 'waiting_on_user':
-                for ssh_container in response['ssh_containers']:
-                    if ssh_container['name'] == cfs_session:
-                        try:
-                            host = ssh_container['connection_info']['cluster.local']['host']
-                            port = ssh_container['connection_info']['cluster.local']['port']
-                        except KeyError as err:
-                            raise CFSInventoryError(
-                                "Unable to retrieve IMS ssh container connection information. "
-                                "Error=%r. SSH Container=%s" % (err, ssh_container)
-                            )
-
-                        ImageRootInventory._wait_for_ssh_available(host, port, poll)
-                        return (
-                            ims_id, job_id, response['image_root_archive_name'], host, port
-                        )
-                # Not so fast
-                else:
-                    raise CFSInventoryError(
-                        "IMS status=waiting_on_user for IMS image=%r job=%r, but SSH"
-                        "container was not created." % (ims_id, job_id)
-                    )
-            # Ruh roh
-            elif response['status'] == 'error':
-                raise CFSInventoryError(
-                    "IMS status=error for IMS image=%r job=%r, SSH container was not created.",
-                    ims_id, job_id
-                )
-
-            # What the ?! Success means the job completed, but we haven't done
-            # anything yet.
-            elif response['status'] == 'success':
-                raise CFSInventoryError(
-                    "IMS status=success for IMS image=%r job=%r, SSH container was "
-                    "not created. Expected 'waiting_on_user' status.",
-                    ims_id, job_id
-                )
-
-            # Move along, nothing to see here
-            else:
-                elapsed = (datetime.now() - start_time).seconds
-                LOGGER.info(
-                    "IMS status=%s for IMS image=%r job=%r. Elapsed time=%ss", response['status'],
-                    ims_id, job_id, elapsed
-                )
-
-            time.sleep(poll)
-
-    @staticmethod
-    def _wait_for_ssh_available(host: str, port: str, poll: int = 5):
-        """
-        Poll IMS to determine when the SSH container is ready for use.
-
-        Raises CFSInventoryError if anything goes wrong in the process.
-        """
-        client = paramiko.SSHClient()
-        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        start_time = datetime.now()
-        LOGGER.info("Checking ssh availability")
-        while True:
-            elapsed = (datetime.now() - start_time).seconds
-            LOGGER.info(
-                "Waiting for SSH to be available at %s:%s. Elapsed time=%ss", host,
-                port, elapsed
-            )
-            time.sleep(2)
-            try:
-                # NOTE: this is the same command that the ansible container uses to test
-                #  the ssh connection
-                client.connect(host, port=int(port), key_filename='/inventory/ssh/id_image', timeout=poll)
-                stdin, stdout, stderr = client.exec_command("echo ~root && sleep 0")
-                rc = stdout.channel.recv_exit_status()
-                if rc != 0:
-                    # command failed - log output and try again
-                    for line in iter(lambda: stderr.readline(2048).rstrip(), ""):
-                        LOGGER.info(f"  STDERR: {line}")
-                    for line in iter(lambda: stdout.readline(2048).rstrip(), ""):
-                        LOGGER.info(f"  STDOUT: {line}")
-                    continue
-            except paramiko.AuthenticationException as e:
-                # SSH is up, but we need authentication to be available
-                LOGGER.info("Error while waiting for SSH to be authenticated: {}. Retrying..".format(e))
-                continue
-            except (socket.timeout, SSHException) as e:
-                LOGGER.info("Error while waiting for SSH to be available: {}. Retrying..".format(e))
-                continue
-            except Exception as e:
-                raise CFSInventoryError("Unexpected error connecting to the IMS container", e)
-
-            LOGGER.info("Closing client connection")
-            client.close()
-            return
+        return job_id
 
     @staticmethod
     def _upload_public_key(cfs_session: str, namespace: str) -> str:
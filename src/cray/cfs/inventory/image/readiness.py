@@ -0,0 +1,217 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+cray.cfs.inventory.image.readiness - Waits for the IMS SSH containers of a
+session to be ready for Ansible.
+
+The IMS jobs for all of the session's images are watched by one IMSJobPoller.
+Once a job is waiting_on_user, its SSH container is checked with a plain TCP
+connection that reads the SSH banner, and only once the banner is seen with
+the same authenticated command that the Ansible container uses.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+import logging
+import socket
+import threading
+import time
+from typing import Tuple
+
+import paramiko
+from paramiko.ssh_exception import SSHException
+
+from cray.cfs.inventory import CFSInventoryError
+from cray.cfs.utils.job_poller import IMSJobPoller
+
+LOGGER = logging.getLogger('cray.cfs.inventory.image.readiness')
+
+SSH_KEY_FILE = '/inventory/ssh/id_image'
+SSH_TIMEOUT = 5  # seconds
+SSH_MIN_DELAY = 0.25  # seconds
+SSH_MAX_DELAY = 5  # seconds
+SSH_CONCURRENCY = 10
+IMS_SETTLED_STATUSES = ('waiting_on_user', 'error', 'success')
+
+
+class SSHContainerWaiter:
+    """
+    Waits for the SSH containers of many IMS customization jobs at once.
+
+    wait(ims_id, job_id) returns a Future for the (image id, job id, image
+    name, host, port) of the job's SSH container, which is set once SSH is
+    available.  SSH checks run on up to ssh_concurrency threads, and give up
+    once timeout seconds have passed since wait was called, or once the waiter
+    is closed.
+    """
+
+    def __init__(self, cfs_session: str, get_jobs, get_job=None, poller=None,
+                 ssh_concurrency=SSH_CONCURRENCY, key_filename=SSH_KEY_FILE, timeout=None):
+        self.cfs_session = cfs_session
+        self.key_filename = key_filename
+        self.timeout = timeout
+        self.poller = poller or IMSJobPoller(get_jobs, get_job=get_job)
+        self._executor = ThreadPoolExecutor(max_workers=ssh_concurrency,
+                                            thread_name_prefix='ssh_probe')
+        self._stopped = threading.Event()
+
+    def wait(self, ims_id: str, job_id: str) -> Future:
+        LOGGER.debug("Waiting for IMS job=%s image=%s", job_id, ims_id)
+        result = Future()
+        deadline = time.monotonic() + self.timeout if self.timeout else None
+        job = self.poller.watch(job_id, lambda job: job.get('status') in IMS_SETTLED_STATUSES,
+                                timeout=self.timeout)
+        job.add_done_callback(lambda f: self._job_settled(f, ims_id, job_id, result, deadline))
+        return result
+
+    def close(self):
+        """Stops polling IMS and stops any SSH checks that are still running"""
+        self._stopped.set()
+        self.poller.stop()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _job_settled(self, job_future, ims_id, job_id, result, deadline):
+        try:
+            host, port, image_name = self._get_connection_info(job_future.result(), ims_id, job_id)
+        except Exception as e:
+            result.set_exception(e)
+            return
+        try:
+            probe = self._executor.submit(wait_for_ssh, host, port, self.key_filename,
+                                          deadline=deadline, stopped=self._stopped)
+        except RuntimeError as e:
+            # The waiter was closed
+            result.set_exception(e)
+            return
+        probe.add_done_callback(
+            lambda f: _set_future(result, f, (ims_id, job_id, image_name, host, port)))
+
+    def _get_connection_info(self, job: dict, ims_id: str, job_id: str) -> Tuple[str, int, str]:
+        """Returns the (host, port, image name) of the session's SSH container in a settled job"""
+        status = job['status']
+        if status == 'error':
+            raise CFSInventoryError(
+                "IMS status=error for IMS image=%r job=%r, SSH container was not created." %
+                (ims_id, job_id))
+        if status == 'success':
+            # Success means the job completed, but we haven't done anything yet.
+            raise CFSInventoryError(
+                "IMS status=success for IMS image=%r job=%r, SSH container was "
+                "not created. Expected 'waiting_on_user' status." % (ims_id, job_id))
+        for ssh_container in job.get('ssh_containers') or []:
+            if ssh_container['name'] == self.cfs_session:
+                try:
+                    host = ssh_container['connection_info']['cluster.local']['host']
+                    port = ssh_container['connection_info']['cluster.local']['port']
+                except KeyError as err:
+                    raise CFSInventoryError(
+                        "Unable to retrieve IMS ssh container connection information. "
+                        "Error=%r. SSH Container=%s" % (err, ssh_container))
+                return host, port, job['image_root_archive_name']
+        raise CFSInventoryError(
+            "IMS status=waiting_on_user for IMS image=%r job=%r, but SSH "
+            "container was not created." % (ims_id, job_id))
+
+
+def wait_for_ssh(host: str, port, key_filename: str = SSH_KEY_FILE, timeout: float = SSH_TIMEOUT,
+                 min_delay: float = SSH_MIN_DELAY, max_delay: float = SSH_MAX_DELAY,
+                 deadline: float = None, stopped: threading.Event = None) -> None:
+    """
+    Waits until a command can be run over SSH on host:port, checking for the
+    SSH banner before each authenticated attempt.  The delay between attempts
+    doubles from min_delay up to max_delay.
+
+    Raises CFSInventoryError if anything unexpected goes wrong, if SSH is
+    still not available at deadline, a time.monotonic() value, or if stopped
+    is set.
+    """
+    start = time.monotonic()
+    delay = min_delay
+    stopped = stopped or threading.Event()
+    while True:
+        if stopped.is_set():
+            raise CFSInventoryError("Stopped waiting for SSH at %s:%s" % (host, port))
+        if ssh_banner_ready(host, port, timeout) and ssh_command_ready(host, port, key_filename,
+                                                                       timeout):
+            LOGGER.info("SSH is available at %s:%s after %.1fs", host, port,
+                        time.monotonic() - start)
+            return
+        if deadline is not None and time.monotonic() + delay > deadline:
+            raise CFSInventoryError("SSH was not available at %s:%s after %ds" %
+                                    (host, port, time.monotonic() - start))
+        LOGGER.info("Waiting for SSH to be available at %s:%s. Elapsed time=%ds", host, port,
+                    time.monotonic() - start)
+        stopped.wait(delay)
+        delay = min(max_delay, delay * 2)
+
+
+def ssh_banner_ready(host: str, port, timeout: float = SSH_TIMEOUT) -> bool:
+    """Returns True if an SSH server at host:port accepts a connection and sends its banner"""
+    try:
+        with socket.create_connection((host, int(port)), timeout=timeout) as sock:
+            return sock.recv(256).startswith(b'SSH-')
+    except OSError as e:
+        LOGGER.debug("No SSH banner from %s:%s: %s", host, port, e)
+        return False
+
+
+def ssh_command_ready(host: str, port, key_filename: str = SSH_KEY_FILE,
+                      timeout: float = SSH_TIMEOUT) -> bool:
+    """
+    Returns True if the command that the Ansible container uses to test the
+    connection succeeds over SSH.
+
+    Raises CFSInventoryError for anything other than SSH not being ready yet.
+    """
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    try:
+        client.connect(host, port=int(port), key_filename=key_filename, timeout=timeout)
+        stdin, stdout, stderr = client.exec_command("echo ~root && sleep 0")
+        rc = stdout.channel.recv_exit_status()
+        if rc != 0:
+            # command failed - log output and try again
+            for line in iter(lambda: stderr.readline(2048).rstrip(), ""):
+                LOGGER.info(f"  STDERR: {line}")
+            for line in iter(lambda: stdout.readline(2048).rstrip(), ""):
+                LOGGER.info(f"  STDOUT: {line}")
+            return False
+        return True
+    except paramiko.AuthenticationException as e:
+        # SSH is up, but we need authentication to be available
+        LOGGER.info("Error while waiting for SSH to be authenticated: {}. Retrying..".format(e))
+        return False
+    except (socket.timeout, SSHException) as e:
+        LOGGER.info("Error while waiting for SSH to be available: {}. Retrying..".format(e))
+        return False
+    except Exception as e:
+        raise CFSInventoryError("Unexpected error connecting to the IMS container", e)
+    finally:
+        client.close()
+
+
+def _set_future(target: Future, source: Future, result) -> None:
+    error = source.exception()
+    if error is not None:
+        target.set_exception(error)
+    else:
+        target.set_result(result)
@@ -2,7 +2,7 @@
 #
 # MIT License
 #
-# (C) Copyright 2019-2022 Hewlett Packard Enterprise Development LP
+# (C) Copyright 2019-2022, 2026 Hewlett Packard Enterprise Development LP
 #
 # Permission is hereby granted, free of charge, to any person obtaining a
 # copy of this software and associated documentation files (the "Software"),
@@ -27,6 +27,7 @@ CFS Operator - A Python operator for the Cray Configuration Framework Service.
 """
 
 import logging
+import signal
 import threading
 import os
 from pkg_resources import get_distribution
@@ -38,9 +39,13 @@ from kubernetes.config.config_exception import ConfigException
 
 from .events import CFSSessionController
 from cray.cfs.logging import setup_logging, update_logging
+from cray.cfs.operator import metrics
+from cray.cfs.operator.cfs import requests_retry_session as cfs_session_factory
+from cray.cfs.operator.cfs.configurations import configuration_cache
 from cray.cfs.operator.cfs.options import options
 import cray.cfs.operator.cfs.sessions as sessions
 from cray.cfs.operator.liveness.timestamp import Timestamp
+from cray.cfs.utils.clients import requests_retry_session as ims_session_factory
 
 
 LOGGER = logging.getLogger('cray.cfs.operator')
@@ -53,15 +58,15 @@ _api_client = client.ApiClient()
 k8sjobs = client.BatchV1Api(_api_client)
 
 
-def session_cleanup():
+def session_cleanup(ttl_changed):
     """
     Periodically deletes all completed sessions older than the set ttl.
     """
     while True:
-        time.sleep(60 * 5)  # Run every 5 minutes
+        # Run every 5 minutes, or as soon as the ttl changes
+        ttl_changed.wait(timeout=60 * 5)
+        ttl_changed.clear()
         try:
-            options.update()
-            update_logging()
             ttl = options.session_ttl
             if ttl:
                 sessions.delete_sessions(status='complete', min_age=ttl)
@@ -83,10 +88,16 @@ def monotonic_liveliness_heartbeat():
 
 def main(env):
     """ Spawn watch processes of relevant Kubernetes objects """
+    # Options are kept current in the background, so that handling events needs no API calls
+    ttl_changed = threading.Event()
+    options.subscribe(lambda *args: update_logging(), key='logging_level')
+    options.subscribe(lambda *args: ttl_changed.set(), key='session_ttl')
+    options.start_refresher()
+
     # Periodically checks for and removes sessions older than the TTL
     cleanup = threading.Thread(
         target=session_cleanup,
-        args=(),
+        args=(ttl_changed,),
         name="cfs_session_cleanup",
     )
     cleanup.start()
@@ -98,9 +109,24 @@ def main(env):
     heartbeat.start()
 
     controller = CFSSessionController(env)
+    metrics_port = int(env.get('CFS_OPERATOR_METRICS_PORT', metrics.DEFAULT_PORT))
+    if metrics_port:
+        metrics.start(controller, port=metrics_port,
+                      session_factories=[cfs_session_factory, ims_session_factory],
+                      caches=[configuration_cache, controller.tenant_tokens])
+    signal.signal(signal.SIGTERM, lambda signum, frame: shutdown(controller))
     controller.run()
 
 
+def shutdown(controller):
+    """ Sends any pending job requests and session status updates, then exits """
+    LOGGER.info('Shutting down the CFS operator')
+    try:
+        controller.shutdown()
+    finally:
+        os._exit(0)
+
+
 def _init_env():
     # CFS Environment Variables
     cfs_environment = {k: v for k, v in os.environ.items() if 'CFS' in k}
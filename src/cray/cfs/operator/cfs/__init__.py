@@ -1,7 +1,7 @@
 #
 # MIT License
 #
-# (C) Copyright 2020-2022, 2024 Hewlett Packard Enterprise Development LP
+# (C) Copyright 2020-2022, 2024, 2026 Hewlett Packard Enterprise Development LP
 #
 # Permission is hereby granted, free of charge, to any person obtaining a
 # copy of this software and associated documentation files (the "Software"),
@@ -21,9 +21,9 @@
 # ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 # OTHER DEALINGS IN THE SOFTWARE.
 #
-from functools import partial
 import logging
-from requests_retry_session import requests_retry_session as base_requests_retry_session
+
+from cray.cfs.utils.clients import PooledSessionFactory
 
 PROTOCOL = 'http'
 API_VERSION = 'v3'
@@ -32,4 +32,5 @@ ENDPOINT = "%s://%s/%s" % (PROTOCOL, SERVICE_NAME, API_VERSION)
 
 LOGGER = logging.getLogger(__name__)
 
-requests_retry_session = partial(base_requests_retry_session, protocol=PROTOCOL)
+# Shared by all of the CFS API modules so that connections to CFS are reused
+requests_retry_session = PooledSessionFactory(PROTOCOL)
@@ -1,7 +1,7 @@
 #
 # MIT License
 #
-# (C) Copyright 2020-2023 Hewlett Packard Enterprise Development LP
+# (C) Copyright 2020-2023, 2026 Hewlett Packard Enterprise Development LP
 #
 # Permission is hereby granted, free of charge, to any person obtaining a
 # copy of this software and associated documentation files (the "Software"),
@@ -23,15 +23,25 @@
 #
 import ujson as json
 import logging
+import os
 from requests.exceptions import HTTPError, ConnectionError
 from urllib3.exceptions import MaxRetryError
 
 from . import requests_retry_session
 from . import ENDPOINT as BASE_ENDPOINT
+from cray.cfs.utils.cache import CacheEntry, TTLCache
 
 LOGGER = logging.getLogger(__name__)
 ENDPOINT = "%s/%s" % (BASE_ENDPOINT, __name__.lower().split('.')[-1])
 
+# Sessions usually share a handful of configurations, so they are cached by the
+# operator.  The TTL is short, because it is how long a session created just after
+# a change to its configuration may still be given the old one.
+configuration_cache = TTLCache(
+    maxsize=int(os.environ.get('CFS_CONFIGURATION_CACHE_SIZE', 128)),
+    ttl=float(os.environ.get('CFS_CONFIGURATION_CACHE_TTL', 5)),
+    name='configurations')
+
 
 def get_configuration(configuration_id):
     """Get information for a single configuration stored in CFS"""
@@ -51,3 +61,35 @@ def get_configuration(configuration_id):
         LOGGER.error("Non-JSON response from CFS: {}".format(e))
         raise e
     return configuration
+
+
+def get_cached_configuration(configuration_id):
+    """
+    Get a configuration from the configuration cache, reading it from CFS if
+    it is not cached or has expired.
+    """
+    return configuration_cache.get(configuration_id, _load_configuration)
+
+
+def _load_configuration(configuration_id, entry):
+    url = ENDPOINT + '/' + configuration_id
+    headers = {}
+    if entry is not None and entry.etag:
+        headers['If-None-Match'] = entry.etag
+    session = requests_retry_session()
+    try:
+        response = session.get(url, headers=headers)
+        if response.status_code == 304:
+            return entry
+        response.raise_for_status()
+        configuration = json.loads(response.text)
+    except (ConnectionError, MaxRetryError) as e:
+        LOGGER.error("Unable to connect to CFS: {}".format(e))
+        raise e
+    except HTTPError as e:
+        LOGGER.error("Unexpected response from CFS: {}".format(e))
+        raise e
+    except json.JSONDecodeError as e:
+        LOGGER.error("Non-JSON response from CFS: {}".format(e))
+        raise e
+    return CacheEntry(configuration, etag=response.headers.get('ETag'))
@@ -1,7 +1,7 @@
 #
 # MIT License
 #
-# (C) Copyright 2020-2023 Hewlett Packard Enterprise Development LP
+# (C) Copyright 2020-2023, 2026 Hewlett Packard Enterprise Development LP
 #
 # Permission is hereby granted, free of charge, to any person obtaining a
 # copy of this software and associated documentation files (the "Software"),
@@ -22,6 +22,9 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 #
 import logging
+import os
+import threading
+import time
 import ujson as json
 from requests.exceptions import HTTPError, ConnectionError
 from urllib3.exceptions import MaxRetryError
@@ -39,6 +42,8 @@ DEFAULTS = {
     'logging_level': 'INFO',
     'debug_wait_time': 3600
 }
+REFRESH_INTERVAL = float(os.environ.get('CFS_OPTIONS_REFRESH_INTERVAL', 30))  # seconds
+MAX_STALENESS = float(os.environ.get('CFS_OPTIONS_MAX_STALENESS', 120))  # seconds
 
 
 class Options:
@@ -46,23 +51,75 @@ class Options:
     Handler for reading configuration options from the CFS api
 
     This caches the options so that frequent use of these options do not all
-    result in network calls.
+    result in network calls.  Long running processes start a background
+    refresher and call refresh(), which only reads the options if they are
+    older than max_staleness.  Subscribers are called when an option changes.
     """
-    def __init__(self):
-        self.options = DEFAULTS
+    def __init__(self, max_staleness=MAX_STALENESS):
+        self.options = dict(DEFAULTS)
+        self.max_staleness = max_staleness
+        self._last_update = None
+        self._update_lock = threading.Lock()
+        self._subscribers = []
+        self._refresher = None
 
     def update(self):
         """Refreshes the cached options data"""
-        options = self._read_options()
-        self.options.update(options)
-        patch = {}
-        lower_options = [key.lower() for key in options.keys()]
-        for key, value in DEFAULTS.items():
-            if key.lower() not in lower_options:
-                LOGGER.info("Setting option {} to {}.".format(key, str(value)))
-                patch[key] = value
-        if patch:
-            self._patch_options(patch)
+        with self._update_lock:
+            options = self._read_options()
+            previous = dict(self.options)
+            self.options.update(options)
+            if options:
+                self._last_update = time.monotonic()
+            patch = {}
+            lower_options = [key.lower() for key in options.keys()]
+            for key, value in DEFAULTS.items():
+                if key.lower() not in lower_options:
+                    LOGGER.info("Setting option {} to {}.".format(key, str(value)))
+                    patch[key] = value
+            if patch:
+                self._patch_options(patch)
+            changes = [(key, previous.get(key), value) for key, value in self.options.items()
+                       if previous.get(key) != value]
+        for key, old, new in changes:
+            self._notify(key, old, new)
+
+    def refresh(self):
+        """Updates the options only if they are older than max_staleness"""
+        last_update = self._last_update
+        if last_update is None or time.monotonic() - last_update > self.max_staleness:
+            self.update()
+
+    def subscribe(self, callback, key=None):
+        """
+        Calls callback(key, old_value, new_value) whenever an option changes, or
+        only when the given option changes.
+        """
+        self._subscribers.append((key, callback))
+
+    def start_refresher(self, interval=REFRESH_INTERVAL):  # pragma: no cover
+        """Starts a thread that updates the options every interval seconds"""
+        if self._refresher:
+            return
+        self._refresher = threading.Thread(target=self._refresh_loop, args=(interval,),
+                                           name='cfs_options_refresher', daemon=True)
+        self._refresher.start()
+
+    def _refresh_loop(self, interval):  # pragma: no cover
+        while True:
+            try:
+                self.update()
+            except Exception as e:
+                LOGGER.warning('Exception refreshing options: {}'.format(e))
+            time.sleep(interval)
+
+    def _notify(self, key, old, new):
+        for subscribed_key, callback in self._subscribers:
+            if subscribed_key in (None, key):
+                try:
+                    callback(key, old, new)
+                except Exception as e:
+                    LOGGER.error('Error notifying a subscriber of option {}: {}'.format(key, e))
 
     def _read_options(self):
         """Retrieves the current options from the CFS api"""
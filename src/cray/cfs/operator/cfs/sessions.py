@@ -1,7 +1,7 @@
 #
 # MIT License
 #
-# (C) Copyright 2020-2023 Hewlett Packard Enterprise Development LP
+# (C) Copyright 2020-2023, 2026 Hewlett Packard Enterprise Development LP
 #
 # Permission is hereby granted, free of charge, to any person obtaining a
 # copy of this software and associated documentation files (the "Software"),
@@ -21,6 +21,7 @@
 # ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 # OTHER DEALINGS IN THE SOFTWARE.
 #
+import datetime
 import ujson as json
 import logging
 from requests.exceptions import HTTPError, ConnectionError
@@ -28,9 +29,11 @@ from urllib3.exceptions import MaxRetryError
 
 from . import requests_retry_session
 from . import ENDPOINT as BASE_ENDPOINT
+from cray.cfs.utils.json_stream import iter_json_array, project, StreamDecodeError
 
 LOGGER = logging.getLogger(__name__)
 ENDPOINT = "%s/%s" % (BASE_ENDPOINT, __name__.lower().split('.')[-1])
+STREAM_CHUNK_SIZE = 64 * 1024
 
 
 def get_session(session_id):
@@ -53,18 +56,55 @@ def get_session(session_id):
     return cfs_session
 
 
-def iter_sessions(parameters=None):
-    """Get information for all CFS sessions"""
+def iter_sessions(parameters=None, stats=None, fields=None):
+    """
+    Get information for all CFS sessions
+
+    Sessions are decoded from each page as it is read rather than loading the
+    whole page at once.  If fields are given, such as ['name',
+    'status.session.job'], each session only holds those fields.  If a stats
+    dict is given, the bytes and sessions received are added to it.
+    """
     next_parameters = parameters
     while True:
-        data = get_sessions(parameters=next_parameters)
-        for session in data["sessions"]:
-            yield session
-        next_parameters = data["next"]
+        page = {}
+        for session in _stream_sessions(next_parameters, page, stats):
+            yield project(session, fields) if fields else session
+        next_parameters = page.get("next")
         if not next_parameters:
             break
 
 
+def _stream_sessions(parameters, page, stats):
+    url = ENDPOINT
+    session = requests_retry_session()
+    try:
+        with session.get(url, params=parameters or {}, stream=True) as response:
+            response.raise_for_status()
+            chunks = response.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+            if stats is not None:
+                chunks = _count_bytes(chunks, stats)
+            for cfs_session in iter_json_array(chunks, 'sessions', other=page):
+                if stats is not None:
+                    stats['sessions'] = stats.get('sessions', 0) + 1
+                yield cfs_session
+    except (ConnectionError, MaxRetryError) as e:
+        LOGGER.error("Unable to connect to CFS: {}".format(e))
+        raise e
+    except HTTPError as e:
+        LOGGER.error("Unexpected response from CFS: {}".format(e))
+        raise e
+    except StreamDecodeError as e:
+        LOGGER.error("Non-JSON response from CFS: {}".format(e))
+        raise e
+
+
+def _count_bytes(chunks, stats):
+    for chunk in chunks:
+        stats['bytes'] = stats.get('bytes', 0) + len(chunk)
+        yield chunk
+
+
 def get_sessions(parameters=None):
     """Get information for all CFS sessions"""
     url = ENDPOINT
@@ -127,6 +167,22 @@ def delete_sessions(status=None, min_age=None):
         raise e
 
 
+def parse_time(value):
+    """
+    Returns a timezone aware datetime for a time from the CFS API, or None if
+    it is not set or cannot be parsed.  Times without a timezone are UTC.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed
+
+
 def update_session_status(session_id, data):
     """Helper specifically for updating session status"""
     session_status = {'status': {'session': data}}
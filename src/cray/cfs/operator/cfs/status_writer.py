@@ -0,0 +1,274 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Batches session status updates to the CFS API.
+
+The CFS API has no bulk update for sessions, so updates made within a short
+window are coalesced into one PATCH per session, and the PATCHes for
+different sessions are sent concurrently over the pooled connections.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait
+import logging
+import threading
+import time
+
+from requests.exceptions import HTTPError
+
+from . import sessions as cfs_sessions
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_WINDOW = 0.2  # seconds
+DEFAULT_CONCURRENCY = 10
+DEFAULT_MAX_ATTEMPTS = 8
+DEFAULT_RETRY_DELAY = 1  # seconds
+DEFAULT_MAX_RETRY_DELAY = 30  # seconds
+# How long stopping keeps retrying updates that fail
+DEFAULT_STOP_TIMEOUT = 10  # seconds
+# A session's status only ever moves forward through these states
+STATUS_ORDER = {'pending': 0, 'running': 1, 'complete': 2}
+
+
+class SessionStatusWriter:
+    """
+    Coalesces session status updates and writes them to CFS in the background.
+
+    Updates for a session are merged until window seconds after the first
+    unsent update, and are then sent as a single PATCH.  Later values win,
+    except that the status itself never moves backwards, so a running and
+    then a complete update in the same window send only the complete one.
+    Updates that fail are merged back in and resent after an exponential
+    backoff, starting at retry_delay seconds and capped at max_retry_delay, up
+    to max_attempts times, unless the session no longer exists.
+
+    An update can be given an on_done callback, which is called with True
+    once the update has been sent, or the session no longer exists, and with
+    False if the update is given up on.
+
+    Updates made with sync=True are sent immediately from the calling thread,
+    for callers that need the response or the error, such as the 409 when a
+    session's job has already been set.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, concurrency=DEFAULT_CONCURRENCY,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS, retry_delay=DEFAULT_RETRY_DELAY,
+                 max_retry_delay=DEFAULT_MAX_RETRY_DELAY, name='cfs_status_writer'):
+        self.window = window
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.name = name
+        self._condition = threading.Condition()
+        self._send_lock = threading.Lock()
+        self._pending = {}
+        self._due = None
+        self._thread = None
+        self._stopped = False
+        self._executor = ThreadPoolExecutor(max_workers=concurrency,
+                                            thread_name_prefix=name + '_send')
+        self._counts = {'updates': 0, 'patches': 0, 'dropped': 0}
+
+    def update(self, session_id, data, sync=False, on_done=None):
+        """
+        Records a status update for a session.  With sync=True the update, and
+        any unsent updates for the session, are sent immediately and the
+        updated session is returned.
+        """
+        if sync:
+            return self._update_now(session_id, data)
+        with self._condition:
+            self._counts['updates'] += 1
+            self._add(session_id, data, 0, newer=True, callbacks=[on_done] if on_done else [])
+            if self._thread is None and not self._stopped:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        """
+        Sends every unsent update now, including any waiting to be retried,
+        returning once they have been sent
+        """
+        with self._send_lock:
+            with self._condition:
+                batch, self._pending, self._due = self._pending, {}, None
+            self._send(batch)
+
+    def _flush_due(self):
+        """Sends the unsent updates that are not waiting to be retried"""
+        with self._send_lock:
+            with self._condition:
+                now = time.monotonic()
+                batch = {session_id: pending for session_id, pending in self._pending.items()
+                         if pending[2] <= now}
+                for session_id in batch:
+                    del self._pending[session_id]
+                self._due = min((pending[2] for pending in self._pending.values()),
+                                default=None)
+            self._send(batch)
+
+    def stop(self, timeout=DEFAULT_STOP_TIMEOUT):
+        """
+        Sends every unsent update and stops the background writer.  Updates
+        that fail are retried until timeout seconds have passed, and any that
+        are still unsent then are logged.
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        deadline = time.monotonic() + timeout
+        unsent = {}
+        self.flush()
+        while True:
+            with self._condition:
+                if not self._pending:
+                    break
+                now = time.monotonic()
+                if now >= deadline:
+                    unsent, self._pending, self._due = self._pending, {}, None
+                    break
+                retry_at = min(pending[2] for pending in self._pending.values())
+            time.sleep(max(0, min(retry_at, deadline) - now))
+            self.flush()
+        self._executor.shutdown(wait=True)
+        for session_id, (data, _, _, callbacks) in unsent.items():
+            LOGGER.warning("Status update for CFS Session=%s was not written before stopping: %s",
+                           session_id, data)
+            self._count('dropped')
+            _call(callbacks, False)
+
+    def stats(self):
+        with self._condition:
+            stats = dict(self._counts)
+            stats['pending'] = len(self._pending)
+        return stats
+
+    def _update_now(self, session_id, data):
+        with self._condition:
+            self._counts['updates'] += 1
+            pending = self._pending.pop(session_id, None)
+        merged = merge_status(pending[0], data) if pending else data
+        try:
+            response = cfs_sessions.update_session_status(session_id, data=merged)
+        except Exception:
+            if pending:
+                with self._condition:
+                    self._add(session_id, pending[0], pending[1], newer=False,
+                              callbacks=pending[3], not_before=pending[2])
+            raise
+        with self._condition:
+            self._counts['patches'] += 1
+        if pending:
+            _call(pending[3], True)
+        return response
+
+    def _add(self, session_id, data, attempts, newer, callbacks=(), not_before=0):
+        """
+        Merges an update into the pending updates.  Pending updates are lists
+        of the data, the number of failed attempts, the time before which it
+        is not to be resent and the callbacks.  Callers must hold _condition.
+        """
+        pending = self._pending.get(session_id)
+        if pending is None:
+            pending = self._pending[session_id] = [dict(data), attempts, not_before,
+                                                   list(callbacks)]
+        elif newer:
+            pending[0] = merge_status(pending[0], data)
+            pending[3].extend(callbacks)
+        else:
+            # A failed update is resent, but anything newer for the session wins
+            pending[0] = merge_status(data, pending[0])
+            pending[1] = max(pending[1], attempts)
+            pending[2] = max(pending[2], not_before)
+            pending[3][:0] = callbacks
+        due = max(time.monotonic() + self.window, pending[2])
+        if self._due is None or due < self._due:
+            self._due = due
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    wait_time = None if self._due is None else self._due - time.monotonic()
+                    if wait_time is not None and wait_time <= 0:
+                        break
+                    self._condition.wait(timeout=wait_time)
+                if self._stopped:
+                    return
+            self._flush_due()
+
+    def _send(self, batch):
+        if not batch:
+            return
+        futures = [self._executor.submit(self._patch, session_id, data, attempts, callbacks)
+                   for session_id, (data, attempts, _, callbacks) in batch.items()]
+        # Batches are sent one at a time, so a session's updates are never reordered
+        wait(futures)
+
+    def _patch(self, session_id, data, attempts, callbacks):
+        try:
+            cfs_sessions.update_session_status(session_id, data=data)
+        except Exception as e:
+            if isinstance(e, HTTPError) and getattr(e.response, 'status_code', None) == 404:
+                LOGGER.info("Not updating the status of deleted CFS Session=%s", session_id)
+                self._count('dropped')
+                return _call(callbacks, True)
+            if attempts + 1 >= self.max_attempts:
+                LOGGER.error("Dropping status update for CFS Session=%s after %d attempts: %s",
+                             session_id, attempts + 1, data)
+                self._count('dropped')
+                return _call(callbacks, False)
+            delay = min(self.max_retry_delay, self.retry_delay * 2 ** attempts)
+            LOGGER.warning("Unable to update the status of CFS Session=%s; retrying in %.1f "
+                           "seconds: %s", session_id, delay, e)
+            with self._condition:
+                self._add(session_id, data, attempts + 1, newer=False, callbacks=callbacks,
+                          not_before=time.monotonic() + delay)
+            return
+        self._count('patches')
+        _call(callbacks, True)
+
+    def _count(self, key):
+        with self._condition:
+            self._counts[key] += 1
+
+
+def _call(callbacks, sent):
+    for callback in callbacks:
+        try:
+            callback(sent)
+        except Exception as e:
+            LOGGER.error("Unhandled %s exception in status update callback: %s",
+                         type(e).__name__, e)
+
+
+def merge_status(current, update):
+    """Returns the session status fields from current updated with update"""
+    merged = dict(current)
+    for key, value in update.items():
+        if key == 'status' and \
+                STATUS_ORDER.get(value, 0) < STATUS_ORDER.get(merged.get('status'), 0):
+            continue
+        merged[key] = value
+    return merged
@@ -0,0 +1,259 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Worker pool and offset bookkeeping for processing CFS session events in parallel.
+
+Events for different sessions are handled concurrently, while events for the
+same session are always handled one at a time in the order they were received,
+so a DELETE can never overtake its CREATE.  Events can be split into weighted
+lanes, so that a flood of one kind of event does not delay another.
+"""
+from collections import deque
+import logging
+import threading
+import time
+
+LOGGER = logging.getLogger('cray.cfs.operator.events.event_pipeline')
+
+DEFAULT_WORKERS = 10
+DEFAULT_MAX_PENDING = 100
+DEFAULT_LANE = 'default'
+
+
+class Lane:
+    """
+    A class of tasks with its own share of the workers and its own limit on
+    queued tasks.  When several lanes have work, each gets workers in
+    proportion to its weight.
+    """
+
+    def __init__(self, name, weight=1, max_pending=DEFAULT_MAX_PENDING):
+        self.name = name
+        self.weight = weight
+        self.max_pending = max_pending
+        self.slots = threading.BoundedSemaphore(max_pending)
+        # Keys whose next task is in this lane, in the order they became ready
+        self.ready = deque()
+        self.current_weight = 0
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.latency_seconds = 0.0
+
+    def stats(self):
+        return {
+            'queued': self.queued,
+            'running': self.running,
+            'completed': self.completed,
+            'wait_seconds': self.wait_seconds,
+            'max_wait_seconds': self.max_wait_seconds,
+            'latency_seconds': self.latency_seconds,
+        }
+
+
+class KeyedWorkerPool:
+    """
+    A bounded pool of worker threads that runs tasks in parallel across keys,
+    but serially and in submission order for any single key.
+
+    Each lane allows at most its max_pending tasks to be queued or running at
+    any time.  Once that limit is reached, submitting to the lane blocks, which
+    applies back pressure to the caller.  Free workers take the next task from
+    the lanes with smooth weighted round robin.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, max_pending=DEFAULT_MAX_PENDING,
+                 name='cfs_event_worker', lanes=None):
+        self.workers = workers
+        self.name = name
+        self.lanes = {lane.name: lane for lane in lanes or [Lane(DEFAULT_LANE,
+                                                                 max_pending=max_pending)]}
+        self._condition = threading.Condition()
+        self._pending = {}
+        self._stopping = False
+        self._threads = []
+
+    def start(self):
+        self._stopping = False
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name='{}_{}'.format(self.name, i),
+                                      daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """Stops the workers once all previously submitted tasks have run"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def reserve(self, lane=DEFAULT_LANE, timeout=None):
+        """
+        Takes a place in a lane for a task that will be submitted later.
+        Returns False if the lane is still full after timeout seconds.
+        """
+        return self.lanes[lane].slots.acquire(timeout=timeout)
+
+    def release(self, lane=DEFAULT_LANE):
+        """Gives up a place reserved in a lane, without submitting a task"""
+        self.lanes[lane].slots.release()
+
+    def submit(self, key, fn, *args, timeout=None, lane=DEFAULT_LANE, reserved=False):
+        """
+        Queues fn(*args) in a lane, to run after any earlier tasks submitted
+        with the same key, whatever lane they are in.  If a place has already
+        been reserved in the lane, the task takes that place and never waits.
+
+        Returns False without queueing the task if the lane is still full after
+        timeout seconds.
+        """
+        lane = self.lanes[lane]
+        if not reserved and not lane.slots.acquire(timeout=timeout):
+            return False
+        task = (lane, fn, args, time.monotonic())
+        with self._condition:
+            lane.queued += 1
+            tasks = self._pending.get(key)
+            if tasks is not None:
+                # The key is already queued or running, and the task will be run in order
+                tasks.append(task)
+                return True
+            self._pending[key] = deque([task])
+            lane.ready.append(key)
+            self._condition.notify()
+        return True
+
+    @property
+    def pending(self):
+        with self._condition:
+            return sum(len(tasks) for tasks in self._pending.values())
+
+    def stats(self):
+        """Returns the queue depth and timing counters for each lane"""
+        with self._condition:
+            return {name: lane.stats() for name, lane in self.lanes.items()}
+
+    def _next_lane(self):
+        """
+        Picks the lane to take the next task from.  Callers must hold _condition.
+        """
+        ready = [lane for lane in self.lanes.values() if lane.ready]
+        if not ready:
+            return None
+        total = 0
+        for lane in ready:
+            lane.current_weight += lane.weight
+            total += lane.weight
+        lane = max(ready, key=lambda lane: lane.current_weight)
+        lane.current_weight -= total
+        return lane
+
+    def _run(self):
+        while True:
+            with self._condition:
+                lane = self._next_lane()
+                while lane is None:
+                    if self._stopping:
+                        return
+                    self._condition.wait()
+                    lane = self._next_lane()
+                key = lane.ready.popleft()
+                _, fn, args, submitted = self._pending[key][0]
+                wait = time.monotonic() - submitted
+                lane.queued -= 1
+                lane.running += 1
+                lane.wait_seconds += wait
+                lane.max_wait_seconds = max(lane.max_wait_seconds, wait)
+            self._run_task(key, lane, fn, args, submitted)
+
+    def _run_task(self, key, lane, fn, args, submitted):
+        try:
+            fn(*args)
+        except Exception as e:
+            LOGGER.error('Unhandled %s exception in event worker: %s', type(e).__name__, e)
+        finally:
+            lane.slots.release()
+            with self._condition:
+                lane.running -= 1
+                lane.completed += 1
+                lane.latency_seconds += time.monotonic() - submitted
+                tasks = self._pending[key]
+                tasks.popleft()
+                if tasks:
+                    # The key's next task waits its turn in its own lane
+                    tasks[0][0].ready.append(key)
+                    self._condition.notify()
+                else:
+                    del self._pending[key]
+
+
+class OffsetTracker:
+    """
+    Tracks which Kafka offsets are still being processed for each partition.
+
+    Events complete out of order when they are processed in parallel, so the
+    offset that is safe to commit for a partition is the lowest offset that has
+    not yet completed.  Committing anything beyond that could lose an event if
+    the operator restarts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._next_offset = {}
+        self._committed = {}
+
+    def add(self, partition, offset):
+        with self._lock:
+            self._in_flight.setdefault(partition, set()).add(offset)
+            self._next_offset[partition] = max(self._next_offset.get(partition, 0), offset + 1)
+
+    def complete(self, partition, offset):
+        with self._lock:
+            self._in_flight.get(partition, set()).discard(offset)
+
+    def committable(self):
+        """
+        Returns a mapping of partition to the offset that can now be committed,
+        including only partitions that have progressed since the last call to
+        mark_committed.
+        """
+        offsets = {}
+        with self._lock:
+            for partition, next_offset in self._next_offset.items():
+                in_flight = self._in_flight.get(partition)
+                offset = min(in_flight) if in_flight else next_offset
+                if offset > self._committed.get(partition, -1):
+                    offsets[partition] = offset
+        return offsets
+
+    def mark_committed(self, offsets):
+        with self._lock:
+            for partition, offset in offsets.items():
+                self._committed[partition] = max(self._committed.get(partition, -1), offset)
@@ -1,7 +1,7 @@
 #
 # MIT License
 #
-# (C) Copyright 2023 Hewlett Packard Enterprise Development LP
+# (C) Copyright 2023, 2026 Hewlett Packard Enterprise Development LP
 #
 # Permission is hereby granted, free of charge, to any person obtaining a
 # copy of this software and associated documentation files (the "Software"),
@@ -57,7 +57,8 @@ class IMSJobMonitor:
     @staticmethod
     def _cleanup_orphaned_ims_jobs(ims_jobs):
         error = None
-        for session in cfs_sessions.iter_sessions(parameters={"status": "complete"}):
+        for session in cfs_sessions.iter_sessions(parameters={"status": "complete"},
+                                                  fields=["status.session.ims_job"]):
             try:
                 ims_job_id = session.get("status", {}).get("session", {}).get("ims_job")
                 if ims_job_id and ims_job_id in ims_jobs:
@@ -0,0 +1,373 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Builds the k8s job for a single CFS session.
+"""
+import logging
+import shlex
+
+from kubernetes import client
+import ujson as json
+
+from cray.cfs.operator.events.job_template import SHARED_DIRECTORY, wait_for_envoy_boilerplate
+from cray.cfs.utils.tracing import TRACEPARENT, TRACEPARENT_ANNOTATION
+
+LOGGER = logging.getLogger('cray.cfs.operator.events.job_builder')
+DEFAULT_ANSIBLE_VERBOSITY = 0
+
+
+class JobBuilder:
+    """
+    Assembles the k8s job object for one session.
+
+    All per-session state is computed when the builder is created and never
+    modified afterwards, and the options it needs are read once up front, so
+    any number of builders can run at the same time from different threads.
+    """
+
+    def __init__(self, template, session_data, job_id, configuration, vault_token_env,
+                 options, trace_context=None):
+        self.template = template
+        self.env = template.env
+        self.session_data = session_data
+        self.job_id = job_id
+        self.configuration = configuration
+        self.vault_token_env = vault_token_env
+        self.trace_context = trace_context
+        self.debug_wait_time = options.debug_wait_time
+        self.session_ttl = options.session_ttl
+
+        self.ansible_config = session_data.get('ansible', {}).get(
+            'config', options.default_ansible_config)
+        self.job_env = self._build_job_env()
+        self.trace_env = self._build_trace_env()
+        self.image_env = []
+        if session_data['target']['definition'] == 'image':
+            self.image_env = template.image_env_vars
+        self.annotations = None
+        if trace_context is not None:
+            self.annotations = {TRACEPARENT_ANNOTATION: trace_context.traceparent}
+        self.volume_mounts = template.volume_mounts
+        self.volumes = template.volumes(self.ansible_config)
+
+    def _build_job_env(self):
+        """
+        Returns the env vars used in the session job, adding the per-session
+        vars to the template's
+        """
+        job_env = dict(self.template.env_vars)
+        job_env['SESSION_NAME'] = client.V1EnvVar(
+            name='SESSION_NAME',
+            value=self.session_data['name']
+        )
+        job_env['SESSION_CONFIGURATION_NAME'] = client.V1EnvVar(
+            name='SESSION_CONFIGURATION_NAME',
+            value=self.session_data['configuration']['name']
+        )
+        job_env['SESSION_CONFIGURATION_LIMIT'] = client.V1EnvVar(
+            name='SESSION_CONFIGURATION_LIMIT',
+            value=self.session_data['configuration']['limit']
+        )
+        return job_env
+
+    def _build_trace_env(self):
+        """
+        Returns the env vars that let the job's containers add their spans to
+        the session's trace, or nothing if the session is not being traced
+        """
+        if self.trace_context is None:
+            return []
+        return self.template.trace_env_vars + [
+            client.V1EnvVar(name=TRACEPARENT, value=self.trace_context.traceparent)]
+
+    def clone_container(self):
+        """
+        Creates the container to clone repos in the configuration
+        for this session.
+        """
+        clone_container = client.V1Container(
+            name='git-clone',
+            image=self.env['CRAY_CFS_UTIL_IMAGE'],
+            volume_mounts=[
+                self.volume_mounts['CONFIG_VOL'],
+                self.volume_mounts['CA_PUBKEY']
+            ],  # V1VolumeMount
+            env=[self.job_env['GIT_SSL_CAINFO'],
+                 self.job_env['VCS_USERNAME'],
+                 self.job_env['VCS_PASSWORD'],
+                 self.job_env['SESSION_CONFIGURATION_NAME'],
+                 self.job_env['SESSION_CONFIGURATION_LIMIT'],
+                 self.job_env['GIT_RETRY_MAX'],
+                 self.job_env['GIT_RETRY_DELAY'],
+                 self.job_env['VAULT_ADDR']] + self.trace_env,  # env
+            command=["/bin/sh", "-c"],  # command
+            args=["python3 -m cray.cfs.clone"],  # args
+        )  # V1Container
+
+        return clone_container
+
+    def inventory_container(self):
+        """
+        Create the inventory container object
+        """
+        create_ssh_dir_cmd = 'mkdir -p {}/ssh '.format(SHARED_DIRECTORY)
+
+        # For live nodes, use the signed keys from vault with a cert generated
+        # by the CFS trust mechanisms
+        create_ssh_keys_cmd = 'cp /secret-keys/* {0}/ssh/ && ' \
+                              'chmod 600 {0}/ssh/id_ecdsa && ' \
+                              'cp /secret-certs/* {0}/ssh/ '.format(SHARED_DIRECTORY)
+
+        # For image customization, generate some keys for use with Ansible
+        if self.session_data['target']['definition'] == "image":
+            create_ssh_keys_cmd += ' && ssh-keygen -t ecdsa -N "" -f {}/ssh/id_image '.format(
+                SHARED_DIRECTORY)
+
+        copy_ansible_cfg_cmd = 'cp /tmp/ansible/ansible.cfg {}/ '.format(SHARED_DIRECTORY)
+        run_inventory_cmd = 'python3 -m cray.cfs.inventory'
+        command = [
+            create_ssh_dir_cmd + ' && ' +
+            create_ssh_keys_cmd + ' && ' +
+            copy_ansible_cfg_cmd + ' && ' +
+            wait_for_envoy_boilerplate + ' && ' +
+            run_inventory_cmd
+        ]
+
+        return client.V1Container(
+            name='inventory',
+            image=self.env['CRAY_CFS_UTIL_IMAGE'],
+            volume_mounts=[
+                self.volume_mounts['CONFIG_VOL'],
+                self.volume_mounts['ANSIBLE_CONFIG'],
+                self.volume_mounts['CA_PUBKEY'],
+                self.volume_mounts['CFS_TRUST_KEYS'],
+                self.volume_mounts['CFS_TRUST_CERTIFICATE']
+            ],  # V1VolumeMount
+            env=[
+                self.job_env['CFS_OPERATOR_LOG_LEVEL'],
+                self.job_env['SESSION_NAME'],
+                self.job_env['RESOURCE_NAMESPACE'],
+                self.job_env['SSL_CAINFO']
+            ] + self.trace_env + self.image_env,  # env
+            command=['/bin/bash', '-c'],
+            security_context=client.V1SecurityContext(
+                run_as_user=0
+            ),
+            args=command,
+        )  # V1Container
+
+    def ansible_container(self):
+        """
+        Get the list of Ansible containers to be run in the job
+        """
+        ansible_args = []
+        disable_state_recording = False
+        if self.session_data['target']['definition'] == 'image':
+            disable_state_recording = True
+        if len(self.configuration) == 1 and self.configuration[0][0] == "debug":
+            disable_state_recording = True
+        if 'ansible' in self.session_data:
+            ansible_spec = self.session_data['ansible']
+
+            # This creates a flag equal the the specified number of v's.
+            # e.g if ansible_vint = 3, ansible_verbosity="-vvv"
+            # The range of values is validated in the api spec.
+            ansible_vint = ansible_spec.get('verbosity', DEFAULT_ANSIBLE_VERBOSITY)
+            ansible_verbosity = '-' + 'v' * ansible_vint if ansible_vint else None
+            if ansible_verbosity:
+                ansible_args.append(ansible_verbosity)
+
+            limit = ansible_spec.get('limit', None)
+            if self.session_data['target']['definition'] == 'image' and not limit:
+                limit = ','.join([member for group in self.session_data['target']['groups']
+                                  for member in group['members']])
+            if limit:
+                ansible_args.append('--limit')
+                ansible_args.append(limit)
+
+            ansible_passthrough = ansible_spec.get('passthrough', '')
+            if ansible_passthrough:
+                ansible_args.extend(shlex.split(ansible_passthrough, posix=False))
+                disable_state_recording = True
+
+        ansible_data = [layer for _, layer in self.configuration]
+
+        debug_wait_time = 0
+        if self.session_data["debug_on_failure"]:
+            debug_wait_time = self.debug_wait_time
+
+        ansible_container = client.V1Container(
+            name='ansible',
+            image=self.env['CRAY_CFS_AEE_IMAGE'],
+            resources=self.template.ansible_resources,
+            env=[
+                self.job_env['SESSION_NAME'],
+                self.job_env['SSL_CAINFO'],
+                client.V1EnvVar(
+                    name='ANSIBLE_ARGS',
+                    value=" ".join(ansible_args)
+                ),
+                client.V1EnvVar(
+                    name='INVENTORY_TYPE',
+                    value=self.session_data['target']['definition']
+                ),
+                client.V1EnvVar(
+                    name='DISABLE_STATE_RECORDING',
+                    value=str(disable_state_recording)
+                ),
+                client.V1EnvVar(
+                    name='DEBUG_WAIT_TIME',
+                    value=str(debug_wait_time)
+                ),
+                self.vault_token_env
+            ] + self.trace_env + self.image_env,  # env
+            volume_mounts=[
+                self.volume_mounts['CONFIG_VOL'],
+                self.volume_mounts['CA_PUBKEY'],
+            ],  # volume_mounts
+            args=[json.dumps(ansible_data)],
+        )  # V1Container
+
+        return ansible_container
+
+    def teardown_container(self):
+        """
+        For image customization runs (session.target = 'image'), create a
+        teardown container to wrap the IMS image back up and put a bow on it.
+        """
+        teardown_args = [
+            wait_for_envoy_boilerplate + ' && ' +
+            ' python3 -m cray.cfs.teardown'
+        ]
+
+        return client.V1Container(
+            name='teardown',
+            image=self.env['CRAY_CFS_UTIL_IMAGE'],
+            volume_mounts=[
+                self.volume_mounts['CONFIG_VOL'],
+            ],  # V1VolumeMount
+            env=[
+                self.job_env['CFS_OPERATOR_LOG_LEVEL'],
+                self.job_env['SESSION_NAME'],
+                self.job_env['RESOURCE_NAMESPACE'],
+            ] + self.trace_env + self.image_env,  # env
+            command=['/bin/bash', '-c'],
+            security_context=client.V1SecurityContext(
+                run_as_user=0
+            ),
+            args=teardown_args,
+        )  # V1Container
+
+    def build(self):
+        """
+        Assemble the k8s job object for the session
+        """
+        clone_container = self.clone_container()
+
+        # Inventory container
+        inventory_container = self.inventory_container()
+
+        # Ansible containers
+        ansible_container = self.ansible_container()
+
+        # Assemble the containers, if this is image customization, add the IMS
+        # teardown containers to the list
+        containers = [inventory_container, ansible_container]
+        if self.session_data['target']['definition'] == "image":
+            containers.append(self.teardown_container())
+
+        v1_pod_spec = client.V1PodSpec(
+                        service_account_name=self.env['CRAY_CFS_SERVICE_ACCOUNT'],
+                        restart_policy="Never",
+                        volumes=[
+                            self.volumes['CA_PUBKEY'],
+                            self.volumes['CONFIG_VOL'],
+                            self.volumes['ANSIBLE_CONFIG'],
+                            self.volumes['CFS_TRUST_KEYS'],
+                            self.volumes['CFS_TRUST_CERTIFICATE']
+                        ],  # volumes
+                        init_containers=[clone_container],
+                        containers=containers,
+                    )  # V1PodSpec
+
+        v1_job_metadata = client.V1ObjectMeta(
+                        name=self.job_id,
+                        labels={
+                            'cfsession': self.session_data['name'][:60],
+                            'cfsversion': 'v3',
+                            'app.kubernetes.io/name': 'cray-cfs-aee',
+                            'aee': self.session_data['name'][:60],
+                            'configuration':
+                                self.session_data.get('configuration', {}).get('name', '')[:60]
+                        },
+                        annotations=self.annotations,
+                    )  # V1ObjectMeta
+
+        v1_job_spec_args = {
+            "backoff_limit": 0,
+            "template": client.V1PodTemplateSpec(metadata=v1_job_metadata, spec=v1_pod_spec)
+        }
+
+        # If specified, CFS session jobs set their ttlSecondsAfterFinished based on the CFS
+        # session TTL option
+        session_ttl_seconds = _get_ttl_seconds(self.session_ttl)
+        if session_ttl_seconds:
+            LOGGER.debug("session_ttl_seconds = %d", session_ttl_seconds)
+            v1_job_spec_args["ttl_seconds_after_finished"] = session_ttl_seconds
+
+        return client.V1Job(
+            api_version='batch/v1',
+            kind='Job',
+            metadata=client.V1ObjectMeta(
+                name=self.job_id,
+                annotations=self.annotations,
+            ),
+            spec=client.V1JobSpec(**v1_job_spec_args)
+        )
+
+
+# Valid units are minutes, hours, days, weeks
+_ttl_unit_multiplier = {
+    "m": 60,    # 60 seconds per minute
+    "h": 3600,  # 60*60 = 3600 seconds per hours
+    "d": 86400,  # 3600 * 24 = 86400 seconds per day
+    "w": 604800  # 86400 * 7 = 604800 seconds per week
+}
+
+
+def _get_ttl_seconds(session_ttl: str) -> int:
+    """
+    Returns the CFS session_ttl option in seconds, as an int.
+    Returns 0 if option is not set or if it is invalid.
+    """
+    if not session_ttl:
+        return 0
+    try:
+        ttl_number = int(session_ttl[:-1])
+        ttl_units = session_ttl[-1].lower()
+        # Valid units are minutes, hours, days, weeks
+        return ttl_number * _ttl_unit_multiplier[ttl_units]
+    except Exception:
+        LOGGER.exception("Invalid value for session_ttl option: %s", session_ttl)
+    return 0
@@ -1,7 +1,7 @@
 #
 # MIT License
 #
-# (C) Copyright 2019-2023 Hewlett Packard Enterprise Development LP
+# (C) Copyright 2019-2023, 2026 Hewlett Packard Enterprise Development LP
 #
 # Permission is hereby granted, free of charge, to any person obtaining a
 # copy of this software and associated documentation files (the "Software"),
@@ -24,7 +24,10 @@
 """
 Functions for handling Job Events related to CFS.
 """
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import math
+import os
 import threading
 import time
 
@@ -34,46 +37,116 @@ from kubernetes import config, client
 from kubernetes.client.rest import ApiException
 from kubernetes.config.config_exception import ConfigException
 
+from cray.cfs.operator import metrics
 import cray.cfs.operator.cfs.sessions as cfs_sessions
+from cray.cfs.operator.cfs.status_writer import SessionStatusWriter, DEFAULT_WINDOW, \
+    DEFAULT_CONCURRENCY
+from cray.cfs.operator.events.job_informer import JobInformer, JOB_LABEL_SELECTOR, \
+    RELIST_INTERVAL
+from cray.cfs.utils.tracing import get_tracer, SpanContext, TRACEPARENT_ANNOTATION, to_ns
 
 try:
     config.load_incluster_config()
 except ConfigException:  # pragma: no cover
     config.load_kube_config()  # Development
 
-_api_client = client.ApiClient()
-k8s_jobs = client.BatchV1Api(_api_client)
-
 LOGGER = logging.getLogger('cray.cfs.operator.events.job_events')
 
+SYNC_INTERVAL = 60 * 5  # seconds
+FULL_SYNC_EVERY = 12  # syncs
+# The session fields used while monitoring a session
+SYNC_FIELDS = ['name', 'status.session.job', 'status.session.status',
+               'status.session.start_time']
+CLEANUP_CONCURRENCY = 10
+K8S_POOL_HEADROOM = 5
+TRACE_SERVICE_NAME = 'cfs-operator'
+
+# The pool holds a connection for each cleanup thread, with headroom for the
+# informer and session checks that share the client
+_configuration = client.Configuration.get_default_copy()
+_configuration.connection_pool_maxsize = max(
+    _configuration.connection_pool_maxsize,
+    int(os.environ.get('CFS_OPERATOR_CLEANUP_CONCURRENCY', CLEANUP_CONCURRENCY)) +
+    K8S_POOL_HEADROOM)
+_api_client = client.ApiClient(_configuration)
+k8s_jobs = client.BatchV1Api(_api_client)
+k8s_core = client.CoreV1Api(_api_client)
+
 
 class CFSJobMonitor:
-    def __init__(self, env):
+    """
+    Tracks the Kubernetes jobs for running CFS sessions and records job start,
+    completion and failure in the session status.
+
+    Job changes are delivered by a JobInformer, which the rest of the operator
+    can also read jobs from.  After every relist, sessions whose job is not in
+    the informer are checked against the API as a safety net.
+
+    A completed session stays monitored until its completion has been written
+    to CFS.  If the write is given up on, the next check of the session sends
+    it again.
+    """
+    def __init__(self, env, status_writer=None, tracer=None):
         self.namespace = env['RESOURCE_NAMESPACE']
+        self.cleanup_concurrency = int(env.get('CFS_OPERATOR_CLEANUP_CONCURRENCY',
+                                               CLEANUP_CONCURRENCY))
+        self.status_writer = status_writer or SessionStatusWriter(
+            window=float(env.get('CFS_OPERATOR_STATUS_WRITE_WINDOW', DEFAULT_WINDOW)),
+            concurrency=int(env.get('CFS_OPERATOR_STATUS_WRITE_CONCURRENCY',
+                                    DEFAULT_CONCURRENCY)))
+        self.tracer = tracer or get_tracer(TRACE_SERVICE_NAME, env)
         self.sessions = {}
+        self._session_jobs = {}
+        # Sessions whose completion is waiting to be written to CFS
+        self._completing = set()
+        self._last_sync = None
+        self._syncs_since_full = 0
+        self._lock = threading.Lock()
+        self.informer = JobInformer(
+            k8s_jobs, self.namespace,
+            relist_interval=int(env.get('CFS_OPERATOR_JOB_RELIST_INTERVAL', RELIST_INTERVAL)))
+        self.informer.add_handler(self.handle_job_event)
+        self.informer.add_sync_handler(self.monitor_sessions)
+
+    def _sync_sessions(self, full=False):
+        """
+        Loads incomplete sessions that are not yet being monitored.
 
-    def _sync_sessions(self):
-        # Load incomplete and unmonitored sessions
-        for session in cfs_sessions.iter_sessions():
-            session_status = session.get('status', {}).get('session', {})
-            if session['name'] not in self.sessions and \
-                    session_status.get('job') and \
-                    not session_status.get('status') == 'complete':
-                self.add_session(session)
+        Only pending and running sessions are requested.  Between full syncs,
+        only sessions created since the previous sync are requested, since any
+        older incomplete session was already found by that sync.
+        """
+        sync_start = time.time()
+        full = full or self._last_sync is None or self._syncs_since_full >= FULL_SYNC_EVERY
+        max_age = None
+        if not full:
+            # The API filters by age in whole minutes; a minute of margin covers clock skew
+            max_age = '{}m'.format(math.ceil((sync_start - self._last_sync) / 60) + 1)
+        stats = {'bytes': 0, 'sessions': 0}
+        for status in ('pending', 'running'):
+            parameters = {'status': status}
+            if max_age:
+                parameters['max_age'] = max_age
+            for session in cfs_sessions.iter_sessions(parameters=parameters, stats=stats,
+                                                      fields=SYNC_FIELDS):
+                session_status = session.get('status', {}).get('session', {})
+                if session['name'] not in self.sessions and \
+                        session_status.get('job') and \
+                        not session_status.get('status') == 'complete':
+                    self.add_session(session)
+        self._last_sync = sync_start
+        self._syncs_since_full = 0 if full else self._syncs_since_full + 1
+        LOGGER.info('Session sync ({}) transferred {} sessions in {} bytes'.format(
+            'full' if full else 'incremental', stats['sessions'], stats['bytes']))
 
     def _run(self):  # pragma: no cover
-        intervals = 0
         while True:
+            time.sleep(SYNC_INTERVAL)
             try:
-                self.monitor_sessions()
-                if intervals >= 10:
-                    # Periodically check for out of sync sessions
-                    self._sync_sessions()
-                    intervals = 0
+                # Periodically check for out of sync sessions
+                self._sync_sessions()
             except Exception as e:
                 LOGGER.warning('Exception monitoring sessions: {}'.format(e))
-            intervals += 1
-            time.sleep(30)
 
     def _run_cleanup(self):  # pragma: no cover
         while True:
@@ -92,47 +165,139 @@ class CFSJobMonitor:
                 time.sleep(30)
             else:
                 break
+        self.informer.run()
         threading.Thread(target=self._run).start()
         threading.Thread(target=self._run_cleanup).start()
 
     def monitor_sessions(self):
+        """Checks every monitored session against the current state of its job"""
+        for session in list(self.sessions.values()):
+            self._check_session(session)
+
+    def handle_job_event(self, event_type, job):
+        with self._lock:
+            session_name = self._session_jobs.get(job.metadata.name)
+            session = self.sessions.get(session_name) if session_name else None
+        if not session:
+            # Jobs are created before their session is added.  The informer will
+            # still have the job when it is.
+            return
+        if event_type == 'DELETED':
+            self._check_session(session, job_missing=True)
+        else:
+            self._check_session(session, job)
+
+    def _check_session(self, session, job=None, job_missing=False):
+        with self._lock:
+            if session['name'] in self._completing:
+                return
         try:
-            completed_sessions = []
-            # Use list(keys()) rather than .items() so that other threads can edit dict
-            for name in list(self.sessions.keys()):
-                if self.session_complete(self.sessions[name]):
-                    completed_sessions.append(name)
-            for name in completed_sessions:
-                self.remove_session(name)
+            if self.session_complete(session, job=job, job_missing=job_missing):
+                with self._lock:
+                    completing = session['name'] in self._completing
+                if not completing:
+                    self.remove_session(session['name'])
         except Exception as e:
-            LOGGER.error('Exception encountered while monitoring jobs: {}'.format(e))
+            LOGGER.error('Exception encountered while monitoring session {}: {}'.format(
+                session['name'], e))
 
     def cleanup_jobs(self):
+        """Deletes CFS jobs that no longer belong to any CFS session"""
+        start = time.monotonic()
         try:
-            jobs = self.get_jobs()
-            session_jobs = self.get_session_jobs()
-            i = 0
-            for job in jobs:
-                if job not in session_jobs:
-                    self.delete_job(job)
-                    i += 1
-            if i:
-                LOGGER.info('Cleanup removed {} orphaned cfs jobs'.format(i))
+            orphans = self._find_orphaned_jobs(self.get_jobs())
+            deleted = self._delete_jobs(orphans)
         except Exception as e:
             LOGGER.warning('Exception encountered while cleaning jobs: {}'.format(e))
+            return
+        duration = time.monotonic() - start
+        if orphans:
+            LOGGER.info('Cleanup removed {} of {} orphaned cfs jobs in {:.2f} seconds'.format(
+                deleted, len(orphans), duration))
+        else:
+            LOGGER.debug('Cleanup found no orphaned cfs jobs in %.2f seconds', duration)
+
+    def _find_orphaned_jobs(self, job_names):
+        """
+        Returns the job names that are not referenced by any session.
+
+        Sessions are streamed a page at a time and removed from the set of
+        candidates, stopping early once every job has been accounted for.  Jobs
+        must be listed before sessions: a session records its job before the job
+        is created, so any job listed will be found.
+        """
+        orphans = set(job_names)
+        if not orphans:
+            return orphans
+        for session in cfs_sessions.iter_sessions(fields=['status.session.job']):
+            orphans.discard(session['status']['session'].get('job'))
+            if not orphans:
+                break
+        return orphans
+
+    def _delete_jobs(self, job_names):
+        """Deletes jobs in parallel and returns the number deleted"""
+        if not job_names:
+            return 0
+        workers = min(self.cleanup_concurrency, len(job_names))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return sum(executor.map(self._delete_orphaned_job, sorted(job_names)))
+
+    def _delete_orphaned_job(self, job_name):
+        try:
+            self.delete_job(job_name)
+        except ApiException as e:
+            if e.status != 404:
+                LOGGER.warning('Unable to delete orphaned job {}: {}'.format(job_name, e))
+            return False
+        return True
 
     def add_session(self, session):
-        self.sessions[session['name']] = session
+        job_name = session['status']['session'].get('job')
+        with self._lock:
+            self.sessions[session['name']] = session
+            if job_name:
+                self._session_jobs[job_name] = session['name']
+        job = self.informer.get(job_name) if job_name else None
+        if job:
+            self._check_session(session, job)
 
     def remove_session(self, session_name):
-        self.sessions.pop(session_name, None)
+        with self._lock:
+            self._remove_session(session_name)
 
-    def session_complete(self, session):
-        session_name = session['name']
-        if self._session_missing(session_name):
-            LOGGER.warning('Session {} was being monitored but can no longer be found'.format(session_name))
-            return True
+    def _remove_session(self, session_name):
+        """Callers must hold _lock"""
+        session = self.sessions.pop(session_name, None)
+        if session:
+            self._session_jobs.pop(session['status']['session'].get('job'), None)
+
+    def _write_completion(self, session_name, data):
+        """Queues the session's completion, and stops monitoring it once it is written"""
+        with self._lock:
+            self._completing.add(session_name)
+        self.status_writer.update(session_name, data,
+                                  on_done=lambda sent: self._completion_done(session_name, sent))
 
+    def _completion_done(self, session_name, sent):
+        with self._lock:
+            self._completing.discard(session_name)
+            if sent:
+                self._remove_session(session_name)
+                return
+        LOGGER.warning('Unable to record the completion of session %s; it will be sent again '
+                       'when the session is next checked', session_name)
+
+    def session_complete(self, session, job=None, job_missing=False):
+        """
+        Updates the session status from the state of its job.  Returns True once
+        the session no longer needs to be monitored.
+
+        If no job is given, it is taken from the informer, or read from
+        Kubernetes if the informer does not have it, unless job_missing says it
+        is already known not to exist.
+        """
+        session_name = session['name']
         job_name = session['status']['session'].get('job')
         if not job_name:
             # This shouldn't be able to happen.
@@ -140,41 +305,117 @@ class CFSJobMonitor:
             LOGGER.warning('No job is specified for session {}.  This is an invalid state.'.format(
                 session['name']))
             return True
-        try:
-            job = k8s_jobs.read_namespaced_job(job_name, self.namespace)
-        except ApiException as e:
-            if getattr(e, 'status', None) == 404:
-                LOGGER.warning('Job was deleted before CFS could determine success.')
-                cfs_sessions.update_session_status(session_name, data={'status': 'complete',
-                                                                       'succeeded': 'unknown'})
+        if job is None and not job_missing:
+            job = self.informer.get(job_name)
+        if job is None and not job_missing:
+            if self._session_missing(session_name):
+                LOGGER.warning('Session {} was being monitored but can no longer be found'.format(
+                    session_name))
                 return True
-            else:
-                LOGGER.warning("Unable to fetch Job=%s", job_name, e)
-                return False
+            try:
+                with metrics.K8S_SECONDS.labels('read_namespaced_job').time():
+                    job = k8s_jobs.read_namespaced_job(job_name, self.namespace)
+            except ApiException as e:
+                if getattr(e, 'status', None) != 404:
+                    LOGGER.warning("Unable to fetch Job=%s: %s", job_name, e)
+                    return False
+        if job is None:
+            return self._job_deleted(session_name)
+        return self._update_from_job(session, job)
+
+    def _job_deleted(self, session_name):
+        if self._session_missing(session_name):
+            LOGGER.warning('Session {} was being monitored but can no longer be found'.format(
+                session_name))
+            return True
+        LOGGER.warning('Job was deleted before CFS could determine success.')
+        self._write_completion(session_name, {'status': 'complete', 'succeeded': 'unknown'})
+        return True
+
+    def _update_from_job(self, session, job):
+        session_name = session['name']
         session_status = session.get('status', {}).get('session', {})
         if job.status.start_time and session_status.get('status') == 'pending':
             LOGGER.info("EVENT: JobStart %s", session_name)
-            cfs_sessions.update_session_status(session_name, data={'status': 'running'})
-            # Set so that update_session_status is not called again for status
+            _observe_session_start(session_status.get('start_time'), job.status.start_time)
+            self.status_writer.update(session_name, {'status': 'running'})
+            # Set so that the running status is not recorded again
             session_status['status'] = 'running'
+        # A completion that is being sent again has already been traced
+        traced = session_status.get('status') == 'complete'
         if job.status.completion_time:
             LOGGER.info("EVENT: JobComplete %s", session_name)
+            if not traced:
+                self._trace_session(session, job, job.status.completion_time, True)
             completion_time = job.status.completion_time.isoformat().split('+')[0]
-            cfs_sessions.update_session_status(session_name,
-                                               data={'status': 'complete',
-                                                     'succeeded': 'true',
-                                                     'completion_time': completion_time})
-            return True
+            succeeded = 'true'
         elif job.status.failed:
             LOGGER.info("EVENT: JobFail %s", session_name)
             completion_time = job.status.conditions[0].last_transition_time
+            if not traced:
+                self._trace_session(session, job, completion_time, False)
             completion_time = completion_time.isoformat().split('+')[0]
-            cfs_sessions.update_session_status(session_name,
-                                               data={'status': 'complete',
-                                                     'succeeded': 'false',
-                                                     'completion_time': completion_time})
-            return True
-        return False
+            succeeded = 'false'
+        else:
+            return False
+        session_status['status'] = 'complete'
+        self._write_completion(session_name, {'status': 'complete',
+                                              'succeeded': succeeded,
+                                              'completion_time': completion_time})
+        return True
+
+    def _trace_session(self, session, job, completion_time, succeeded):
+        """
+        Records the session span, and the spans for the phases of its job that
+        are only known to Kubernetes, in the trace the job was created with.
+        """
+        if not self.tracer.enabled:
+            return
+        annotations = getattr(job.metadata, 'annotations', None) or {}
+        trace = SpanContext.parse(annotations.get(TRACEPARENT_ANNOTATION))
+        if trace is None:
+            return
+        try:
+            created = to_ns(job.metadata.creation_timestamp)
+            if created and job.status.start_time:
+                self.tracer.record('job.start', created, to_ns(job.status.start_time),
+                                   parent=trace)
+            self._trace_pods(job.metadata.name, trace)
+            start_time = cfs_sessions.parse_time(
+                session.get('status', {}).get('session', {}).get('start_time'))
+            self.tracer.record('cfs.session', to_ns(start_time) or created,
+                               to_ns(completion_time), context=trace,
+                               attributes={'session': session['name'],
+                                           'job': job.metadata.name,
+                                           'succeeded': succeeded})
+        except Exception as e:
+            LOGGER.debug('Unable to trace session %s: %s', session['name'], e)
+
+    def _trace_pods(self, job_name, trace):
+        """Records the scheduling of the job's pod and the run time of each container"""
+        with metrics.K8S_SECONDS.labels('list_namespaced_pod').time():
+            pods = k8s_core.list_namespaced_pod(self.namespace,
+                                                label_selector='job-name={}'.format(job_name))
+        for pod in pods.items:
+            for condition in pod.status.conditions or []:
+                if condition.type == 'PodScheduled' and condition.status == 'True':
+                    self.tracer.record('pod.scheduling', to_ns(pod.metadata.creation_timestamp),
+                                       to_ns(condition.last_transition_time), parent=trace,
+                                       attributes={'pod': pod.metadata.name})
+            statuses = (pod.status.init_container_statuses or []) + \
+                (pod.status.container_statuses or [])
+            for status in statuses:
+                terminated = status.state.terminated if status.state else None
+                if terminated is None or not terminated.started_at:
+                    continue
+                error = None
+                if terminated.exit_code:
+                    error = 'exit code {}'.format(terminated.exit_code)
+                self.tracer.record('container.{}'.format(status.name),
+                                   to_ns(terminated.started_at), to_ns(terminated.finished_at),
+                                   parent=trace, error=error,
+                                   attributes={'pod': pod.metadata.name,
+                                               'reason': terminated.reason})
 
     def _session_missing(self, session_name):
         try:
@@ -184,19 +425,26 @@ class CFSJobMonitor:
                 return True
         return False
 
-    def get_session_jobs(self):
-        jobs = []
-        for session in cfs_sessions.iter_sessions():
-            job_name = session['status']['session'].get('job')
-            if job_name:
-                jobs.append(job_name)
-        return jobs
-
     def get_jobs(self):
-        jobs = k8s_jobs.list_namespaced_job(self.namespace,
-                                            label_selector='app.kubernetes.io/name=cray-cfs-aee')
+        if self.informer.has_synced:
+            return self.informer.list_names()
+        with metrics.K8S_SECONDS.labels('list_namespaced_job').time():
+            jobs = k8s_jobs.list_namespaced_job(self.namespace,
+                                                label_selector=JOB_LABEL_SELECTOR)
         job_names = [job.metadata.name for job in jobs.items]
         return job_names
 
     def delete_job(self, job_name):
-        k8s_jobs.delete_namespaced_job(job_name, self.namespace)
+        with metrics.K8S_SECONDS.labels('delete_namespaced_job').time():
+            k8s_jobs.delete_namespaced_job(job_name, self.namespace)
+
+
+def _observe_session_start(session_start_time, job_start_time):
+    """Records the time from session creation until its job started running"""
+    start_time = cfs_sessions.parse_time(session_start_time)
+    if start_time is None or not job_start_time:
+        return
+    if job_start_time.tzinfo is None:
+        job_start_time = job_start_time.replace(tzinfo=start_time.tzinfo)
+    metrics.SESSION_START_SECONDS.observe(
+        max(0, (job_start_time - start_time).total_seconds()))
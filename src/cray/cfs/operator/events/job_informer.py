@@ -0,0 +1,226 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+A local, watch-backed cache of the Kubernetes jobs created for CFS sessions.
+
+The JobInformer lists the jobs once and then follows them with a watch, so
+the rest of the operator can look jobs up by name or by session without
+calling the Kubernetes API.
+"""
+import logging
+import threading
+import time
+
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+
+from cray.cfs.operator import metrics
+
+LOGGER = logging.getLogger('cray.cfs.operator.events.job_informer')
+
+JOB_LABEL_SELECTOR = 'app.kubernetes.io/name=cray-cfs-aee'
+SESSION_LABEL = 'cfsession'
+# Label values are limited in length, so the label can hold a truncated name
+SESSION_LABEL_LENGTH = 60
+SESSION_NAME_ENV = 'SESSION_NAME'
+WATCH_TIMEOUT = 60  # seconds
+RELIST_INTERVAL = 60 * 5  # seconds
+
+
+class JobInformer:
+    """
+    A thread-safe store of CFS jobs, indexed by job name and by the cfsession
+    label, and kept current by list and watch.
+
+    Handlers added with add_handler are called with the event type and job for
+    every change, from the informer thread.  Changes found by a relist are
+    delivered the same way.  Sync handlers are called after every relist.
+    """
+
+    def __init__(self, jobs_api, namespace, label_selector=JOB_LABEL_SELECTOR,
+                 relist_interval=RELIST_INTERVAL):
+        self.jobs_api = jobs_api
+        self.namespace = namespace
+        self.label_selector = label_selector
+        self.relist_interval = relist_interval
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._session_index = {}
+        self._handlers = []
+        self._sync_handlers = []
+        self._resource_version = None
+        self._last_relist = None
+
+    def add_handler(self, handler):
+        self._handlers.append(handler)
+
+    def add_sync_handler(self, handler):
+        self._sync_handlers.append(handler)
+
+    @property
+    def has_synced(self):
+        return self._last_relist is not None
+
+    def get(self, job_name):
+        with self._lock:
+            return self._jobs.get(job_name)
+
+    def list_names(self):
+        with self._lock:
+            return list(self._jobs)
+
+    def by_session(self, session_name):
+        """
+        Returns the names of all jobs for the given session.  Jobs are found by
+        their label, and then checked against the session's full name.
+        """
+        with self._lock:
+            jobs = [self._jobs[name] for name in
+                    self._session_index.get(session_name[:SESSION_LABEL_LENGTH], ())]
+        return [job.metadata.name for job in jobs if get_session_name(job) == session_name]
+
+    def stats(self):
+        with self._lock:
+            size = len(self._jobs)
+        age = time.monotonic() - self._last_relist if self.has_synced else None
+        return {'cache_size': size, 'relist_age_seconds': age}
+
+    def run(self):  # pragma: no cover
+        threading.Thread(target=self._run, name='cfs_job_informer', daemon=True).start()
+
+    def _run(self):  # pragma: no cover
+        while True:
+            try:
+                self.relist()
+                self.watch(self.relist_interval)
+            except Exception as e:
+                LOGGER.warning('Exception watching CFS jobs: {}'.format(e))
+                time.sleep(5)
+
+    def relist(self):
+        """
+        Replaces the store with a fresh list of jobs, delivering any differences
+        to the handlers as events, and then calls the sync handlers.
+        """
+        with metrics.K8S_SECONDS.labels('list_namespaced_job').time():
+            jobs = self.jobs_api.list_namespaced_job(self.namespace,
+                                                     label_selector=self.label_selector)
+        listed = {job.metadata.name: job for job in jobs.items}
+        with self._lock:
+            previous = self._jobs
+            self._jobs = {}
+            self._session_index = {}
+            for job in listed.values():
+                self._store(job)
+        for name, job in previous.items():
+            if name not in listed:
+                self._dispatch('DELETED', job)
+        for name, job in listed.items():
+            old = previous.get(name)
+            if old is None:
+                self._dispatch('ADDED', job)
+            elif old.metadata.resource_version != job.metadata.resource_version:
+                self._dispatch('MODIFIED', job)
+        self._resource_version = jobs.metadata.resource_version
+        self._last_relist = time.monotonic()
+        LOGGER.debug('Job informer relisted: %s', self.stats())
+        for handler in self._sync_handlers:
+            self._call(handler)
+
+    def watch(self, duration):
+        """
+        Follows job changes for up to duration seconds.  Returns early if the
+        resourceVersion has expired and a relist is needed.
+        """
+        end_time = time.monotonic() + duration
+        while time.monotonic() < end_time:
+            timeout = max(1, min(WATCH_TIMEOUT, int(end_time - time.monotonic())))
+            stream = watch.Watch().stream(self.jobs_api.list_namespaced_job, self.namespace,
+                                          label_selector=self.label_selector,
+                                          resource_version=self._resource_version,
+                                          allow_watch_bookmarks=True,
+                                          timeout_seconds=timeout)
+            try:
+                for event in stream:
+                    self.handle_event(event['type'], event['object'])
+            except ApiException as e:
+                if e.status == 410:
+                    LOGGER.debug('Job watch resourceVersion expired; relisting')
+                    return
+                raise
+
+    def handle_event(self, event_type, job):
+        self._resource_version = job.metadata.resource_version
+        if event_type == 'BOOKMARK':
+            return
+        with self._lock:
+            if event_type == 'DELETED':
+                self._remove(job.metadata.name)
+            else:
+                self._store(job)
+        self._dispatch(event_type, job)
+
+    def _store(self, job):
+        # Called with the lock held
+        self._remove(job.metadata.name)
+        self._jobs[job.metadata.name] = job
+        session_name = (job.metadata.labels or {}).get(SESSION_LABEL)
+        if session_name:
+            self._session_index.setdefault(session_name, set()).add(job.metadata.name)
+
+    def _remove(self, job_name):
+        # Called with the lock held
+        job = self._jobs.pop(job_name, None)
+        if job is None:
+            return
+        session_name = (job.metadata.labels or {}).get(SESSION_LABEL)
+        names = self._session_index.get(session_name)
+        if names is not None:
+            names.discard(job_name)
+            if not names:
+                del self._session_index[session_name]
+
+    def _dispatch(self, event_type, job):
+        for handler in self._handlers:
+            self._call(handler, event_type, job)
+
+    @staticmethod
+    def _call(handler, *args):
+        try:
+            handler(*args)
+        except Exception as e:
+            LOGGER.error('Unhandled %s exception in job informer handler: %s',
+                         type(e).__name__, e)
+
+
+def get_session_name(job):
+    """
+    Returns the full name of the session a job was created for, which is given
+    to the job's containers.  Jobs without it fall back to their label.
+    """
+    for container in job.spec.template.spec.containers or []:
+        for var in container.env or []:
+            if var.name == SESSION_NAME_ENV:
+                return var.value
+    return (job.metadata.labels or {}).get(SESSION_LABEL)
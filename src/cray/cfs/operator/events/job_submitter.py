@@ -0,0 +1,218 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Sends Kubernetes job creates and deletes for CFS sessions in the background.
+
+Event workers hand job requests to the JobSubmitter and move on to the next
+event rather than waiting on the API server.  The number of requests in flight
+is bounded, and is reduced whenever the API server asks for less load with a
+429 response.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+import logging
+import threading
+import time
+
+from cray.cfs.operator import metrics
+from cray.cfs.operator.events.retry import RetryPolicy
+
+LOGGER = logging.getLogger('cray.cfs.operator.events.job_submitter')
+
+DEFAULT_MAX_IN_FLIGHT = 10
+THROTTLE_MAX_ATTEMPTS = 10
+THROTTLE_BASE_DELAY = 1  # seconds
+THROTTLE_MAX_DELAY = 30  # seconds
+
+CREATE = 'create'
+DELETE = 'delete'
+OPERATIONS = {CREATE: 'create_namespaced_job', DELETE: 'delete_namespaced_job'}
+
+
+class JobSubmitter:
+    """
+    Runs job creates and deletes from a pool of threads, with at most
+    max_in_flight requests outstanding.
+
+    When the API server throttles a request with a 429 response, the in-flight
+    limit is halved and no new requests are sent until the Retry-After time
+    (or an exponential backoff) has passed.  The limit then grows back by one
+    for every request that is not throttled.
+
+    on_result(kind, session_name, job_id, result, error) is called once each
+    request has finally succeeded or failed.
+    """
+
+    def __init__(self, jobs_api, namespace, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 on_result=None, backoff=None, name='cfs_job_submitter'):
+        self.jobs_api = jobs_api
+        self.namespace = namespace
+        self.max_in_flight = max_in_flight
+        self.on_result = on_result
+        self.backoff = backoff or RetryPolicy(max_attempts=THROTTLE_MAX_ATTEMPTS,
+                                              base_delay=THROTTLE_BASE_DELAY,
+                                              max_delay=THROTTLE_MAX_DELAY)
+        self._condition = threading.Condition()
+        self._limit = max_in_flight
+        self._in_flight = 0
+        self._paused_until = 0
+        self._throttled = 0
+        self._pending_creates = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix=name)
+
+    def create(self, session_name, job):
+        """Creates the job for a session, returning a Future for the created job"""
+        future = self._executor.submit(self._send, CREATE, session_name, job.metadata.name,
+                                       self.jobs_api.create_namespaced_job, self.namespace, job)
+        with self._condition:
+            self._pending_creates[session_name] = future
+        future.add_done_callback(lambda f: self._create_done(session_name, f))
+        return future
+
+    def delete(self, session_name, job_id):
+        """
+        Deletes a session's job, returning a Future for the API response.  The
+        delete is not sent until any create for the same session has finished.
+        """
+        with self._condition:
+            pending = self._pending_creates.get(session_name)
+        if pending is None:
+            return self._delete(session_name, job_id)
+        future = Future()
+        pending.add_done_callback(
+            lambda _: _copy_future(self._delete(session_name, job_id), future))
+        return future
+
+    def stats(self):
+        with self._condition:
+            return {
+                'in_flight': self._in_flight,
+                'limit': self._limit,
+                'throttled': self._throttled,
+            }
+
+    def stop(self, wait=True):
+        """Stops the submitter once every request already submitted has finished"""
+        self._executor.shutdown(wait=wait)
+
+    def _delete(self, session_name, job_id):
+        return self._executor.submit(self._send, DELETE, session_name, job_id,
+                                     self.jobs_api.delete_namespaced_job, job_id,
+                                     self.namespace, propagation_policy='Background')
+
+    def _create_done(self, session_name, future):
+        with self._condition:
+            if self._pending_creates.get(session_name) is future:
+                del self._pending_creates[session_name]
+
+    def _send(self, kind, session_name, job_id, call, *args, **kwargs):
+        attempt = 0
+        while True:
+            self._acquire()
+            try:
+                with metrics.K8S_SECONDS.labels(OPERATIONS[kind]).time():
+                    result = call(*args, **kwargs)
+            except Exception as e:
+                if getattr(e, 'status', None) == 429 and attempt < self.backoff.max_attempts:
+                    delay = self._get_throttle_delay(e, attempt)
+                    self._release(throttle_delay=delay)
+                    LOGGER.warning("Job %s for CFS Session=%s throttled by the API server; "
+                                   "retrying in %.1f seconds", kind, session_name, delay)
+                    attempt += 1
+                    continue
+                self._release()
+                self._report(kind, session_name, job_id, None, e)
+                raise
+            self._release()
+            self._report(kind, session_name, job_id, result, None)
+            return result
+
+    def _acquire(self):
+        with self._condition:
+            while True:
+                wait = self._paused_until - time.monotonic()
+                if wait <= 0 and self._in_flight < self._limit:
+                    break
+                self._condition.wait(timeout=wait if wait > 0 else None)
+            self._in_flight += 1
+
+    def _release(self, throttle_delay=None):
+        with self._condition:
+            self._in_flight -= 1
+            now = time.monotonic()
+            if throttle_delay is None:
+                self._limit = min(self.max_in_flight, self._limit + 1)
+            else:
+                self._throttled += 1
+                # Requests that were already in flight are throttled together, so
+                # the limit is only cut once for each backoff period.
+                if now >= self._paused_until:
+                    self._limit = max(1, self._limit // 2)
+                self._paused_until = max(self._paused_until, now + throttle_delay)
+            self._condition.notify_all()
+
+    def _get_throttle_delay(self, error, attempt):
+        headers = getattr(error, 'headers', None) or {}
+        try:
+            return min(self.backoff.max_delay, max(0.0, float(headers.get('Retry-After'))))
+        except (TypeError, ValueError):
+            return self.backoff.get_delay(attempt)
+
+    def _report(self, kind, session_name, job_id, result, error):
+        if not self.on_result:
+            return
+        try:
+            self.on_result(kind, session_name, job_id, result, error)
+        except Exception as e:
+            LOGGER.error('Unhandled %s exception reporting job %s for CFS Session=%s: %s',
+                         type(e).__name__, kind, session_name, e)
+
+
+def when_all(futures):
+    """Returns a Future that is done once all of the given futures are done"""
+    combined = Future()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+    if not futures:
+        combined.set_result(None)
+        return combined
+
+    def done(_):
+        with lock:
+            remaining[0] -= 1
+            finished = not remaining[0]
+        if finished:
+            combined.set_result(None)
+
+    for future in futures:
+        future.add_done_callback(done)
+    return combined
+
+
+def _copy_future(source, target):
+    def copy(_):
+        if source.exception() is not None:
+            target.set_exception(source.exception())
+        else:
+            target.set_result(source.result())
+    source.add_done_callback(copy)
@@ -0,0 +1,241 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+The parts of a CFS session job that are the same for every session.
+"""
+import os
+import threading
+
+from kubernetes import client
+import ujson as json
+
+from cray.cfs.utils.tracing import TRACE_ENVIRONMENT
+
+SHARED_DIRECTORY = '/inventory'
+# Operator environment variables passed on to the inventory and Ansible
+# containers of image customization jobs
+IMAGE_ENVIRONMENT = ('CFS_INVENTORY_STREAMING', 'CFS_IMAGE_SETUP_CONCURRENCY',
+                     'CFS_IMAGE_SETUP_TIMEOUT')
+CAINFO_PATH = '/etc/cray/ca/certificate_authority.crt'
+
+# Boilerplate code to wait for the envoy sidecar to open connections to the
+# mesh. Calls within pods prior to this completing will fail with connection
+# refused errors.
+wait_for_envoy_boilerplate = 'until curl --head localhost:15000; ' \
+                             'do echo Waiting for Sidecar; ' \
+                             'sleep 3; ' \
+                             'done; ' \
+                             'echo Sidecar available'
+
+
+class JobTemplate:
+    """
+    Builds the invariant env, volume mount and volume objects for session jobs
+    once, from the operator environment.  Jobs share these objects rather than
+    copying them, so they must never be modified after they are built.
+
+    The ANSIBLE_CONFIG volume depends on the session's ansible config and is
+    built once for each config.
+    """
+
+    def __init__(self, env):
+        self.env = env
+        self.env_vars = self._build_env_vars()
+        # Session jobs export their spans the same way as the operator
+        self.trace_env_vars = [client.V1EnvVar(name=key, value=self.env[key])
+                               for key in TRACE_ENVIRONMENT if key in self.env]
+        self.image_env_vars = [client.V1EnvVar(name=key, value=self.env[key])
+                               for key in IMAGE_ENVIRONMENT if key in self.env]
+        self.volume_mounts = self._build_volume_mounts()
+        self._volumes = self._build_volumes()
+        self._ansible_config_volumes = {}
+        self._lock = threading.Lock()
+        self._ansible_resources = None
+
+    def volumes(self, ansible_config):
+        """Returns the volumes used in a session job, by key"""
+        volume = self._ansible_config_volumes.get(ansible_config)
+        if volume is None:
+            volume = self._build_ansible_config_volume(ansible_config)
+            with self._lock:
+                volume = self._ansible_config_volumes.setdefault(ansible_config, volume)
+        volumes = dict(self._volumes)
+        volumes['ANSIBLE_CONFIG'] = volume
+        return volumes
+
+    @property
+    def ansible_resources(self):
+        if self._ansible_resources is None:
+            self._ansible_resources = client.V1ResourceRequirements(
+                limits=json.loads(self.env['CRAY_CFS_ANSIBLE_CONTAINER_LIMITS']),
+                requests=json.loads(self.env['CRAY_CFS_ANSIBLE_CONTAINER_REQUESTS'])
+            )
+        return self._ansible_resources
+
+    def _build_env_vars(self):
+        job_env = {}
+        job_env['GIT_SSL_CAINFO'] = client.V1EnvVar(
+            name='GIT_SSL_CAINFO',
+            value=CAINFO_PATH
+        )
+        job_env['CFS_OPERATOR_LOG_LEVEL'] = client.V1EnvVar(
+            name='CFS_OPERATOR_LOG_LEVEL',
+            value=self.env['CFS_OPERATOR_LOG_LEVEL']
+        )
+        job_env['RESOURCE_NAMESPACE'] = client.V1EnvVar(
+            name='RESOURCE_NAMESPACE',
+            value=self.env['RESOURCE_NAMESPACE']
+        )
+        job_env['SSL_CAINFO'] = client.V1EnvVar(
+            name='SSL_CAINFO',
+            value=CAINFO_PATH
+        )
+        job_env['VCS_USERNAME'] = client.V1EnvVar(
+            name='VCS_USERNAME',
+            value_from=client.V1EnvVarSource(
+                secret_key_ref=client.V1SecretKeySelector(
+                    key='vcs_username',
+                    name=self.env.get('VCS_USER_CREDENTIALS', 'vcs-user-credentials'),
+                    optional=False
+                )
+            )
+        )
+        job_env['VCS_PASSWORD'] = client.V1EnvVar(
+            name='VCS_PASSWORD',
+            value_from=client.V1EnvVarSource(
+                secret_key_ref=client.V1SecretKeySelector(
+                    key='vcs_password',
+                    name=self.env.get('VCS_USER_CREDENTIALS', 'vcs-user-credentials'),
+                    optional=False
+                )
+            )
+        )
+        job_env['GIT_RETRY_MAX'] = client.V1EnvVar(
+            name='GIT_RETRY_MAX',
+            value=str(os.environ.get("CFS_GIT_RETRY_MAX", 60))
+        )
+        job_env['GIT_RETRY_DELAY'] = client.V1EnvVar(
+            name='GIT_RETRY_DELAY',
+            value=str(os.environ.get("CFS_GIT_RETRY_DELAY", 10))
+        )
+        job_env['VAULT_ADDR'] = client.V1EnvVar(
+            name='VAULT_ADDR',
+            value=str(os.environ.get("VAULT_ADDR", ""))
+        )
+        return job_env
+
+    def _build_volume_mounts(self):
+        volume_mounts = {}
+        volume_mounts['CONFIG_VOL'] = client.V1VolumeMount(
+            name='config-vol',
+            mount_path=SHARED_DIRECTORY,
+        )
+        volume_mounts['CA_PUBKEY'] = client.V1VolumeMount(
+            name='ca-pubkey',
+            mount_path='/etc/cray/ca',
+            read_only=True,
+        )
+        volume_mounts['ANSIBLE_CONFIG'] = client.V1VolumeMount(
+            name='ansible-config',
+            mount_path='/tmp/ansible',
+        )
+        volume_mounts['CFS_TRUST_KEYS'] = client.V1VolumeMount(
+            name='cfs-trust-keys',
+            mount_path='/secret-keys',
+            read_only=True,
+        )
+        volume_mounts['CFS_TRUST_CERTIFICATE'] = client.V1VolumeMount(
+            name='cfs-trust-certificate',
+            mount_path='/secret-certs',
+            read_only=True,
+        )
+        return volume_mounts
+
+    def _build_volumes(self):
+        volumes = {}
+        volumes['CA_PUBKEY'] = client.V1Volume(
+            name='ca-pubkey',
+            config_map=client.V1ConfigMapVolumeSource(
+                name=self.env['CRAY_CFS_CONFIGMAP_PUBLIC_KEY'],
+                items=[
+                    client.V1KeyToPath(
+                        key=self.env['CRAY_CFS_CA_PUBLIC_KEY'],
+                        path='certificate_authority.crt'
+                    )  # V1KeyToPath
+                ],  # items
+            ),  # V1ConfigMapVolumeSource
+        )  # V1Volume
+
+        volumes['CONFIG_VOL'] = client.V1Volume(
+            name='config-vol',
+            empty_dir=client.V1EmptyDirVolumeSource(
+                medium="Memory"
+            )  # V1EmptyDirVolumeSource
+        )  # V1Volume
+
+        volumes['CFS_TRUST_KEYS'] = client.V1Volume(
+            name='cfs-trust-keys',
+            secret=client.V1SecretVolumeSource(
+                secret_name=self.env['CRAY_CFS_TRUST_KEY_SECRET'],
+                items=[
+                    client.V1KeyToPath(
+                        key='public',
+                        path='id_ecdsa.pub'
+                    ),  # V1KeyToPath
+                    client.V1KeyToPath(
+                        key='private',
+                        path='id_ecdsa'
+                    ),  # V1KeyToPath
+                ],  # items
+            ),  # V1SecretVolumeSource
+        )  # V1Volume
+
+        volumes['CFS_TRUST_CERTIFICATE'] = client.V1Volume(
+            name='cfs-trust-certificate',
+            secret=client.V1SecretVolumeSource(
+                secret_name=self.env['CRAY_CFS_TRUST_CERT_SECRET'],
+                items=[
+                    client.V1KeyToPath(
+                        key='certificate',
+                        path='id_ecdsa-cert.pub'
+                    ),  # V1KeyToPath
+                ],  # items
+            ),  # V1SecretVolumeSource
+        )  # V1Volume
+        return volumes
+
+    @staticmethod
+    def _build_ansible_config_volume(ansible_config):
+        return client.V1Volume(
+            name='ansible-config',
+            config_map=client.V1ConfigMapVolumeSource(
+                name=ansible_config,
+                items=[
+                    client.V1KeyToPath(
+                        key='ansible.cfg',
+                        path='ansible.cfg'
+                    )  # V1KeyToPath
+                ],  # items
+            ),  # V1ConfigMapVolumeSource
+        )  # V1Volume
@@ -0,0 +1,119 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Backoff policy and timer for retrying CFS session events.
+
+Failed events are produced back onto the session event topic with a
+not_before timestamp.  When the consumer reads one of these before it is due,
+the event is held by the RetryScheduler rather than by sleeping, so healthy
+events are never stuck behind a failing one.
+"""
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+
+LOGGER = logging.getLogger('cray.cfs.operator.events.retry')
+
+DEFAULT_MAX_ATTEMPTS = 10
+DEFAULT_MAX_DURATION = 60 * 10  # 10 minutes
+DEFAULT_BASE_DELAY = 1  # seconds
+DEFAULT_MAX_DELAY = 60  # seconds
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with jitter.  An event is only dropped once it has been
+    retried more than max_attempts times and max_duration seconds have passed
+    since its first attempt.
+    """
+
+    def __init__(self, max_attempts=DEFAULT_MAX_ATTEMPTS, max_duration=DEFAULT_MAX_DURATION,
+                 base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY):
+        self.max_attempts = max_attempts
+        self.max_duration = max_duration
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def exhausted(self, attempt_count, duration):
+        return attempt_count > self.max_attempts and duration > self.max_duration
+
+    def get_delay(self, attempt_count):
+        """Returns the number of seconds to wait before the given attempt"""
+        delay = min(self.max_delay, self.base_delay * 2 ** min(attempt_count, 32))
+        # Jitter spreads out the retries for events that all failed at once
+        return random.uniform(delay / 2, delay)
+
+
+class RetryScheduler:
+    """Runs callables once their delay has passed, from a single timer thread"""
+
+    def __init__(self, name='cfs_event_retry'):
+        self.name = name
+        self._condition = threading.Condition()
+        self._queue = []
+        self._counter = itertools.count()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def schedule(self, delay, fn, *args):
+        due = time.monotonic() + max(delay, 0)
+        with self._condition:
+            heapq.heappush(self._queue, (due, next(self._counter), fn, args))
+            self._condition.notify()
+
+    def __len__(self):
+        with self._condition:
+            return len(self._queue)
+
+    def run_due(self):
+        """Runs every callable that is due and returns the seconds until the next one"""
+        while True:
+            with self._condition:
+                if not self._queue:
+                    return None
+                due, _, fn, args = self._queue[0]
+                wait = due - time.monotonic()
+                if wait > 0:
+                    return wait
+                heapq.heappop(self._queue)
+            try:
+                fn(*args)
+            except Exception as e:
+                LOGGER.error('Unhandled %s exception running delayed retry: %s',
+                             type(e).__name__, e)
+
+    def _run(self):  # pragma: no cover
+        while True:
+            self.run_due()
+            with self._condition:
+                # Recheck under the lock so a newly scheduled retry is never missed
+                wait = self._queue[0][0] - time.monotonic() if self._queue else None
+                if wait is None or wait > 0:
+                    self._condition.wait(timeout=wait)
@@ -26,40 +26,73 @@ Functions for handling CFS Session Events
 """
 import logging
 import os
-import shlex
 import time
 import threading
 import uuid
 import base64
 
 from kubernetes import client, config
-from kubernetes.client.rest import ApiException
 from kubernetes.config.config_exception import ConfigException
 import requests
 from requests.exceptions import HTTPError
 import ujson as json
 
-import cray.cfs.operator.cfs.sessions as cfs_sessions
 from cray.cfs.operator.cfs.options import options
-from cray.cfs.operator.cfs.configurations import get_configuration
+from cray.cfs.operator.cfs.sessions import parse_time
+from cray.cfs.operator.cfs.configurations import get_cached_configuration
+from cray.cfs.operator.events.event_pipeline import KeyedWorkerPool, Lane, OffsetTracker
+from cray.cfs.operator.events.event_pipeline import DEFAULT_WORKERS, DEFAULT_MAX_PENDING
 from cray.cfs.operator.events.job_events import CFSJobMonitor
+from cray.cfs.operator.events.job_builder import JobBuilder
+from cray.cfs.operator.events.job_submitter import JobSubmitter, CREATE, DEFAULT_MAX_IN_FLIGHT
+from cray.cfs.operator.events.job_submitter import when_all
+from cray.cfs.operator.events.job_template import JobTemplate
+from cray.cfs.operator.events.retry import RetryPolicy, RetryScheduler
+from cray.cfs.operator.events.retry import DEFAULT_MAX_ATTEMPTS, DEFAULT_MAX_DURATION
+from cray.cfs.operator.events.retry import DEFAULT_BASE_DELAY, DEFAULT_MAX_DELAY
 from cray.cfs.operator.events.ims_monitor import IMSJobMonitor
-from cray.cfs.operator.kafka_utils import KafkaWrapper
+from cray.cfs.operator.events.tenant_tokens import TenantTokenCache
+from cray.cfs.operator.kafka_utils import CommitPolicy, KafkaWrapper
+from cray.cfs.operator import metrics
+from cray.cfs.utils.cache import CacheEntry
 from cray.cfs.utils.clients.ims.jobs import delete_job as delete_ims_job
+from cray.cfs.utils.tracing import SpanContext, to_ns
 
 LOGGER = logging.getLogger('cray.cfs.operator.events.session_events')
 DEFAULT_ANSIBLE_CONFIG = 'cfs-default-ansible-cfg'
-DEFAULT_ANSIBLE_VERBOSITY = 0
-SHARED_DIRECTORY = '/inventory'
 VCS_USER_CREDENTIALS_DIR = '/etc/cray/vcs'
-CAINFO_PATH = '/etc/cray/ca/certificate_authority.crt'
+# Process environment variables that the job template is built from
+JOB_TEMPLATE_ENVIRONMENT = ('CFS_GIT_RETRY_MAX', 'CFS_GIT_RETRY_DELAY', 'VAULT_ADDR')
+KAFKA_POLL_TIMEOUT = 1000  # ms
+# DELETE events are handled in their own lane, so that a mass TTL expiry does
+# not hold up new sessions.  Deletes are cheap to queue, so many more may wait.
+CREATE_LANE = 'create'
+DELETE_LANE = 'delete'
+CREATE_LANE_WEIGHT = 4
+DELETE_LANE_WEIGHT = 1
+DEFAULT_MAX_PENDING_DELETES = 1000
+KAFKA_COMMIT_MAX_MESSAGES = 100
+KAFKA_COMMIT_INTERVAL = 5000  # ms
+# The longest a retry that is not yet due holds up the commit of its partition
+RETRY_MAX_HOLD = 5  # seconds
+K8S_POOL_HEADROOM = 5
+VAULT_TOKEN_REUSE = 300  # seconds
+# Jobs are always given a tenant Vault token with at least 90% of its lease remaining
+VAULT_TOKEN_REUSE_FRACTION = 0.1
 
 try:
     config.load_incluster_config()
 except ConfigException:  # pragma: no cover
     config.load_kube_config()  # Development
 
-_api_client = client.ApiClient()
+# The pool holds a connection for each job request the submitter may have in
+# flight, with headroom for the other threads that share the client
+_configuration = client.Configuration.get_default_copy()
+_configuration.connection_pool_maxsize = max(
+    _configuration.connection_pool_maxsize,
+    int(os.environ.get('CFS_OPERATOR_JOB_MAX_IN_FLIGHT', DEFAULT_MAX_IN_FLIGHT)) +
+    K8S_POOL_HEADROOM)
+_api_client = client.ApiClient(_configuration)
 k8sjobs = client.BatchV1Api(_api_client)
 CRD_CLIENT = client.CustomObjectsApi()
 CORE_CLIENT = client.CoreV1Api()
@@ -71,11 +104,6 @@ class MultitenantException(Exception):
     happened.
     """
 
-class CFSApiException(MultitenantException):
-    """
-    When the CFS API is unable to return information in a timely manner.
-    """
-
 
 class TapmsException(MultitenantException):
     """
@@ -93,37 +121,178 @@ class VaultException(MultitenantException):
     """
 
 
-# Boilerplate code to wait for the envoy sidecar to open connections to the
-# mesh. Calls within pods prior to this completing will fail with connection
-# refused errors.
-wait_for_envoy_boilerplate = 'until curl --head localhost:15000; ' \
-                             'do echo Waiting for Sidecar; ' \
-                             'sleep 3; ' \
-                             'done; ' \
-                             'echo Sidecar available'
-
-
 class CFSSessionController:
     def __init__(self, env):
         self.env = env
         self.job_monitor = CFSJobMonitor(env)
+        self.status_writer = self.job_monitor.status_writer
+        self.tracer = self.job_monitor.tracer
         self.ims_monitor = IMSJobMonitor()
+        self.event_workers = KeyedWorkerPool(
+            workers=int(env.get('CFS_OPERATOR_EVENT_WORKERS', DEFAULT_WORKERS)),
+            lanes=[
+                Lane(CREATE_LANE,
+                     weight=int(env.get('CFS_OPERATOR_CREATE_LANE_WEIGHT', CREATE_LANE_WEIGHT)),
+                     max_pending=int(env.get('CFS_OPERATOR_MAX_PENDING_EVENTS',
+                                             DEFAULT_MAX_PENDING))),
+                Lane(DELETE_LANE,
+                     weight=int(env.get('CFS_OPERATOR_DELETE_LANE_WEIGHT', DELETE_LANE_WEIGHT)),
+                     max_pending=int(env.get('CFS_OPERATOR_MAX_PENDING_DELETES',
+                                             DEFAULT_MAX_PENDING_DELETES))),
+            ])
+        self.retry_policy = RetryPolicy(
+            max_attempts=int(env.get('CFS_OPERATOR_RETRY_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)),
+            max_duration=float(env.get('CFS_OPERATOR_RETRY_MAX_DURATION', DEFAULT_MAX_DURATION)),
+            base_delay=float(env.get('CFS_OPERATOR_RETRY_BASE_DELAY', DEFAULT_BASE_DELAY)),
+            max_delay=float(env.get('CFS_OPERATOR_RETRY_MAX_DELAY', DEFAULT_MAX_DELAY)))
+        self.retry_scheduler = RetryScheduler()
+        self.retry_max_hold = float(env.get('CFS_OPERATOR_RETRY_MAX_HOLD', RETRY_MAX_HOLD))
+        self.vault_token_reuse = float(env.get('CFS_OPERATOR_VAULT_TOKEN_REUSE', VAULT_TOKEN_REUSE))
+        self.tenant_tokens = TenantTokenCache(
+            self._login_tenant, CORE_CLIENT.list_namespaced_secret, ttl=self.vault_token_reuse)
+        self._job_template = None
+        # Commit counts from the policies of earlier Kafka consumers, which are
+        # replaced whenever the consumer is reconnected
+        self._commit_counts = {'requested': 0, 'sent': 0, 'saved': 0}
+        self._commit_policy = None
+        # Sessions whose jobs are being created, by job id, for the job monitor,
+        # with the session's trace and the time the job request was submitted
+        self._creating = {}
+        self.job_submitter = JobSubmitter(
+            k8sjobs, env['RESOURCE_NAMESPACE'],
+            max_in_flight=int(env.get('CFS_OPERATOR_JOB_MAX_IN_FLIGHT', DEFAULT_MAX_IN_FLIGHT)),
+            on_result=self._job_request_done)
 
     def run(self):  # pragma: no cover
         self.job_monitor.run()
         self.ims_monitor.run()
+        self.event_workers.start()
+        self.retry_scheduler.start()
+        self.tenant_tokens.start()
         threading.Thread(target=self._run).start()
 
+    def shutdown(self):
+        """ Waits for job requests that have been submitted, then writes any unsent status """
+        self.job_submitter.stop()
+        self.status_writer.stop()
+        self.tenant_tokens.stop()
+        self.tracer.flush()
+
     def _run(self):  # pragma: no cover
         while True:
+            kafka = None
             try:
                 kafka = KafkaWrapper('cfs-session-events',
                                      group_id='cfs-operator',
-                                     enable_auto_commit=False)
-                for event in kafka.consumer:
-                    self._handle_event(event.value, kafka)
+                                     enable_auto_commit=False,
+                                     commit_policy=self._get_commit_policy())
+                offsets = OffsetTracker()
+                while True:
+                    self._consume(kafka, offsets)
             except Exception as e:
                 LOGGER.warning('Exception handling kafka event: {}'.format(e))
+            if kafka:
+                try:
+                    kafka.close()
+                except Exception as e:
+                    LOGGER.warning('Exception closing kafka consumer: {}'.format(e))
+
+    def _get_commit_policy(self):
+        if self._commit_policy:
+            for name, count in self._commit_policy.stats().items():
+                self._commit_counts[name] += count
+        self._commit_policy = CommitPolicy(
+            max_messages=int(self.env.get('CFS_OPERATOR_COMMIT_MAX_MESSAGES',
+                                          KAFKA_COMMIT_MAX_MESSAGES)),
+            max_interval_ms=int(self.env.get('CFS_OPERATOR_COMMIT_INTERVAL_MS',
+                                             KAFKA_COMMIT_INTERVAL)))
+        return self._commit_policy
+
+    def commit_stats(self):
+        """ Returns the Kafka commit counts of every consumer this controller has used """
+        stats = dict(self._commit_counts)
+        if self._commit_policy:
+            for name, count in self._commit_policy.stats().items():
+                stats[name] += count
+        return stats
+
+    def _consume(self, kafka, offsets):
+        """
+        Hands one batch of events to the worker pool, then commits the offsets of
+        any events that have been fully handled.
+        """
+        records = kafka.consumer.poll(timeout_ms=KAFKA_POLL_TIMEOUT)
+        for partition, messages in records.items():
+            if messages:
+                _record_lag(kafka.consumer, partition, messages[-1].offset)
+            for message in messages:
+                offsets.add(partition, message.offset)
+                # Retries that are not yet due also take a place in their lane,
+                # so they count towards its limit on pending events.
+                while not self.event_workers.reserve(_get_event_lane(message.value), timeout=1):
+                    # The lane is full.  Keep committing finished work while waiting.
+                    self._commit_offsets(kafka, offsets)
+                delay = _get_retry_delay(message.value)
+                if delay > 0:
+                    self._defer_event(delay, message, partition, kafka, offsets)
+                else:
+                    self._submit_event(message, partition, kafka, offsets)
+        self._commit_offsets(kafka, offsets)
+
+    def _submit_event(self, message, partition, kafka, offsets):
+        """ Queues an event in the place already reserved for it in its lane """
+        key = _get_session_key(message.value)
+        self.event_workers.submit(key, self._process_event, message, partition,
+                                  kafka, offsets, lane=_get_event_lane(message.value),
+                                  reserved=True)
+
+    def _defer_event(self, delay, message, partition, kafka, offsets):
+        """
+        Holds a retried event until it is due.  The offset stays uncommitted
+        while the event is held, so a restart cannot lose it.  To keep the
+        partition's commits moving, an event is held for at most retry_max_hold
+        seconds, and is then produced again and its offset released.
+        """
+        if delay <= self.retry_max_hold:
+            self.retry_scheduler.schedule(delay, self._submit_event, message, partition,
+                                          kafka, offsets)
+        else:
+            self.retry_scheduler.schedule(self.retry_max_hold, self._requeue_event, message,
+                                          partition, kafka, offsets)
+
+    def _requeue_event(self, message, partition, kafka, offsets):
+        try:
+            kafka.produce(message.value)
+        except Exception as e:
+            LOGGER.warning('Unable to requeue delayed event; holding it: %s', e)
+            self.retry_scheduler.schedule(self.retry_max_hold, self._requeue_event, message,
+                                          partition, kafka, offsets)
+            return
+        self.event_workers.release(_get_event_lane(message.value))
+        offsets.complete(partition, message.offset)
+
+    def _process_event(self, message, partition, kafka, offsets):
+        pending = None
+        start = time.monotonic()
+        try:
+            pending = self._handle_event(message.value, kafka)
+        finally:
+            metrics.EVENT_SECONDS.labels(_get_event_type(message.value)).observe(
+                time.monotonic() - start)
+            if pending is None:
+                offsets.complete(partition, message.offset)
+            else:
+                # The offset is only committed once the event's job requests are done
+                pending.add_done_callback(
+                    lambda _: offsets.complete(partition, message.offset))
+
+    @staticmethod
+    def _commit_offsets(kafka, offsets):
+        # The wrapper's commit policy decides when offsets are actually sent, so
+        # this is called even when nothing new has completed.
+        committable = offsets.committable()
+        kafka.commit(committable)
+        offsets.mark_committed(committable)
 
     def _handle_event(self, event, kafka):
         event_type = None
@@ -135,9 +304,9 @@ class CFSSessionController:
             LOGGER.debug("RAW OBJECT: %s %s", session_name, json.dumps(event_data, indent=2))
 
             if event_type == 'CREATE':
-                self._handle_added(event_data)
+                return self._handle_added(event_data)
             elif event_type == 'DELETE':
-                self._handle_deleted(event_data)
+                return self._handle_deleted(event_data)
             else:
                 LOGGER.warning('Invalid event type detected: {}'.format(event))
         except HTTPError as e:
@@ -191,24 +360,38 @@ class CFSSessionController:
             # behavior when making the changes for CASMCMS-9627
             if "404 Client Error" not in str(e):
                 self._send_retry(event, kafka)
-        kafka.consumer.commit()
 
     def _handle_added(self, event_data):
         job_id = 'cfs-' + str(uuid.uuid4())
-        session_data = cfs_sessions.update_session_status(event_data['name'], {'job': job_id})
-        self._create_k8s_job(session_data, job_id)
-        self.job_monitor.add_session(session_data)
-        return
+        trace = None
+        if self.tracer.enabled:
+            # The session span is recorded by the job monitor once the job is
+            # complete, but its id is handed to the job and to these spans now
+            trace = SpanContext.new()
+            start_time = to_ns(parse_time(
+                event_data.get('status', {}).get('session', {}).get('start_time')))
+            if start_time:
+                self.tracer.record('session.queued', start_time, time.time_ns(), parent=trace)
+        with self.tracer.span('operator.handle_added', parent=trace,
+                              attributes={'session': event_data['name'], 'job': job_id}):
+            # This is sent immediately, because a 409 means the session already has a job
+            session_data = self.status_writer.update(event_data['name'], {'job': job_id},
+                                                     sync=True)
+            return self._create_k8s_job(session_data, job_id, trace=trace)
 
     def _handle_deleted(self, event_data):
         """ Delete any K8S objects associated with the CFS Session """
         session_name = event_data['name']
         job_id = event_data.get('status', {}).get('session', {}).get('job')
+        # Retried CREATE events can leave behind earlier jobs for the same session
+        job_ids = set(self.job_monitor.informer.by_session(session_name))
         if job_id:
-            self._delete_job(session_name, job_id)
+            job_ids.add(job_id)
+        deletes = [self._delete_job(session_name, job_id) for job_id in sorted(job_ids)]
         ims_job_id = event_data.get('status', {}).get('session', {}).get('ims_job')
         if ims_job_id:
             self._delete_ims_job(session_name, ims_job_id)
+        return when_all(deletes)
 
     def _send_retry(self, event, kafka):
         attempt_count = 0
@@ -219,31 +402,46 @@ class CFSSessionController:
             duration = time.time() - event['attempt_start']
         else:
             event['attempt_start'] = time.time()
-        if attempt_count > 10 and duration > (60 * 10):  # 10 minutes
+        if self.retry_policy.exhausted(attempt_count, duration):
             LOGGER.warning('Unable to handle event in allotted retries.'
                            'Dropping event: {}'.format(event))
+            metrics.EVENT_RETRIES.labels(_get_event_type(event), 'dropped').inc()
         else:
+            metrics.EVENT_RETRIES.labels(_get_event_type(event), 'retried').inc()
             event['attempt_count'] = attempt_count
+            # Rather than sleeping here, the consumer holds the event until this time
+            event['not_before'] = time.time() + self.retry_policy.get_delay(attempt_count)
             kafka.produce(event)
-            # This small sleep helps prevent constant retries when this is the only event in queue
-            time.sleep(1)
 
     def _delete_job(self, session_name, job_id):
-        """ Delete the Job """
-        try:
-            resp = k8sjobs.delete_namespaced_job(
-                job_id, self.env['RESOURCE_NAMESPACE'], propagation_policy='Background'
-            )
+        """ Delete the Job, returning a Future for the request """
+        return self.job_submitter.delete(session_name, job_id)
+
+    def _job_request_done(self, kind, session_name, job_id, result, error):
+        """ Records the result of a job create or delete sent by the JobSubmitter """
+        if kind == CREATE:
+            self._job_created(session_name, job_id, error)
+        elif error is None:
             LOGGER.info("Job deleted for CFS Session=%s", session_name)
-            LOGGER.debug(
-                'Job "%s" deletion response: %s', job_id, json.dumps(resp.to_dict(), indent=2)
-            )
-        except ApiException as err:
-            if err.status == 404:
-                LOGGER.warning("Job not deleted; not found for CFS Session=%s", session_name)
-                LOGGER.debug('Job "%s" deletion response: %s', job_id, err)
-            else:
-                LOGGER.warning("Exception calling BatchV1Api->delete_namespaced_job", exc_info=True)
+            LOGGER.debug('Job "%s" deletion response: %s', job_id, result)
+        elif getattr(error, 'status', None) == 404:
+            LOGGER.warning("Job not deleted; not found for CFS Session=%s", session_name)
+            LOGGER.debug('Job "%s" deletion response: %s', job_id, error)
+        else:
+            LOGGER.warning("Exception calling BatchV1Api->delete_namespaced_job: %s", error)
+
+    def _job_created(self, session_name, job_id, error):
+        session, trace, submitted = self._creating.pop(job_id, (None, None, None))
+        if trace is not None:
+            self.tracer.record('k8s.create_namespaced_job', submitted, time.time_ns(),
+                               parent=trace, attributes={'job': job_id}, error=error)
+        if error is None:
+            LOGGER.info("Job request created for CFS Session=%s", session_name)
+            self.job_monitor.add_session(session or {'name': session_name, 'status': {
+                'session': {'job': job_id, 'status': 'pending'}}})
+            return
+        LOGGER.error("Unable to create Job=%s: %s", job_id, error)
+        self.status_writer.update(session_name, {'status': 'complete', 'succeeded': 'false'})
 
     def _delete_ims_job(self, session_name, ims_job_id):
         """ Delete the IMS Job """
@@ -253,406 +451,90 @@ class CFSSessionController:
         except Exception:
             LOGGER.warning(f"Failed to delete IMS job {ims_job_id} for CFS session {session_name}")
 
-    def _set_environment_variables(self, session_data):
+    def _get_job_template(self):
         """
-        Set environment variables used in the session job
+        Returns the invariant parts of session jobs, rebuilding them if the
+        process environment they are read from has changed.
         """
-        self._job_env = {}
-        self._job_env['GIT_SSL_CAINFO'] = client.V1EnvVar(
-            name='GIT_SSL_CAINFO',
-            value=CAINFO_PATH
-        )
-        self._job_env['CFS_OPERATOR_LOG_LEVEL'] = client.V1EnvVar(
-            name='CFS_OPERATOR_LOG_LEVEL',
-            value=self.env['CFS_OPERATOR_LOG_LEVEL']
-        )
-        self._job_env['SESSION_NAME'] = client.V1EnvVar(
-            name='SESSION_NAME',
-            value=session_data['name']
-        )
-        self._job_env['SESSION_CONFIGURATION_NAME'] = client.V1EnvVar(
-            name='SESSION_CONFIGURATION_NAME',
-            value=session_data['configuration']['name']
-        )
-        self._job_env['SESSION_CONFIGURATION_LIMIT'] = client.V1EnvVar(
-            name='SESSION_CONFIGURATION_LIMIT',
-            value=session_data['configuration']['limit']
-        )
-        self._job_env['RESOURCE_NAMESPACE'] = client.V1EnvVar(
-            name='RESOURCE_NAMESPACE',
-            value=self.env['RESOURCE_NAMESPACE']
-        )
-        self._job_env['SSL_CAINFO'] = client.V1EnvVar(
-            name='SSL_CAINFO',
-            value=CAINFO_PATH
-        )
-        self._job_env['VCS_USERNAME'] = client.V1EnvVar(
-            name='VCS_USERNAME',
-            value_from=client.V1EnvVarSource(
-                secret_key_ref=client.V1SecretKeySelector(
-                    key='vcs_username',
-                    name=self.env.get('VCS_USER_CREDENTIALS', 'vcs-user-credentials'),
-                    optional=False
-                )
-            )
-        )
-        self._job_env['VCS_PASSWORD'] = client.V1EnvVar(
-            name='VCS_PASSWORD',
-            value_from=client.V1EnvVarSource(
-                secret_key_ref=client.V1SecretKeySelector(
-                    key='vcs_password',
-                    name=self.env.get('VCS_USER_CREDENTIALS', 'vcs-user-credentials'),
-                    optional=False
-                )
-            )
-        )
-        self._job_env['GIT_RETRY_MAX'] = client.V1EnvVar(
-            name='GIT_RETRY_MAX',
-            value=str(os.environ.get("CFS_GIT_RETRY_MAX", 60))
-        )
-        self._job_env['GIT_RETRY_DELAY'] = client.V1EnvVar(
-            name='GIT_RETRY_DELAY',
-            value=str(os.environ.get("CFS_GIT_RETRY_DELAY", 10))
-        )
-        self._job_env['VAULT_ADDR'] = client.V1EnvVar(
-            name='VAULT_ADDR',
-            value=str(os.environ.get("VAULT_ADDR", ""))
-        )
-
-    def _lookup_vault_token(self, session_data):
+        generation = tuple(os.environ.get(key) for key in JOB_TEMPLATE_ENVIRONMENT)
+        template = self._job_template
+        if template is None or template[0] != generation:
+            template = (generation, JobTemplate(self.env))
+            self._job_template = template
+        return template[1]
+
+    def _lookup_vault_token(self, configuration_data):
         """
         When a new CFS Session is created, check to see if the session is being initialized against a configuration
         that it is owned by a specific tenant. If it is owned by a tenant, we need to pass in the unlock token
         that is required for SOPS to decrypt any encrypted variables.
         """
-        cfs_configuration_name = session_data['configuration']['name']
-        try:
-            configuration_data = get_configuration(cfs_configuration_name)
-        except Exception as exception:
-            raise CFSApiException("Unable to obtain configuration information from CFS API.") from exception
-        tenant = tenant_namespace = configuration_data.get('tenant_name', None)
+        tenant = (configuration_data or {}).get('tenant_name', None)
         if tenant:
-            # Once we know there is a tenant associated with it, we need to ask TAPMS about that tenant's transit engine
-            try:
+            return self.tenant_tokens.get(tenant)
+
+    def _login_tenant(self, tenant):
+        """
+        Logs in to Vault as a tenant, returning a CacheEntry for the tenant's token.
+
+        The token is reused for new sessions for a small part of its lease, so
+        that every job still receives a token with most of its lease remaining.
+        """
+        tenant_namespace = tenant
+        # Once we know there is a tenant associated with it, we need to ask TAPMS about that tenant's transit engine
+        try:
+            with metrics.K8S_SECONDS.labels('get_namespaced_custom_object').time():
                 tapms_response = CRD_CLIENT.get_namespaced_custom_object(group='tapms.hpe.com',
                                                                          version='v1alpha3',
                                                                          namespace='tenants',
                                                                          plural='tenants',
                                                                          name=tenant)
-            except Exception as exception:
-                raise TapmsException("Unable to get namespaced CRD information from TAPMS") from exception
-            transit_engine = tapms_response['status']['tenantkms']['transitname']
-            # Now, we must read the secret that is associated with the tenant from its' namespace so that we can
-            # use it to authenticate to vault. Unfortunately, the name isn't pre-determined, but there should only be
-            # exactly one of them, so we must first list all of the defined secrets, and then reference the only one
-            # that exists.
-            try:
-                tenant_namespaced_secrets_list = CORE_CLIENT.list_namespaced_secret(tenant_namespace).to_dict()['items']
-            except Exception as exception:
-                raise K8sException("Unable to list secrets from tenant's namespace.") from exception
-            # There _should_ be exactly one. If there is any other number, we shouldn't assume.
-            secrets_within_tenant = len(tenant_namespaced_secrets_list)
-            if secrets_within_tenant != 1:
-                raise K8sException("Exactly one secret within tenant namespace '%s' expected; instead found %d."
-                                     %(tenant_namespace, secrets_within_tenant))
-            access_token = base64.b64decode(tenant_namespaced_secrets_list[0]['data']['token']).decode('ascii')
-            # Now that we have the access token for the user, we can use it to login to vault
-            vault_login_uri = 'http://cray-vault.vault.svc:8200/v1/auth/kubernetes/login'
-            try:
-                vault_response = requests.put(vault_login_uri, data={'jwt': access_token, 'role': transit_engine}).json()
-            except Exception as exception:
-                raise VaultException("Unable to login to complete PUT to Vault Login.") from exception
-            vault_token = vault_response['auth']['client_token']
-            # Finally, with a tenant's vault token in hand, we can append it to the job launch's variables
-            return vault_token
-
-    def _set_volume_mounts(self):
-        """
-        Set volume mount objects used by various containers in the session job
-        """
-        self._job_volume_mounts = {}
-        self._job_volume_mounts['CONFIG_VOL'] = client.V1VolumeMount(
-            name='config-vol',
-            mount_path=SHARED_DIRECTORY,
-        )
-        self._job_volume_mounts['CA_PUBKEY'] = client.V1VolumeMount(
-            name='ca-pubkey',
-            mount_path='/etc/cray/ca',
-            read_only=True,
-        )
-        self._job_volume_mounts['ANSIBLE_CONFIG'] = client.V1VolumeMount(
-            name='ansible-config',
-            mount_path='/tmp/ansible',
-        )
-        self._job_volume_mounts['CFS_TRUST_KEYS'] = client.V1VolumeMount(
-            name='cfs-trust-keys',
-            mount_path='/secret-keys',
-            read_only=True,
-        )
-        self._job_volume_mounts['CFS_TRUST_CERTIFICATE'] = client.V1VolumeMount(
-            name='cfs-trust-certificate',
-            mount_path='/secret-certs',
-            read_only=True,
-        )
-
-    def _set_volumes(self, ansible_config):
-        """ Set volume objects used in the session job """
-        self._job_volumes = {}
-        self._job_volumes['CA_PUBKEY'] = client.V1Volume(
-            name='ca-pubkey',
-            config_map=client.V1ConfigMapVolumeSource(
-                name=self.env['CRAY_CFS_CONFIGMAP_PUBLIC_KEY'],
-                items=[
-                    client.V1KeyToPath(
-                        key=self.env['CRAY_CFS_CA_PUBLIC_KEY'],
-                        path='certificate_authority.crt'
-                    )  # V1KeyToPath
-                ],  # items
-            ),  # V1ConfigMapVolumeSource
-        )  # V1Volume
-
-        self._job_volumes['CONFIG_VOL'] = client.V1Volume(
-            name='config-vol',
-            empty_dir=client.V1EmptyDirVolumeSource(
-                medium="Memory"
-            )  # V1EmptyDirVolumeSource
-        )  # V1Volume
-
-        self._job_volumes['ANSIBLE_CONFIG'] = client.V1Volume(
-            name='ansible-config',
-            config_map=client.V1ConfigMapVolumeSource(
-                name=ansible_config,
-                items=[
-                    client.V1KeyToPath(
-                        key='ansible.cfg',
-                        path='ansible.cfg'
-                    )  # V1KeyToPath
-                ],  # items
-            ),  # V1ConfigMapVolumeSource
-        )  # V1Volume
-
-        self._job_volumes['CFS_TRUST_KEYS'] = client.V1Volume(
-            name='cfs-trust-keys',
-            secret=client.V1SecretVolumeSource(
-                secret_name=self.env['CRAY_CFS_TRUST_KEY_SECRET'],
-                items=[
-                    client.V1KeyToPath(
-                        key='public',
-                        path='id_ecdsa.pub'
-                    ),  # V1KeyToPath
-                    client.V1KeyToPath(
-                        key='private',
-                        path='id_ecdsa'
-                    ),  # V1KeyToPath
-                ],  # items
-            ),  # V1SecretVolumeSource
-        )  # V1Volume
-
-        self._job_volumes['CFS_TRUST_CERTIFICATE'] = client.V1Volume(
-            name='cfs-trust-certificate',
-            secret=client.V1SecretVolumeSource(
-                secret_name=self.env['CRAY_CFS_TRUST_CERT_SECRET'],
-                items=[
-                    client.V1KeyToPath(
-                        key='certificate',
-                        path='id_ecdsa-cert.pub'
-                    ),  # V1KeyToPath
-                ],  # items
-            ),  # V1SecretVolumeSource
-        )  # V1Volume
-
-    def _get_clone_container(self):
-        """
-        Creates the container to clone repos in the configuration
-        for this session.
-        """
-        clone_container = client.V1Container(
-            name='git-clone',
-            image=self.env['CRAY_CFS_UTIL_IMAGE'],
-            volume_mounts=[
-                self._job_volume_mounts['CONFIG_VOL'],
-                self._job_volume_mounts['CA_PUBKEY']
-            ],  # V1VolumeMount
-            env=[self._job_env['GIT_SSL_CAINFO'],
-                 self._job_env['VCS_USERNAME'],
-                 self._job_env['VCS_PASSWORD'],
-                 self._job_env['SESSION_CONFIGURATION_NAME'],
-                 self._job_env['SESSION_CONFIGURATION_LIMIT'],
-                 self._job_env['GIT_RETRY_MAX'],
-                 self._job_env['GIT_RETRY_DELAY'],
-                 self._job_env['VAULT_ADDR']],  # env
-            command=["/bin/sh", "-c"],  # command
-            args=["python3 -m cray.cfs.clone"],  # args
-        )  # V1Container
-
-        return clone_container
-
-    def _get_inventory_container(self, session_data):
-        """
-        Create the inventory container object
-        """
-        create_ssh_dir_cmd = 'mkdir -p {}/ssh '.format(SHARED_DIRECTORY)
-
-        # For live nodes, use the signed keys from vault with a cert generated
-        # by the CFS trust mechanisms
-        create_ssh_keys_cmd = 'cp /secret-keys/* {0}/ssh/ && ' \
-                              'chmod 600 {0}/ssh/id_ecdsa && ' \
-                              'cp /secret-certs/* {0}/ssh/ '.format(SHARED_DIRECTORY)
-
-        # For image customization, generate some keys for use with Ansible
-        if session_data['target']['definition'] == "image":
-            create_ssh_keys_cmd += ' && ssh-keygen -t ecdsa -N "" -f {}/ssh/id_image '.format(
-                SHARED_DIRECTORY)
-
-        copy_ansible_cfg_cmd = 'cp /tmp/ansible/ansible.cfg {}/ '.format(SHARED_DIRECTORY)
-        run_inventory_cmd = 'python3 -m cray.cfs.inventory'
-        command = [
-            create_ssh_dir_cmd + ' && ' +
-            create_ssh_keys_cmd + ' && ' +
-            copy_ansible_cfg_cmd + ' && ' +
-            wait_for_envoy_boilerplate + ' && ' +
-            run_inventory_cmd
-        ]
-
-        return client.V1Container(
-            name='inventory',
-            image=self.env['CRAY_CFS_UTIL_IMAGE'],
-            volume_mounts=[
-                self._job_volume_mounts['CONFIG_VOL'],
-                self._job_volume_mounts['ANSIBLE_CONFIG'],
-                self._job_volume_mounts['CA_PUBKEY'],
-                self._job_volume_mounts['CFS_TRUST_KEYS'],
-                self._job_volume_mounts['CFS_TRUST_CERTIFICATE']
-            ],  # V1VolumeMount
-            env=[
-                self._job_env['CFS_OPERATOR_LOG_LEVEL'],
-                self._job_env['SESSION_NAME'],
-                self._job_env['RESOURCE_NAMESPACE'],
-                self._job_env['SSL_CAINFO']
-            ],  # env
-            command=['/bin/bash', '-c'],
-            security_context = client.V1SecurityContext(
-                run_as_user = 0
-            ),
-            args=command,
-        )  # V1Container
-
-    def _get_ansible_container(self, session_data, configuration):
+        except Exception as exception:
+            raise TapmsException("Unable to get namespaced CRD information from TAPMS") from exception
+        transit_engine = tapms_response['status']['tenantkms']['transitname']
+        # Now, we must read the secret that is associated with the tenant from its' namespace so that we can
+        # use it to authenticate to vault. Unfortunately, the name isn't pre-determined, but there should only be
+        # exactly one of them, so we must first list all of the defined secrets, and then reference the only one
+        # that exists.
+        try:
+            with metrics.K8S_SECONDS.labels('list_namespaced_secret').time():
+                tenant_namespaced_secrets = CORE_CLIENT.list_namespaced_secret(tenant_namespace)
+        except Exception as exception:
+            raise K8sException("Unable to list secrets from tenant's namespace.") from exception
+        tenant_namespaced_secrets_list = tenant_namespaced_secrets.to_dict()['items']
+        # There _should_ be exactly one. If there is any other number, we shouldn't assume.
+        secrets_within_tenant = len(tenant_namespaced_secrets_list)
+        if secrets_within_tenant != 1:
+            raise K8sException("Exactly one secret within tenant namespace '%s' expected; instead found %d."
+                                 %(tenant_namespace, secrets_within_tenant))
+        access_token = base64.b64decode(tenant_namespaced_secrets_list[0]['data']['token']).decode('ascii')
+        # Now that we have the access token for the user, we can use it to login to vault
+        vault_login_uri = 'http://cray-vault.vault.svc:8200/v1/auth/kubernetes/login'
+        try:
+            vault_response = requests.put(vault_login_uri, data={'jwt': access_token, 'role': transit_engine}).json()
+        except Exception as exception:
+            raise VaultException("Unable to login to complete PUT to Vault Login.") from exception
+        vault_token = vault_response['auth']['client_token']
+        lease_duration = vault_response['auth'].get('lease_duration') or 0
+        reuse = self.vault_token_reuse
+        if lease_duration:
+            reuse = min(reuse, lease_duration * VAULT_TOKEN_REUSE_FRACTION)
+        LOGGER.debug("Logged in to Vault for tenant %s; reusing the token for %d seconds",
+                     tenant, reuse)
+        return CacheEntry(vault_token, ttl=reuse)
+
+    def _get_vault_token_env(self, configuration_data):
         """
-        Get the list of Ansible containers to be run in the job
+        Look up any vault token necessary to decrypt SOPS variables when running Ansible
         """
-        options.update()
-        ansible_config = options.default_ansible_config
-        ansible_args = []
-        disable_state_recording=False
-        if session_data['target']['definition'] == 'image':
-            disable_state_recording=True
-        if len(configuration) == 1 and configuration[0][0] == "debug":
-            disable_state_recording=True
-        if 'ansible' in session_data:
-            ansible_spec = session_data['ansible']
-            ansible_config = ansible_spec.get('config', ansible_config)
-
-            # This creates a flag equal the the specified number of v's.
-            # e.g if ansible_vint = 3, ansible_verbosity="-vvv"
-            # The range of values is validated in the api spec.
-            ansible_vint = ansible_spec.get('verbosity', DEFAULT_ANSIBLE_VERBOSITY)
-            ansible_verbosity = '-' + 'v' * ansible_vint if ansible_vint else None
-            if ansible_verbosity:
-                ansible_args.append(ansible_verbosity)
-
-            limit = ansible_spec.get('limit', None)
-            if session_data['target']['definition'] == 'image' and not limit:
-                limit = ','.join([member for group in session_data['target']['groups'] for member in group['members']])
-            if limit:
-                ansible_args.append('--limit')
-                ansible_args.append(limit)
-
-            ansible_passthrough = ansible_spec.get('passthrough', '')
-            if ansible_passthrough:
-                ansible_args.extend(shlex.split(ansible_passthrough, posix=False))
-                disable_state_recording=True
-
-        ansible_data = [layer for _, layer in configuration]
-
-        debug_wait_time = 0
-        if session_data["debug_on_failure"]:
-            debug_wait_time = options.debug_wait_time
-
-        # Look up any vault token necessary to decrypt SOPS variables when running Ansible
         try:
-            vault_token_env = client.V1EnvVar(name='VAULT_TOKEN', value=self._lookup_vault_token(session_data) or '')
+            return client.V1EnvVar(name='VAULT_TOKEN',
+                                   value=self._lookup_vault_token(configuration_data) or '')
         except MultitenantException as mte:
             LOGGER.warning("Unable to set VAULT_TOKEN for job: %s; skipping, but could cause failed configuration session.",
                            mte)
             # Zero it out, indicating we couldn't look it up, but we tried.
-            vault_token_env = client.V1EnvVar(name="VAULT_TOKEN", value='')
-
-        ansible_container = client.V1Container(
-            name='ansible',
-            image=self.env['CRAY_CFS_AEE_IMAGE'],
-            resources=client.V1ResourceRequirements(
-                limits=json.loads(self.env['CRAY_CFS_ANSIBLE_CONTAINER_LIMITS']),
-                requests=json.loads(self.env['CRAY_CFS_ANSIBLE_CONTAINER_REQUESTS'])
-            ),
-            env=[
-                self._job_env['SESSION_NAME'],
-                self._job_env['SSL_CAINFO'],
-                client.V1EnvVar(
-                    name='ANSIBLE_ARGS',
-                    value=" ".join(ansible_args)
-                ),
-                client.V1EnvVar(
-                    name='INVENTORY_TYPE',
-                    value=session_data['target']['definition']
-                ),
-                client.V1EnvVar(
-                    name='DISABLE_STATE_RECORDING',
-                    value=str(disable_state_recording)
-                ),
-                client.V1EnvVar(
-                    name='DEBUG_WAIT_TIME',
-                    value=str(debug_wait_time)
-                ),
-                vault_token_env
-            ],  # env
-            volume_mounts=[
-                self._job_volume_mounts['CONFIG_VOL'],
-                self._job_volume_mounts['CA_PUBKEY'],
-            ],  # volume_mounts
-            args=[json.dumps(ansible_data)],
-        )  # V1Container
-
-        return ansible_container
-
-    def _get_teardown_container(self):
-        """
-        For image customization runs (session.target = 'image'), create a
-        teardown container to wrap the IMS image back up and put a bow on it.
-        """
-        teardown_args = [
-            wait_for_envoy_boilerplate + ' && ' +
-            ' python3 -m cray.cfs.teardown'
-        ]
-
-        return client.V1Container(
-            name='teardown',
-            image=self.env['CRAY_CFS_UTIL_IMAGE'],
-            volume_mounts=[
-                self._job_volume_mounts['CONFIG_VOL'],
-            ],  # V1VolumeMount
-            env=[
-                self._job_env['CFS_OPERATOR_LOG_LEVEL'],
-                self._job_env['SESSION_NAME'],
-                self._job_env['RESOURCE_NAMESPACE'],
-            ],  # env
-            command=['/bin/bash', '-c'],
-            security_context = client.V1SecurityContext(
-                run_as_user = 0
-            ),
-            args=teardown_args,
-        )  # V1Container
-
+            return client.V1EnvVar(name="VAULT_TOKEN", value='')
 
     def _get_debug_configuration_data(self, configuration_name):
         debug_configuration_data = {
@@ -663,16 +545,24 @@ class CFSSessionController:
         ansible_configuration_data = [("debug", debug_configuration_data)]
         return ansible_configuration_data
 
-
-    def _get_configuration_data(self, session_data):
+    def _get_configuration(self, session_data):
+        """
+        Get the session's configuration from the configuration cache.  Returns
+        None for a debug configuration that is not known to CFS.
+        """
         configuration_name = session_data['configuration']['name']
         try:
-            cfs_config = get_configuration(configuration_name)
-        except Exception as e:
+            return get_cached_configuration(configuration_name)
+        except Exception:
             if configuration_name.startswith("debug_"):
-                return self._get_debug_configuration_data(configuration_name)
-            raise e
-        configuration = cfs_config.get('layers', [])
+                return None
+            raise
+
+    def _get_configuration_data(self, session_data, cfs_config):
+        if cfs_config is None:
+            return self._get_debug_configuration_data(session_data['configuration']['name'])
+        # The layers are labeled below, so the cached configuration is copied first
+        configuration = [dict(layer) for layer in cfs_config.get('layers', [])]
         configuration_limit = session_data['configuration'].get('limit', '')
 
         if configuration_limit:
@@ -690,114 +580,86 @@ class CFSSessionController:
             layer["layer"] = i
         return configuration
 
-
-    def _create_k8s_job(self, session_data, job_id):  # noqa: C901
+    def _create_k8s_job(self, session_data, job_id, trace=None):
         """
-        When a CFS Session is created, kick off the k8s job.
+        When a CFS Session is created, kick off the k8s job.  The job is created
+        in the background, and a Future for the request is returned.
         """
-        options.update()
-
-        ansible_configuration_data = self._get_configuration_data(session_data)
-
-        ansible_config = options.default_ansible_config
-        if 'ansible' in session_data:
-            ansible_spec = session_data['ansible']
-            ansible_config = ansible_spec.get('config', ansible_config)
-
-        # Set the env, vol mount, and volume objects used in the session job
-        self._set_environment_variables(session_data)
-        self._set_volume_mounts()
-        self._set_volumes(ansible_config)
-
-        clone_container = self._get_clone_container()
-
-        # Inventory container
-        inventory_container = self._get_inventory_container(session_data)
-
-        # Ansible containers
-        ansible_container = self._get_ansible_container(session_data, ansible_configuration_data)
-
-        # Assemble the containers, if this is image customization, add the IMS
-        # teardown containers to the list
-        containers = [inventory_container, ansible_container]
-        if session_data['target']['definition'] == "image":
-            containers.append(self._get_teardown_container())
-
-        v1_pod_spec = client.V1PodSpec(
-                        service_account_name=self.env['CRAY_CFS_SERVICE_ACCOUNT'],
-                        restart_policy="Never",
-                        volumes=[
-                            self._job_volumes['CA_PUBKEY'],
-                            self._job_volumes['CONFIG_VOL'],
-                            self._job_volumes['ANSIBLE_CONFIG'],
-                            self._job_volumes['CFS_TRUST_KEYS'],
-                            self._job_volumes['CFS_TRUST_CERTIFICATE']
-                        ],  # volumes
-                        init_containers=[clone_container],
-                        containers=containers,
-                    )  # V1PodSpec
-
-        v1_job_metadata = client.V1ObjectMeta(
-                        name=job_id,
-                        labels={
-                            'cfsession': session_data['name'][:60],
-                            'cfsversion': 'v3',
-                            'app.kubernetes.io/name': 'cray-cfs-aee',
-                            'aee': session_data['name'][:60],
-                            'configuration': session_data.get('configuration', {}).get('name', '')[:60]
-                        },
-                    )  # V1ObjectMeta
-
-        v1_job_spec_args = {
-            "backoff_limit": 0,
-            "template": client.V1PodTemplateSpec(metadata=v1_job_metadata, spec=v1_pod_spec)
-        }
+        options.refresh()
+
+        # The configuration is read once for both its layers and its tenant
+        cfs_config = self._get_configuration(session_data)
+        ansible_configuration_data = self._get_configuration_data(session_data, cfs_config)
+        vault_token_env = self._get_vault_token_env(cfs_config)
+
+        v1_job = self._build_k8s_job(session_data, job_id, ansible_configuration_data,
+                                     vault_token_env, trace_context=trace)
+        session = {'name': session_data['name'], 'status': {'session': {
+            'job': job_id,
+            'status': 'pending',
+            'start_time': session_data.get('status', {}).get('session', {}).get('start_time'),
+        }}}
+        self._creating[job_id] = (session, trace, time.time_ns())
+        return self.job_submitter.create(session_data['name'], v1_job)
+
+    def _build_k8s_job(self, session_data, job_id, ansible_configuration_data, vault_token_env,
+                       trace_context=None):
+        """
+        Assemble the k8s job object for a session.  This is safe to call from
+        many threads at once.
+        """
+        return JobBuilder(self._get_job_template(), session_data, job_id,
+                          ansible_configuration_data, vault_token_env, options,
+                          trace_context=trace_context).build()
 
-        # If specified, CFS session jobs set their ttlSecondsAfterFinished based on the CFS session TTL option
-        session_ttl_seconds = _get_ttl_seconds(options.session_ttl)
-        if session_ttl_seconds:
-            LOGGER.debug("session_ttl_seconds = %d", session_ttl_seconds)
-            v1_job_spec_args["ttl_seconds_after_finished"] = session_ttl_seconds
-
-        v1_job = client.V1Job(
-            api_version='batch/v1',
-            kind='Job',
-            metadata=client.V1ObjectMeta(
-                name=job_id,
-            ),
-            spec=client.V1JobSpec(**v1_job_spec_args)
-        )
 
-        try:
-            job = k8sjobs.create_namespaced_job(self.env['RESOURCE_NAMESPACE'], v1_job)
-            LOGGER.info(
-                "Job request created for CFS Session=%s", session_data['name']
-            )
-            return job
-        except ApiException as err:
-            LOGGER.error("Unable to create Job=%s: %s", job_id, err)
-            # TODO: fixme - transition CFS to error state?
-
-# Valid units are minutes, hours, days, weeks
-_ttl_unit_multiplier = {
-    "m": 60,    # 60 seconds per minute
-    "h": 3600,  # 60*60 = 3600 seconds per hours
-    "d": 86400, # 3600 * 24 = 86400 seconds per day
-    "w": 604800 # 86400 * 7 = 604800 seconds per week
-}
-
-def _get_ttl_seconds(session_ttl: str) -> int:
+def _get_retry_delay(event):
     """
-    Returns the CFS session_ttl option in seconds, as an int.
-    Returns 0 if option is not set or if it is invalid.
+    Returns the number of seconds until a retried event should be handled again.
     """
-    if not session_ttl:
+    try:
+        not_before = event.get('not_before')
+    except AttributeError:
+        return 0
+    if not not_before:
         return 0
+    return not_before - time.time()
+
+
+def _get_session_key(event):
+    """
+    Returns the name of the session an event is for, which is used to keep the
+    events for each session in order.  Malformed events all share the None key.
+    """
+    try:
+        return event.get('data', {}).get('name')
+    except AttributeError:
+        return None
+
+
+def _get_event_type(event):
+    """
+    Returns the type of an event, or 'invalid' for anything other than a
+    CREATE or DELETE event.
+    """
     try:
-        ttl_number = int(options.session_ttl[:-1])
-        ttl_units = options.session_ttl[-1].lower()
-        # Valid units are minutes, hours, days, weeks
-        return ttl_number * _ttl_unit_multiplier[ttl_units]
-    except Exception:
-        LOGGER.exception("Invalid value for session_ttl option: %s", session_ttl)
-    return 0
+        event_type = event.get('type')
+    except AttributeError:
+        return 'invalid'
+    return event_type if event_type in ('CREATE', 'DELETE') else 'invalid'
+
+
+def _get_event_lane(event):
+    """
+    Returns the worker pool lane for an event.  Anything that is not a DELETE,
+    including malformed events, is handled in the CREATE lane.
+    """
+    return DELETE_LANE if _get_event_type(event) == 'DELETE' else CREATE_LANE
+
+
+def _record_lag(consumer, partition, offset):
+    """Records how far the consumer is behind the end of a partition after reading offset"""
+    highwater = consumer.highwater(partition)
+    if isinstance(highwater, int):
+        metrics.KAFKA_LAG.labels(str(getattr(partition, 'partition', partition))).set(
+            max(0, highwater - offset - 1))
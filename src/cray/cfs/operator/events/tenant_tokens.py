@@ -0,0 +1,198 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Vault tokens for tenants, shared by the sessions that use tenant configurations.
+
+A token is reused for new sessions for part of its lease.  While a tenant is
+in use, its token is renewed in the background before that time is up, so
+sessions do not wait on a Vault login.  The secrets in the tenant's namespace
+are watched, and a change drops the token at once.
+"""
+import logging
+import threading
+
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+
+from cray.cfs.operator.events.retry import RetryScheduler
+from cray.cfs.utils.cache import TTLCache
+
+LOGGER = logging.getLogger('cray.cfs.operator.events.tenant_tokens')
+
+# Tokens are renewed this far into the time they are reused for
+RENEW_AT = 0.75
+WATCH_TIMEOUT = 60  # seconds
+WATCH_RETRY_DELAY = 5  # seconds
+# Watch errors that retrying will not fix
+WATCH_FORBIDDEN = (401, 403)
+
+
+class TenantTokenCache:
+    """
+    Caches a Vault token per tenant.
+
+    login(tenant) returns a CacheEntry for the tenant's token, with the time it
+    may be reused for as its ttl.  list_secrets(namespace) lists the secrets
+    in a namespace, and is also used to watch them.
+
+    If the operator is not allowed to watch secrets, tokens are still reused,
+    and simply expire after their ttl.
+    """
+
+    def __init__(self, login, list_secrets, ttl, renew_at=RENEW_AT,
+                 watch_timeout=WATCH_TIMEOUT, name='tenant_vault_tokens'):
+        self.login = login
+        self.list_secrets = list_secrets
+        self.renew_at = renew_at
+        self.watch_timeout = watch_timeout
+        self.name = name
+        self.tokens = TTLCache(ttl=ttl, name=name)
+        self.renewals = RetryScheduler(name='vault_token_renewal')
+        self._lock = threading.Lock()
+        self._used = set()
+        # The number of logins per tenant, so that only the latest is renewed
+        self._logins = {}
+        self._watches = {}
+        self._watch_forbidden = False
+        self._stopped = threading.Event()
+
+    def start(self):
+        self.renewals.start()
+
+    def stop(self, timeout=1):
+        """Stops renewing tokens and watching secrets"""
+        self._stopped.set()
+        with self._lock:
+            watches = list(self._watches.values())
+            self._watches.clear()
+        for thread in watches:
+            thread.join(timeout)
+
+    def get(self, tenant):
+        """Returns a Vault token for the tenant"""
+        self._watch(tenant)
+        with self._lock:
+            self._used.add(tenant)
+        return self.tokens.get(tenant, self._load)
+
+    def stats(self):
+        return self.tokens.stats()
+
+    def _load(self, tenant, entry):
+        new_entry = self.login(tenant)
+        with self._lock:
+            # Only uses after this login keep the token renewed
+            self._used.discard(tenant)
+            login = self._logins[tenant] = self._logins.get(tenant, 0) + 1
+        self.renewals.schedule(new_entry.ttl * self.renew_at, self._renew, tenant, login)
+        return new_entry
+
+    def _renew(self, tenant, login):
+        with self._lock:
+            if self._logins.get(tenant) != login:
+                return
+            used = tenant in self._used
+            self._used.discard(tenant)
+            if not used:
+                # The tenant is idle, so it is no longer watched, and its token
+                # is dropped rather than reused unwatched
+                self._watches.pop(tenant, None)
+        if not used:
+            self.tokens.invalidate(tenant)
+            return
+        if self._stopped.is_set():
+            return
+        try:
+            self.tokens.refresh(tenant, self._load)
+        except Exception as e:
+            LOGGER.warning("Unable to renew the Vault token for tenant %s: %s", tenant, e)
+
+    def _watch(self, tenant):
+        """
+        Starts watching the tenant's secrets, if they are not already watched.
+        The secrets are listed first, before any login, so that no change can
+        be missed between the login and the start of the watch.
+        """
+        with self._lock:
+            if tenant in self._watches or self._stopped.is_set() or self._watch_forbidden:
+                return
+        try:
+            resource_version = self.list_secrets(tenant).metadata.resource_version
+        except Exception as e:
+            # The watch lists the secrets again before it starts
+            LOGGER.warning("Unable to list secrets for tenant %s: %s", tenant, e)
+            resource_version = None
+        with self._lock:
+            if tenant in self._watches or self._stopped.is_set():
+                return
+            thread = threading.Thread(target=self._watch_secrets, name='tenant_secrets_' + tenant,
+                                      args=(tenant, resource_version), daemon=True)
+            self._watches[tenant] = thread
+            thread.start()
+
+    def _watching(self, tenant):
+        with self._lock:
+            return self._watches.get(tenant) is threading.current_thread()
+
+    def _watch_secrets(self, tenant, resource_version):
+        """Drops the tenant's token whenever its secrets change"""
+        while self._watching(tenant) and not self._stopped.is_set():
+            try:
+                if resource_version is None:
+                    resource_version = self.list_secrets(tenant).metadata.resource_version
+                    # Changes may have been missed before the secrets were listed
+                    self.tokens.invalidate(tenant)
+                for event in watch.Watch().stream(self.list_secrets, tenant,
+                                                  resource_version=resource_version,
+                                                  timeout_seconds=self.watch_timeout):
+                    if event['type'] == 'ERROR':
+                        status = event.get('raw_object') or {}
+                        raise ApiException(status=status.get('code'),
+                                           reason=status.get('message'))
+                    resource_version = event['object'].metadata.resource_version
+                    if event['type'] != 'BOOKMARK':
+                        LOGGER.info("Secrets changed for tenant %s; dropping the cached "
+                                    "Vault token", tenant)
+                        self.tokens.invalidate(tenant)
+            except Exception as e:
+                if isinstance(e, ApiException) and e.status in WATCH_FORBIDDEN:
+                    return self._stop_watching(tenant, e)
+                self._restart_watch(tenant, e)
+                resource_version = None
+
+    def _restart_watch(self, tenant, error):
+        # Changes may have been missed, so the token can no longer be trusted
+        LOGGER.warning("Restarting the watch of secrets for tenant %s: %s", tenant, error)
+        self.tokens.invalidate(tenant)
+        self._stopped.wait(WATCH_RETRY_DELAY)
+
+    def _stop_watching(self, tenant, error):
+        """Stops every watch, leaving the cached tokens to expire after their ttl"""
+        with self._lock:
+            already_forbidden = self._watch_forbidden
+            self._watch_forbidden = True
+            self._watches.clear()
+        if not already_forbidden:
+            LOGGER.warning("Unable to watch the secrets for tenant %s (%s); cached Vault tokens "
+                           "will expire after their ttl instead", tenant, error)
@@ -1,7 +1,7 @@
 #
 # MIT License
 #
-# (C) Copyright 2020-2023 Hewlett Packard Enterprise Development LP
+# (C) Copyright 2020-2023, 2026 Hewlett Packard Enterprise Development LP
 #
 # Permission is hereby granted, free of charge, to any person obtaining a
 # copy of this software and associated documentation files (the "Software"),
@@ -23,9 +23,10 @@
 #
 import ujson as json
 import logging
+import threading
 import time
 
-from kafka import KafkaConsumer, KafkaProducer
+from kafka import ConsumerRebalanceListener, KafkaConsumer, KafkaProducer, OffsetAndMetadata
 from kafka.errors import KafkaTimeoutError
 
 from kubernetes import config, client
@@ -46,14 +47,102 @@ KAFKA_SESSION_TIMEOUT = 20000  # The default was not sufficient during testing
 KAFKA_PRODUCE_TIMEOUT = 2
 
 
+class CommitPolicy:
+    """
+    Decides when offsets handed to KafkaWrapper.commit are actually sent to the broker.
+
+    Offsets are coalesced until either max_messages messages have been processed
+    since the last commit, or max_interval_ms has passed.  The defaults commit
+    every time.  Delaying a commit never skips an event; at worst, events
+    processed since the last commit are delivered again after a restart.
+    """
+
+    def __init__(self, max_messages=1, max_interval_ms=0):
+        self.max_messages = max_messages
+        self.max_interval_ms = max_interval_ms
+        self.requested = 0
+        self.sent = 0
+        self._pending = {}
+        self._committed = {}
+        self._uncommitted_messages = 0
+        self._last_commit = time.monotonic()
+
+    @property
+    def saved(self):
+        """The number of commit requests that did not need their own broker round trip"""
+        return max(self.requested - self.sent, 0)
+
+    def stats(self):
+        return {'requested': self.requested, 'sent': self.sent, 'saved': self.saved}
+
+    def add(self, offsets):
+        if not offsets:
+            return
+        self.requested += 1
+        for partition, offset in offsets.items():
+            previous = self._pending.get(partition, self._committed.get(partition))
+            if previous is None:
+                self._uncommitted_messages += 1
+            elif offset > previous:
+                self._uncommitted_messages += offset - previous
+            else:
+                continue
+            self._pending[partition] = offset
+
+    def due(self):
+        if not self._pending:
+            return False
+        if self._uncommitted_messages >= self.max_messages:
+            return True
+        return (time.monotonic() - self._last_commit) * 1000 >= self.max_interval_ms
+
+    def pending(self):
+        return dict(self._pending)
+
+    def committed(self, offsets):
+        """Records that offsets were successfully committed"""
+        for partition, offset in offsets.items():
+            if self._pending.get(partition) == offset:
+                del self._pending[partition]
+            self._committed[partition] = offset
+        self.sent += 1
+        self._uncommitted_messages = 0
+        self._last_commit = time.monotonic()
+
+    def forget(self, partitions):
+        """Drops any state for partitions that are no longer assigned to this consumer"""
+        for partition in partitions:
+            self._pending.pop(partition, None)
+            self._committed.pop(partition, None)
+
+
+class _FlushOnRebalance(ConsumerRebalanceListener):
+    """Commits any coalesced offsets before partitions are handed to another consumer"""
+
+    def __init__(self, kafka):
+        self.kafka = kafka
+
+    def on_partitions_revoked(self, revoked):
+        try:
+            self.kafka.flush_commits()
+        except Exception as e:
+            LOGGER.warning('Unable to commit offsets before rebalance: {}'.format(e))
+        self.kafka.commit_policy.forget(revoked)
+
+    def on_partitions_assigned(self, assigned):
+        pass
+
+
 class KafkaWrapper:
     """A wrapper around a Kafka connection"""
 
-    def __init__(self, topic=None, group_id=None, enable_auto_commit=True):
+    def __init__(self, topic=None, group_id=None, enable_auto_commit=True, commit_policy=None):
         self.topic = topic
         self.kafka_host = None
         self.consumer = None
         self.producer = None
+        self.commit_policy = commit_policy or CommitPolicy()
+        self._producer_lock = threading.Lock()
         while not self.kafka_host:
             self._init_kafka_host()
         self._init_consumer(group_id, enable_auto_commit)
@@ -66,12 +155,14 @@ class KafkaWrapper:
         self.kafka_host = host+':'+KAFKA_PORT
 
     def _init_consumer(self, group_id, enable_auto_commit):
-        self.consumer = KafkaConsumer(self.topic, group_id=group_id,
+        self.consumer = KafkaConsumer(group_id=group_id,
                                       bootstrap_servers=[self.kafka_host],
                                       enable_auto_commit=enable_auto_commit,
                                       heartbeat_interval_ms=KAFKA_HEARTBEAT,
                                       session_timeout_ms=KAFKA_SESSION_TIMEOUT,
                                       value_deserializer=lambda m: json.loads(m.decode('utf-8')))
+        if self.topic:
+            self.consumer.subscribe([self.topic], listener=_FlushOnRebalance(self))
 
     def _init_producer(self, retry=True):
         if self.producer:
@@ -94,15 +185,52 @@ class KafkaWrapper:
                 time.sleep(5)
 
     def produce(self, event):
-        try:
-            self._produce(self.topic, event)
+        # Events can be produced from multiple worker threads, but only one of
+        # them should ever restart the producer.
+        with self._producer_lock:
+            try:
+                self._produce(self.topic, event)
+                return
+            except KafkaTimeoutError:
+                # The networking may have changed, causing writing to hang.
+                LOGGER.warning('There was a timeout while writing to Kafka.'
+                               'Restarting the kafka producer and retrying...')
+                self._init_producer()
+                self._produce(self.topic, event)
+
+    def commit(self, offsets=None):
+        """
+        Requests a commit of the given offsets, a mapping of TopicPartition to the
+        offset of the next message to be consumed.  The commit is sent once the
+        commit policy allows it, so this should also be called periodically with
+        no offsets.  Must be called from the consumer thread.
+        """
+        self.commit_policy.add(offsets)
+        if self.commit_policy.due():
+            self.flush_commits()
+
+    def flush_commits(self):
+        """Immediately commits any offsets the commit policy is holding back"""
+        offsets = self.commit_policy.pending()
+        assigned = self.consumer.assignment()
+        # Offsets can no longer be committed for partitions lost in a rebalance
+        self.commit_policy.forget([partition for partition in offsets if partition not in assigned])
+        offsets = {partition: offset for partition, offset in offsets.items()
+                   if partition in assigned}
+        if not offsets:
             return
-        except KafkaTimeoutError:
-            # The networking may have changed, causing writing to hang.
-            LOGGER.warning('There was a timeout while writing to Kafka.'
-                           'Restarting the kafka producer and retrying...')
-            self._init_producer()
-            self._produce(self.topic, event)
+        self.consumer.commit({partition: OffsetAndMetadata(offset, '')
+                              for partition, offset in offsets.items()})
+        self.commit_policy.committed(offsets)
+        LOGGER.debug('Committed offsets %s; %d commits requested, %d saved by batching',
+                     offsets, self.commit_policy.requested, self.commit_policy.saved)
+
+    def close(self):
+        """Commits any outstanding offsets and closes the consumer"""
+        try:
+            self.flush_commits()
+        finally:
+            self.consumer.close(autocommit=False)
 
     def _produce(self, topic, data):
         self.producer.send(topic, data)
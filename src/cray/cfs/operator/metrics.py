@@ -0,0 +1,203 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Prometheus metrics for the CFS operator.
+
+Histograms and counters are updated where the work is done.  Values that the
+operator already tracks, such as queue depths and cache sizes, are read from
+the components that own them each time the metrics are scraped.
+"""
+import logging
+import re
+from urllib.parse import urlsplit
+
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY, start_http_server
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+LOGGER = logging.getLogger('cray.cfs.operator.metrics')
+
+DEFAULT_PORT = 9090
+_VERSION_SEGMENT = re.compile(r'v\d+$')
+
+EVENT_SECONDS = Histogram(
+    'cfs_operator_event_duration_seconds',
+    'Time spent handling a CFS session event, by event type',
+    ['type'])
+EVENT_RETRIES = Counter(
+    'cfs_operator_event_retries',
+    'CFS session events that failed, by whether they were retried or dropped',
+    ['type', 'result'])
+KAFKA_LAG = Gauge(
+    'cfs_operator_kafka_consumer_lag',
+    'Messages on a cfs-session-events partition not yet read by the operator',
+    ['partition'])
+HTTP_SECONDS = Histogram(
+    'cfs_operator_http_request_duration_seconds',
+    'Duration of HTTP requests to CFS and IMS, until the response headers were read',
+    ['service', 'method', 'endpoint'])
+K8S_SECONDS = Histogram(
+    'cfs_operator_k8s_request_duration_seconds',
+    'Duration of Kubernetes API requests, by operation',
+    ['operation'])
+SESSION_START_SECONDS = Histogram(
+    'cfs_operator_session_start_seconds',
+    'Time from a CFS session being created until its job started',
+    buckets=(1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600, 1800, 3600, float('inf')))
+
+
+def observe_http_response(response, *args, **kwargs):
+    """A requests response hook that records the duration of the request"""
+    try:
+        url = urlsplit(response.request.url)
+        HTTP_SECONDS.labels(url.hostname, response.request.method,
+                            http_endpoint(url.path)).observe(response.elapsed.total_seconds())
+    except Exception as e:
+        LOGGER.debug('Unable to record HTTP request metrics: %s', e)
+
+
+def http_endpoint(path):
+    """
+    Returns the path with resource ids replaced, so that requests for different
+    sessions or jobs are counted together.
+    """
+    parts = [part for part in path.split('/') if part]
+    keep = 2 if parts and _VERSION_SEGMENT.match(parts[0]) else 1
+    return '/' + '/'.join(parts[:keep] + ['{id}'] * (len(parts) - keep))
+
+
+class OperatorCollector:
+    """Reads the internal state of a CFSSessionController at scrape time"""
+
+    def __init__(self, controller, caches=()):
+        self.controller = controller
+        self.caches = caches
+
+    def collect(self):
+        yield from self._collect_lanes()
+        yield from self._collect_monitor()
+        yield from self._collect_submitter()
+        yield from self._collect_status_writer()
+        yield from self._collect_commits()
+        yield from self._collect_caches()
+
+    def _collect_lanes(self):
+        queued = GaugeMetricFamily('cfs_operator_event_lane_queued',
+                                   'Events waiting for a worker, by lane', labels=['lane'])
+        running = GaugeMetricFamily('cfs_operator_event_lane_running',
+                                    'Events being handled, by lane', labels=['lane'])
+        completed = CounterMetricFamily('cfs_operator_event_lane_completed',
+                                        'Events handled, by lane', labels=['lane'])
+        waited = CounterMetricFamily('cfs_operator_event_lane_wait_seconds',
+                                     'Total time events waited for a worker, by lane',
+                                     labels=['lane'])
+        latency = CounterMetricFamily('cfs_operator_event_lane_latency_seconds',
+                                      'Total time from events being queued until they were '
+                                      'handled, by lane', labels=['lane'])
+        for lane, stats in self.controller.event_workers.stats().items():
+            queued.add_metric([lane], stats['queued'])
+            running.add_metric([lane], stats['running'])
+            completed.add_metric([lane], stats['completed'])
+            waited.add_metric([lane], stats['wait_seconds'])
+            latency.add_metric([lane], stats['latency_seconds'])
+        return [queued, running, completed, waited, latency]
+
+    def _collect_monitor(self):
+        monitor = self.controller.job_monitor
+        metrics = [GaugeMetricFamily('cfs_operator_monitored_sessions',
+                                     'Sessions whose jobs are being monitored',
+                                     value=len(monitor.sessions))]
+        stats = monitor.informer.stats()
+        metrics.append(GaugeMetricFamily('cfs_operator_job_informer_jobs',
+                                         'CFS jobs in the job informer cache',
+                                         value=stats['cache_size']))
+        if stats['relist_age_seconds'] is not None:
+            metrics.append(GaugeMetricFamily('cfs_operator_job_informer_sync_age_seconds',
+                                             'Time since the job informer last relisted jobs',
+                                             value=stats['relist_age_seconds']))
+        return metrics
+
+    def _collect_submitter(self):
+        stats = self.controller.job_submitter.stats()
+        return [
+            GaugeMetricFamily('cfs_operator_job_requests_in_flight',
+                              'Kubernetes job requests being sent', value=stats['in_flight']),
+            GaugeMetricFamily('cfs_operator_job_requests_limit',
+                              'Current limit on Kubernetes job requests in flight',
+                              value=stats['limit']),
+            CounterMetricFamily('cfs_operator_job_requests_throttled',
+                                'Kubernetes job requests throttled with a 429 response',
+                                value=stats['throttled']),
+        ]
+
+    def _collect_status_writer(self):
+        stats = self.controller.status_writer.stats()
+        return [
+            GaugeMetricFamily('cfs_operator_status_updates_pending',
+                              'Sessions with status updates not yet sent', value=stats['pending']),
+            CounterMetricFamily('cfs_operator_status_updates',
+                                'Session status updates made', value=stats['updates']),
+            CounterMetricFamily('cfs_operator_status_patches',
+                                'Session status PATCH requests sent', value=stats['patches']),
+            CounterMetricFamily('cfs_operator_status_updates_dropped',
+                                'Session status updates that could not be sent',
+                                value=stats['dropped']),
+        ]
+
+    def _collect_commits(self):
+        stats = self.controller.commit_stats()
+        return [
+            CounterMetricFamily('cfs_operator_kafka_commits_requested',
+                                'Kafka offset commits requested after handling events',
+                                value=stats['requested']),
+            CounterMetricFamily('cfs_operator_kafka_commits_sent',
+                                'Kafka offset commits sent to the broker', value=stats['sent']),
+            CounterMetricFamily('cfs_operator_kafka_commits_saved',
+                                'Kafka offset commits coalesced into a later commit',
+                                value=stats['saved']),
+        ]
+
+    def _collect_caches(self):
+        size = GaugeMetricFamily('cfs_operator_cache_entries', 'Entries in a cache',
+                                 labels=['cache'])
+        hits = CounterMetricFamily('cfs_operator_cache_hits', 'Cache hits', labels=['cache'])
+        misses = CounterMetricFamily('cfs_operator_cache_misses', 'Cache misses',
+                                     labels=['cache'])
+        for cache in self.caches:
+            stats = cache.stats()
+            size.add_metric([cache.name], stats['size'])
+            hits.add_metric([cache.name], stats['hits'])
+            misses.add_metric([cache.name], stats['misses'])
+        return [size, hits, misses]
+
+
+def start(controller, port=DEFAULT_PORT, session_factories=(), caches=(), registry=REGISTRY):
+    """
+    Starts serving metrics over HTTP, and records the duration of the requests
+    made by the given session factories.
+    """
+    registry.register(OperatorCollector(controller, caches=caches))
+    for factory in session_factories:
+        factory.add_response_hook(observe_http_response)
+    start_http_server(port, registry=registry)
+    LOGGER.info('Serving metrics on port %d', port)
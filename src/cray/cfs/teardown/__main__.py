@@ -52,11 +52,9 @@ same status as AEE.
 
 This module is only used for image customization.
 """
-from datetime import datetime
-import json
+from concurrent.futures import as_completed, Future, ThreadPoolExecutor
 from json.decoder import JSONDecodeError
 import logging
-from multiprocessing import Process, Queue
 import os
 from pkg_resources import get_distribution
 import sys
@@ -69,12 +67,16 @@ from redis import StrictRedis
 import requests
 import yaml
 
-from cray.cfs.inventory.image import get_IMS_API
+from cray.cfs.inventory.image import get_IMS_API, IMAGE_SETUP_CONCURRENCY
 from cray.cfs.logging import setup_logging, update_logging
 import cray.cfs.operator.cfs.sessions as cfs_sessions
 from cray.cfs.utils import wait_for_aee_finish
+from cray.cfs.utils.job_poller import chain, IMSJobPoller
+from cray.cfs.utils.tracing import get_tracer
 
 LOGGER = logging.getLogger('cray.cfs.teardown')
+TRACER = get_tracer('cfs-teardown')
+SSH_KEY_FILE = '/inventory/ssh/id_image'
 
 # Paramiko/Cryptography so noisy
 warnings.filterwarnings(action='ignore', module='.*paramiko.*')
@@ -123,7 +125,37 @@ def _get_image_to_job() -> Mapping[str, str]:
     return image_to_job
 
 
-def _finish_the_job(job_id: str, cfs_name: str, completion_flag: str = "complete") -> None:
+def _ims_get(path: str):
+    """
+    Read from IMS, retrying until IMS responds, and return the parsed response.
+    A missing resource is not retried.
+    """
+    host, port, session = get_IMS_API()
+    attempt_count = 0
+    while True:
+        attempt_count += 1
+        try:
+            resp = session.get("http://{}:{}/{}".format(host, port, path))
+            if resp.status_code == 404:
+                break
+            resp.raise_for_status()
+        except requests.exceptions.RequestException as reqexception:
+            LOGGER.warning("Non-standard response from IMS: %s" % (reqexception))
+            quiesce = attempt_count * 2 + 1
+            LOGGER.warning("Attempt %s will proceed after %s second quiesce."
+                           % (attempt_count, quiesce))
+            time.sleep(quiesce)
+            continue
+        try:
+            return resp.json()
+        except JSONDecodeError:
+            LOGGER.error("Non-JSON response received from IMS: '%s'", resp.text)
+            raise
+    resp.raise_for_status()
+
+
+def _finish_the_job(job: dict, cfs_name: str, key: paramiko.PKey,
+                    completion_flag: str = "complete") -> None:
     """
     Tell IMS to finish the job by touching the /tmp/complete file in the jail.
 
@@ -131,26 +163,18 @@ def _finish_the_job(job_id: str, cfs_name: str, completion_flag: str = "complete
     ask IMS to close the jail door for us.
 
     Args:
-        job_id: The IMS job ID
+        job: The IMS job record
         cfs_name: name of the CFS Session
+        key: The private key for the SSH containers
 
     Returns:
         None
     """
-    LOGGER.info("Calling IMS to finish job=%s for cfsession=%s", job_id, cfs_name)
-    host, port, session = get_IMS_API()
-    resp = session.get("http://{}:{}/jobs/{}".format(host, port, job_id))
-    resp.raise_for_status()
-    try:
-        response = resp.json()
-    except JSONDecodeError:
-        LOGGER.error("Non-JSON response received from IMS: '%s'", response)
-        raise
-    for ssh_container in response['ssh_containers']:
+    LOGGER.info("Calling IMS to finish job=%s for cfsession=%s", job['id'], cfs_name)
+    for ssh_container in job['ssh_containers']:
         if ssh_container['name'] == cfs_name:
             ssh_host = ssh_container['connection_info']['cluster.local']['host']
             ssh_port = ssh_container['connection_info']['cluster.local']['port']
-            key = paramiko.ecdsakey.ECDSAKey.from_private_key_file('/inventory/ssh/id_image')
             pclient = paramiko.SSHClient()
             for x in range(20):
                 try:
@@ -170,106 +194,67 @@ def _finish_the_job(job_id: str, cfs_name: str, completion_flag: str = "complete
                 return
 
 
-def do_failed(image_id: str, job_id: str, cfs_name: str, queue) -> None:
+def _result_ready(job: dict) -> bool:
+    """ True once IMS has packaged the customized image, or has failed to """
+    return job['status'].lower() == 'error' or job.get('resultant_image_id') is not None
+
+
+def _get_result(image_id: str, job: dict) -> str:
+    """ Return the resultant image id of a finished IMS job """
+    if job['status'].lower() == 'error':
+        raise RuntimeError(
+            "IMS reported an error when packaging artifacts for job=%s. "
+            "Consult the IMS logs to determine the cause of failure. "
+            "IMS response: %s" % (job['id'], job)
+        )
+    LOGGER.info(
+        "Resultant image=%s from customization of image=%s", job['resultant_image_id'], image_id
+    )
+    return job['resultant_image_id']
+
+
+def do_failed(job_id: str, cfs_name: str, key: paramiko.PKey, poller: IMSJobPoller,
+              executor: ThreadPoolExecutor) -> Future:
     """
     Handle the IMS ssh jails that ended up failing Ansible configuration.
-    If a failure is encountered, send the failure to the queue for handling
-    by the parent process.
 
     Args:
-        image_id: The IMS image id
         job_id: The IMS job ID
         cfs_name: name of the CFS Session
-        queue: queue.Queue
+        key: The private key for the SSH containers
+        poller: Reads the IMS job
+        executor: Runs the SSH connection to the jail
 
     Returns:
-        None
+        A Future that is done once the job has been told to finish
     """
-    try:
-        _finish_the_job(job_id, cfs_name, completion_flag="failed")
-    except Exception as err:
-        queue.put(
-            ('error', image_id, job_id, err)
-        )
+    return chain(poller.watch(job_id, lambda job: True),
+                 lambda job: executor.submit(_finish_the_job, job, cfs_name, key, "failed"))
 
-    queue.put(('complete', image_id, job_id, None))
 
-
-def do_success(image_id: str, job_id: str, cfs_name: str, cfs_namespace: str, queue) -> None:
+def do_success(job_id: str, cfs_name: str, key: paramiko.PKey, poller: IMSJobPoller,
+               executor: ThreadPoolExecutor) -> Future:
     """
     Handle the IMS ssh jails that succeeded in Ansible configuration. Finish the
-    IMS job and get the new image id that resulted.
-
-    If a failure is encountered, send the failure to the queue for handling
-    by the parent process.
+    IMS job and wait for IMS to package the new image.
 
     Args:
-        image_id: The IMS image id
         job_id: The IMS job ID
         cfs_name: name of the CFS Session
-        cfs_namespace: the namespace that CFS CRDs are a part of
-        queue: queue.Queue
+        key: The private key for the SSH containers
+        poller: Reads the IMS job
+        executor: Runs the SSH connection to the jail
 
     Returns:
-        None
+        A Future for the IMS job record once it has a resultant image or an error
     """
-    try:
-        _finish_the_job(job_id, cfs_name)
-    except Exception as err:
-        queue.put(
-            ('error', image_id, job_id, err)
-        )
+    finished = chain(poller.watch(job_id, lambda job: True),
+                     lambda job: executor.submit(_finish_the_job, job, cfs_name, key))
 
-    # Wait for the resultant image id
-    host, port, session = get_IMS_API()
-    resultant_image_id = None
-    start_time = datetime.now()
-    attempt_count = 0
-    while True:
-        attempt_count += 1
-        try:
-            resp = session.get("http://{}:{}/jobs/{}".format(host, port, job_id))
-            resp.raise_for_status()
-        except requests.exceptions.RequestException as reqexception:
-            LOGGER.warning("Non-standard response from IMS: %s" % (reqexception))
-            quiesce = attempt_count * 2 + 1
-            LOGGER.warning("Attempt %s will proceed after %s second quiesce."
-                           % (attempt_count, quiesce))
-            time.sleep(quiesce)
-            continue
-        try:
-            response = json.loads(resp.text)
-        except JSONDecodeError as jde:
-            LOGGER.error("Non-JSON response from IMS: '%s'; requerying...", resp.text)
-            LOGGER.error(jde)
-            queue.put(('error', image_id, job_id, jde))
-            break
-
-        LOGGER.info(
-            "Waiting for resultant image of job=%s; IMS status=%s; elapsed time=%ss",
-            job_id, response['status'], (datetime.now() - start_time).seconds
-        )
-
-        if response['status'].lower() == 'error':
-            err = RuntimeError(
-                "IMS reported an error when packaging artifacts for job=%s."
-                "Consult the IMS logs to determine the cause of failure."
-                "IMS response: %s", job_id, response
-            )
-            queue.put(('error', image_id, job_id, err))
-            break
-
-        resultant_image_id = response['resultant_image_id']
-        if resultant_image_id is not None:
-            LOGGER.info(
-                "Resultant image=%s from customization of image=%s", resultant_image_id, image_id
-            )
-            queue.put(('result', image_id, job_id, resultant_image_id))
-            break
-
-        time.sleep(5)
-
-    return
+    def wait_for_result(_):
+        LOGGER.info("Waiting for resultant image of job=%s", job_id)
+        return poller.watch(job_id, _result_ready)
+    return chain(finished, wait_for_result)
 
 
 def _update_cfs_with_result(cfs_name: str, image_id: str, result_image_id: str) -> None:
@@ -305,7 +290,8 @@ def main() -> None:  # noqa: C901
     version = get_distribution('cray-cfs').version
     LOGGER.info('Starting CFS IMS Teardown version=%s, namespace=%s', version, cfs_namespace)
     LOGGER.info("Waiting for `ansible` containers to finish.")
-    ansible_status = wait_for_aee_finish(cfs_name, cfs_namespace)
+    with TRACER.span('teardown.wait_for_ansible'):
+        ansible_status = wait_for_aee_finish(cfs_name, cfs_namespace)
     LOGGER.info("AEE container has exited with code=%s", ansible_status)
     teardown_success = True
 
@@ -329,58 +315,57 @@ def main() -> None:  # noqa: C901
 
     # Kick off processing tasks for the images ssh jails. Failed and successful
     # hosts/targets are handled separately.
-    pq = Queue()
-    all_image_ids = list()
-    processes = []
-    for image_name in failed:
-        if image_name not in image_to_job:
-            # This can happen if a host other than the image is referenced in
-            # the Ansible playbook
-            LOGGER.info("image_name %r could not be found in image_to_job", image_name)
-            continue
-        job_id = image_to_job[image_name]['job_id']
-        image_id = image_to_job[image_name]['image_id']
-        all_image_ids.append(image_id)
-        processes.append(
-            Process(
-                target=do_failed,
-                args=(image_id, job_id, cfs_name, pq)
-            )
-        )
-    for image_name in success:
-        if image_name not in image_to_job:
-            # This can happen if a host other than the image is referenced in
-            # the Ansible playbook
-            LOGGER.info("image_name %r could not be found in image_to_job", image_name)
-            continue
-        job_id = image_to_job[image_name]['job_id']
-        image_id = image_to_job[image_name]['image_id']
-        all_image_ids.append(image_id)
-        processes.append(
-            Process(
-                target=do_success,
-                args=(image_id, job_id, cfs_name, cfs_namespace, pq)
-            )
-        )
-
-    for p in processes:
-        p.start()
-
-    # As the jobs finish or error out, capture the queue messages and
-    # report as necessary
+    targets = []
+    for result, image_names in (('complete', failed), ('result', success)):
+        for image_name in image_names:
+            if image_name not in image_to_job:
+                # This can happen if a host other than the image is referenced in
+                # the Ansible playbook
+                LOGGER.info("image_name %r could not be found in image_to_job", image_name)
+                continue
+            targets.append((image_to_job[image_name]['image_id'],
+                            image_to_job[image_name]['job_id'], result))
+
+    # The status of all of the jobs is read with one IMS request per poll, and
+    # the jails are finished on a pool of threads sharing one IMS connection pool
+    poller = IMSJobPoller(get_jobs=lambda: _ims_get('jobs'),
+                          get_job=lambda job_id: _ims_get('jobs/' + job_id))
+    executor = ThreadPoolExecutor(max_workers=IMAGE_SETUP_CONCURRENCY,
+                                  thread_name_prefix='teardown')
+    teardown_started = time.time_ns()
+
+    # As the jobs finish or error out, capture the results and report as
+    # necessary
     try:
-        while all_image_ids:
-            LOGGER.debug("all_image_ids=%s", all_image_ids)
-            result, image_id, job_id, response = pq.get()
+        key = paramiko.ecdsakey.ECDSAKey.from_private_key_file(SSH_KEY_FILE)
+        futures = {}
+        for image_id, job_id, result in targets:
+            handler = do_failed if result == 'complete' else do_success
+            futures[handler(job_id, cfs_name, key, poller, executor)] = \
+                (image_id, job_id, result)
+
+        for future in as_completed(futures):
+            image_id, job_id, result = futures[future]
+            response = None
+            try:
+                job = future.result()
+                if result == 'result':
+                    response = _get_result(image_id, job)
+            except Exception as err:
+                result, response = 'error', err
             LOGGER.debug(
                 "Received %r event from image=%s job=%s", result, image_id, job_id
             )
+            TRACER.record('teardown.image', teardown_started, time.time_ns(),
+                          parent=TRACER.current,
+                          attributes={'image_id': image_id, 'job_id': job_id, 'result': result},
+                          error=response if result == 'error' else None)
 
             # An error occurred when attempting to complete the job
             if result == 'error':
                 teardown_success = False
                 LOGGER.error(
-                    "Failed to teardown image customization of image=%s"
+                    "Failed to teardown image customization of image=%s "
                     "in job=%s. Error was %r", image_id, job_id, response
                 )
 
@@ -391,7 +376,6 @@ def main() -> None:  # noqa: C901
                     "Completed teardown of image customization after failed Ansible run for "
                     "image=%s, job=%s", image_id, job_id
                 )
-                pass
             # Update the CFS Session with the resultant image after successful
             # Ansible run and teardown for this image
             else:
@@ -401,15 +385,9 @@ def main() -> None:  # noqa: C901
                     teardown_success = False
                     LOGGER.error(
                         "Unable to update cfsession=%s with image=%s, result=%s. Error: %s",
-                        image_id, response, err
+                        cfs_name, image_id, response, err
                     )
 
-            all_image_ids.remove(image_id)
-            LOGGER.debug(
-                "Removing image=%s from processing queue. Remaining: %s",
-                image_id, all_image_ids
-            )
-
     except Exception as err:
         teardown_success = False
         LOGGER.error(
@@ -419,8 +397,8 @@ def main() -> None:  # noqa: C901
         )
 
     finally:
-        for p in processes:
-            p.terminate()
+        executor.shutdown(wait=False)
+        poller.stop()
 
     # Exit with the same status as the AEE container, or exit 1 if
     # something in the teardown failed.
@@ -433,4 +411,5 @@ def main() -> None:  # noqa: C901
 if __name__ == '__main__':
     setup_logging()
     update_logging(update_options=True)
-    main()
+    with TRACER.span('teardown'):
+        main()
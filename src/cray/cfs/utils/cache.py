@@ -0,0 +1,152 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+A small thread-safe cache for values read from other services.
+"""
+from collections import OrderedDict
+import logging
+import threading
+import time
+
+LOGGER = logging.getLogger(__name__)
+
+
+class CacheEntry:
+    """A cached value.  A ttl given here overrides the cache's default."""
+
+    def __init__(self, value, etag=None, ttl=None):
+        self.value = value
+        self.etag = etag
+        self.ttl = ttl
+        self.expires = None
+
+
+class _Flight:
+    """A load in progress, which other callers for the same key wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.entry = None
+        self.error = None
+        # Set if the key is invalidated while loading, so the result is not stored
+        self.stale = False
+
+
+class TTLCache:
+    """
+    A bounded least-recently-used cache whose entries expire after ttl seconds.
+
+    Values are read with get(key, load).  load(key, entry) is called on a miss
+    with the expired entry, if there is one, so that it can revalidate it with
+    a conditional request.  It returns a CacheEntry, or the entry it was given
+    if the value has not changed.  Concurrent misses for the same key share a
+    single call to load.  If the key is invalidated while it is being loaded,
+    the result is discarded and the key is loaded again.
+    """
+
+    def __init__(self, maxsize=128, ttl=60, name='cache'):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._flights = {}
+
+    def get(self, key, load):
+        """Returns the value for key, loading it if it is missing or expired"""
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and time.monotonic() < entry.expires:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.value
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    self.misses += 1
+                    flight = self._flights[key] = _Flight()
+                else:
+                    # Waiting on another caller's load counts as a hit
+                    self.hits += 1
+            if leader:
+                self._load(key, load, entry, flight)
+            else:
+                flight.done.wait()
+                if flight.error is not None:
+                    raise flight.error
+            if not flight.stale:
+                return flight.entry.value
+
+    def refresh(self, key, load):
+        """
+        Loads key again before its entry expires.  Does nothing if the key is
+        already being loaded.
+        """
+        with self._lock:
+            if key in self._flights:
+                return
+            entry = self._entries.get(key)
+            flight = self._flights[key] = _Flight()
+        self._load(key, load, entry, flight)
+
+    def invalidate(self, key=None):
+        """Removes key from the cache, or every entry if no key is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                flights = self._flights.values()
+            else:
+                self._entries.pop(key, None)
+                flights = [self._flights[key]] if key in self._flights else []
+            for flight in flights:
+                flight.stale = True
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+    def _load(self, key, load, entry, flight):
+        try:
+            new_entry = load(key, entry)
+            flight.entry = new_entry
+            ttl = self.ttl if new_entry.ttl is None else new_entry.ttl
+            new_entry.expires = time.monotonic() + ttl
+            with self._lock:
+                if flight.stale:
+                    return new_entry
+                self._entries[key] = new_entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            return new_entry
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
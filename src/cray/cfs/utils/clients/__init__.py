@@ -1,7 +1,7 @@
 #
 # MIT License
 #
-# (C) Copyright 2023-2024 Hewlett Packard Enterprise Development LP
+# (C) Copyright 2023-2024, 2026 Hewlett Packard Enterprise Development LP
 #
 # Permission is hereby granted, free of charge, to any person obtaining a
 # copy of this software and associated documentation files (the "Software"),
@@ -21,12 +21,81 @@
 # ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 # OTHER DEALINGS IN THE SOFTWARE.
 #
-from functools import partial
 import logging
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
 from requests_retry_session import requests_retry_session as base_requests_retry_session
 
 PROTOCOL = 'http'
+POOL_CONNECTIONS = int(os.environ.get('CFS_HTTP_POOL_CONNECTIONS', 10))
+POOL_MAXSIZE = int(os.environ.get('CFS_HTTP_POOL_MAXSIZE', 20))
 
 LOGGER = logging.getLogger(__name__)
 
-requests_retry_session = partial(base_requests_retry_session, protocol=PROTOCOL)
+
+class PooledSessionFactory:
+    """
+    Returns requests sessions that share a single pooled connection adapter, so
+    that connections are kept alive and reused across calls and threads.
+
+    The adapter carries the same retry and timeout configuration as
+    requests_retry_session.  requests.Session itself is not thread safe, so each
+    thread is given its own session, all mounted on the shared adapter.  The
+    pool is rebuilt after a fork so that processes never share a socket.
+
+    Response hooks added with add_response_hook are called for the responses
+    of every session, including sessions that were created earlier.
+
+    If retries, a urllib3 Retry, is given, the adapter uses it instead of the
+    requests_retry_session configuration.
+    """
+
+    def __init__(self, protocol=PROTOCOL, pool_connections=POOL_CONNECTIONS,
+                 pool_maxsize=POOL_MAXSIZE, retries=None):
+        self.protocol = protocol
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.retries = retries
+        self._lock = threading.Lock()
+        self._adapter = None
+        self._pid = None
+        self._local = threading.local()
+        self._response_hooks = []
+
+    def add_response_hook(self, hook):
+        self._response_hooks.append(hook)
+
+    def __call__(self):
+        adapter = self._get_adapter()
+        session = getattr(self._local, 'session', None)
+        if session is None or getattr(self._local, 'adapter', None) is not adapter:
+            session = requests.Session()
+            session.mount(self.protocol + '://', adapter)
+            session.hooks['response'].append(self._on_response)
+            self._local.session = session
+            self._local.adapter = adapter
+        return session
+
+    def _on_response(self, response, *args, **kwargs):
+        for hook in self._response_hooks:
+            hook(response, *args, **kwargs)
+
+    def _get_adapter(self):
+        with self._lock:
+            if self._adapter is None or self._pid != os.getpid():
+                prefix = self.protocol + '://'
+                if self.retries is not None:
+                    adapter = HTTPAdapter(max_retries=self.retries)
+                else:
+                    adapter = base_requests_retry_session(
+                        protocol=self.protocol).get_adapter(prefix)
+                adapter.init_poolmanager(self.pool_connections, self.pool_maxsize)
+                self._adapter = adapter
+                self._pid = os.getpid()
+            return self._adapter
+
+
+requests_retry_session = PooledSessionFactory(PROTOCOL)
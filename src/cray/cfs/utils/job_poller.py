@@ -0,0 +1,271 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Waits on the status of many IMS jobs with a single periodic poll.
+"""
+from concurrent.futures import Future, TimeoutError
+import logging
+import threading
+import time
+
+import requests
+
+LOGGER = logging.getLogger(__name__)
+
+MIN_INTERVAL = 1  # seconds
+MAX_INTERVAL = 10  # seconds
+BACKOFF = 1.5
+# Up to this many watched jobs are read one at a time rather than by listing
+# every job IMS has
+LIST_THRESHOLD = 10
+
+
+class IMSJobNotFound(Exception):
+    """A watched IMS job is no longer known to IMS"""
+
+
+class IMSJobPoller:
+    """
+    Watches IMS jobs until each reaches a state that its caller is waiting for.
+
+    Every watched job is checked by one background poll.  get_jobs() returns
+    a list of all IMS jobs, and get_job(job_id), if given, returns one job, or
+    None if IMS does not have it.  IMS keeps every job until it is deleted, so
+    the size of the list grows with the history of IMS rather than with the
+    jobs watched.  While no more than list_threshold jobs are watched, they
+    are read one at a time with get_job instead, and the list is only read
+    when a single request is cheaper than that many.
+
+    The poll interval starts at min_interval, and grows by backoff up to
+    max_interval for as long as no watched job changes status.  Any change, or
+    a new watch, polls again after min_interval.
+
+    A poll that fails with a transient error, such as a connection error or a
+    5xx response, is retried at the next interval, and the interval backs off
+    as if nothing changed.  A watch only fails if its job is missing, if its
+    timeout passes, or if IMS returns any other error for it.
+    """
+
+    def __init__(self, get_jobs, get_job=None, min_interval=MIN_INTERVAL,
+                 max_interval=MAX_INTERVAL, backoff=BACKOFF, list_threshold=LIST_THRESHOLD,
+                 name='ims_job_poller'):
+        self.get_jobs = get_jobs
+        self.get_job = get_job
+        self.list_threshold = list_threshold
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.name = name
+        self.polls = 0
+        self._condition = threading.Condition()
+        self._watches = {}
+        self._statuses = {}
+        self._interval = min_interval
+        self._thread = None
+        self._stopped = False
+
+    def watch(self, job_id, settled, timeout=None):
+        """
+        Returns a Future for the IMS job record, which is set by the first poll
+        for which settled(job) is true.  The Future fails if the job cannot be
+        read, or with TimeoutError if it has not settled within timeout seconds.
+        """
+        future = Future()
+        deadline = time.monotonic() + timeout if timeout else None
+        with self._condition:
+            self._watches.setdefault(job_id, []).append((settled, future, deadline))
+            self._interval = self.min_interval
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+        return future
+
+    def stop(self):
+        """Stops polling.  Jobs that are still watched are left unresolved."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._watches and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                job_ids = list(self._watches)
+            changed = False
+            try:
+                jobs, errors = self._poll(job_ids)
+            except Exception as e:
+                if not is_transient(e):
+                    LOGGER.warning('Unable to read the status of %d IMS jobs: %s',
+                                   len(job_ids), e)
+                    self._fail(job_ids, e)
+                    continue
+                LOGGER.warning('Unable to read the status of %d IMS jobs; retrying: %s',
+                               len(job_ids), e)
+            else:
+                for job_id, error in errors.items():
+                    LOGGER.warning('Unable to read the status of IMS job=%s: %s', job_id, error)
+                    self._fail([job_id], error)
+                changed = self._resolve([job_id for job_id in job_ids if job_id not in errors],
+                                        jobs)
+            self._expire()
+            with self._condition:
+                self._condition.wait(timeout=self._next_interval(changed))
+
+    def _next_interval(self, changed):
+        """Returns the time to wait before the next poll.  Callers must hold _condition."""
+        interval = self.min_interval if changed else self._interval
+        self._interval = min(self.max_interval, interval * self.backoff)
+        return interval
+
+    def _poll(self, job_ids):
+        """
+        Returns the current records for job_ids, by job id, leaving out jobs
+        that IMS does not have, and the errors for jobs that could not be read.
+        Raises the error if a transient error prevents reading any of them.
+        """
+        self.polls += 1
+        if self.get_job is None or len(job_ids) > self.list_threshold:
+            wanted = set(job_ids)
+            return {job['id']: job for job in self.get_jobs() if job.get('id') in wanted}, {}
+        jobs = {}
+        errors = {}
+        for job_id in job_ids:
+            try:
+                job = self.get_job(job_id)
+            except Exception as e:
+                if is_transient(e):
+                    raise
+                errors[job_id] = e
+                continue
+            if job is not None:
+                jobs[job_id] = job
+        return jobs, errors
+
+    def _resolve(self, job_ids, jobs):
+        """Completes the watches that have settled, returning True if any job changed status"""
+        changed = False
+        resolved = []
+        with self._condition:
+            for job_id in job_ids:
+                job = jobs.get(job_id)
+                if job is None:
+                    resolved.append((self._watches.pop(job_id, []), None,
+                                     IMSJobNotFound('IMS job %s was not found' % job_id)))
+                    continue
+                status = job.get('status')
+                if self._statuses.get(job_id) != status:
+                    LOGGER.info('IMS job=%s status=%s', job_id, status)
+                    self._statuses[job_id] = status
+                    changed = True
+                waiting = []
+                for watch in self._watches.get(job_id, []):
+                    if watch[0](job):
+                        resolved.append(([watch], job, None))
+                    else:
+                        waiting.append(watch)
+                if waiting:
+                    self._watches[job_id] = waiting
+                else:
+                    self._watches.pop(job_id, None)
+                    self._statuses.pop(job_id, None)
+        # Futures run their callbacks when set, so they are set without the lock
+        for watches, job, error in resolved:
+            for _, future, _ in watches:
+                if error is None:
+                    future.set_result(job)
+                else:
+                    future.set_exception(error)
+        return changed
+
+    def _fail(self, job_ids, error):
+        with self._condition:
+            watches = [self._watches.pop(job_id, []) for job_id in job_ids]
+            for job_id in job_ids:
+                self._statuses.pop(job_id, None)
+        for watch in watches:
+            for _, future, _ in watch:
+                future.set_exception(error)
+
+    def _expire(self):
+        """Fails the watches whose timeout has passed"""
+        now = time.monotonic()
+        expired = []
+        with self._condition:
+            for job_id in list(self._watches):
+                waiting = []
+                for watch in self._watches[job_id]:
+                    if watch[2] is not None and watch[2] <= now:
+                        expired.append((job_id, watch[1]))
+                    else:
+                        waiting.append(watch)
+                if waiting:
+                    self._watches[job_id] = waiting
+                else:
+                    del self._watches[job_id]
+                    self._statuses.pop(job_id, None)
+        for job_id, future in expired:
+            future.set_exception(TimeoutError('IMS job %s did not settle in time' % job_id))
+
+
+def is_transient(error):
+    """
+    Returns True if error, or the error it was raised from, is a connection
+    error or a 5xx response, which a later request may not get
+    """
+    while error is not None:
+        if isinstance(error, requests.exceptions.RequestException):
+            status_code = getattr(error.response, 'status_code', None)
+            return status_code is None or status_code >= 500
+        error = error.__cause__
+    return False
+
+
+def chain(future, then):
+    """
+    Returns a Future for the result of the Future returned by then(result),
+    called once future has succeeded.
+    """
+    chained = Future()
+
+    def next_step(_):
+        try:
+            following = then(future.result())
+        except Exception as e:
+            chained.set_exception(e)
+            return
+        following.add_done_callback(lambda f: _copy_result(f, chained))
+    future.add_done_callback(next_step)
+    return chained
+
+
+def _copy_result(source, target):
+    if source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
@@ -0,0 +1,151 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Incremental decoding of large paged JSON responses.
+
+The CFS list APIs return a single object holding one large array, such as
+{"sessions": [...], "next": {...}}.  iter_json_array yields the array items
+one at a time as the body is read, so a page never has to be held in memory
+as bytes, text and decoded objects all at once.
+"""
+import codecs
+import json
+
+StreamDecodeError = json.JSONDecodeError
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+class _Reader:
+    """A text buffer over an iterable of byte chunks"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.exhausted = False
+
+    def fill(self):
+        """Reads another chunk, returning False at the end of the body"""
+        if self.exhausted:
+            return False
+        for chunk in self._chunks:
+            if chunk:
+                self.buffer = self.buffer[self.pos:] + self._decoder.decode(chunk)
+                self.pos = 0
+                return True
+        self.buffer = self.buffer[self.pos:] + self._decoder.decode(b'', final=True)
+        self.pos = 0
+        self.exhausted = True
+        return False
+
+    def peek(self):
+        """Returns the next non-whitespace character without consuming it"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                raise json.JSONDecodeError('Unexpected end of data', self.buffer, self.pos)
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise json.JSONDecodeError('Expecting {!r}'.format(char), self.buffer, self.pos)
+        self.pos += 1
+
+    def value(self):
+        """Decodes the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # A number could continue into the next chunk
+            if end == len(self.buffer) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(chunks, key, other=None):
+    """
+    Yields the items of the array stored under key in a top level JSON object,
+    reading the body from an iterable of byte chunks.
+
+    Any other members of the object are decoded whole and stored in the other
+    dict, if one is given.  Members after the array are only available once
+    the iteration is complete.
+    """
+    reader = _Reader(chunks)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        name = reader.value()
+        reader.expect(':')
+        if name == key and reader.peek() == '[':
+            reader.expect('[')
+            if reader.peek() == ']':
+                reader.pos += 1
+            else:
+                while True:
+                    yield reader.value()
+                    if reader.peek() == ']':
+                        reader.pos += 1
+                        break
+                    reader.expect(',')
+        else:
+            value = reader.value()
+            if other is not None:
+                other[name] = value
+        if reader.peek() == '}':
+            return
+        reader.expect(',')
+
+
+def project(data, fields):
+    """
+    Returns a copy of data holding only the given fields.  Nested fields are
+    named with dots, such as 'status.session.job'.  Missing fields are left out.
+    """
+    result = {}
+    for field in fields:
+        source = data
+        path = field.split('.')
+        for part in path:
+            if not isinstance(source, dict) or part not in source:
+                break
+            source = source[part]
+        else:
+            target = result
+            for part in path[:-1]:
+                target = target.setdefault(part, {})
+            target[path[-1]] = source
+    return result
@@ -0,0 +1,359 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+cray.cfs.utils.tracing - span based tracing of the CFS session lifecycle
+
+The operator starts a trace when it creates the job for a session and passes
+the trace context to every container in the job with the W3C TRACEPARENT env
+var and to the job itself with an annotation.  The clone, inventory and
+teardown entry points add their spans to that trace, and the operator records
+the session and pod phases once the job completes, so a slow session can be
+broken down phase by phase.
+
+Spans are exported according to CFS_TRACE_EXPORTER:
+  file - one JSON span per line to CFS_TRACE_FILE ('-' for stderr)
+  otlp - batched to an OTLP/HTTP collector at CFS_TRACE_OTLP_ENDPOINT
+Tracing is disabled when it is not set.
+"""
+import atexit
+from collections import namedtuple
+from contextlib import contextmanager
+import json
+import logging
+import os
+import secrets
+import sys
+import threading
+import time
+
+import requests
+
+LOGGER = logging.getLogger('cray.cfs.utils.tracing')
+
+TRACEPARENT = 'TRACEPARENT'
+TRACEPARENT_ANNOTATION = 'cfs.hpe.com/traceparent'
+EXPORTER_ENV = 'CFS_TRACE_EXPORTER'
+FILE_ENV = 'CFS_TRACE_FILE'
+OTLP_ENDPOINT_ENV = 'CFS_TRACE_OTLP_ENDPOINT'
+# The env vars that configure tracing, which are passed on to session jobs
+TRACE_ENVIRONMENT = (EXPORTER_ENV, FILE_ENV, OTLP_ENDPOINT_ENV)
+
+DEFAULT_FILE = '-'
+DEFAULT_OTLP_ENDPOINT = 'http://localhost:4318/v1/traces'
+OTLP_BATCH_SIZE = 100
+OTLP_INTERVAL = 5  # seconds
+OTLP_TIMEOUT = 5  # seconds
+OTLP_MAX_QUEUED = 10000  # spans
+
+
+class SpanContext(namedtuple('SpanContext', ['trace_id', 'span_id'])):
+    """The ids that identify a span, and that link child spans to it"""
+
+    @classmethod
+    def new(cls, trace_id=None):
+        """Returns a context for a new span, in a new trace unless trace_id is given"""
+        return cls(trace_id or secrets.token_hex(16), secrets.token_hex(8))
+
+    @property
+    def traceparent(self):
+        return '00-{}-{}-01'.format(self.trace_id, self.span_id)
+
+    @classmethod
+    def parse(cls, traceparent):
+        """Returns the context in a W3C traceparent value, or None if it is not valid"""
+        try:
+            _, trace_id, span_id, _ = traceparent.strip().split('-')
+            int(trace_id, 16)
+            int(span_id, 16)
+        except (AttributeError, ValueError):
+            return None
+        if len(trace_id) != 32 or len(span_id) != 16:
+            return None
+        return cls(trace_id.lower(), span_id.lower())
+
+
+class Span:
+    """A timed operation.  Spans are exported when they are ended."""
+
+    def __init__(self, tracer, name, context, parent_id=None, start_time=None,
+                 attributes=None):
+        self.tracer = tracer
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.start_time = start_time or time.time_ns()
+        self.end_time = None
+        self.attributes = dict(attributes or {})
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def end(self, end_time=None, error=None):
+        if self.end_time is not None:
+            return
+        self.end_time = end_time or time.time_ns()
+        if error is not None:
+            self.error = str(error) or type(error).__name__
+        self.tracer.exporter.export(self)
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.context.trace_id,
+            'spanId': self.context.span_id,
+            'name': self.name,
+            'kind': 1,  # SPAN_KIND_INTERNAL
+            'startTimeUnixNano': str(self.start_time),
+            'endTimeUnixNano': str(self.end_time),
+            'attributes': _otlp_attributes(self.attributes),
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+class Tracer:
+    """
+    Creates spans for one service.  Spans started with span() are nested under
+    the current span of the thread, or under the root context, which for the
+    in-job entry points is the context the operator passed in TRACEPARENT.
+    """
+
+    def __init__(self, service_name, exporter=None, root=None):
+        self.service_name = service_name
+        self.exporter = exporter or NullExporter()
+        self.root = root
+        self._local = threading.local()
+
+    @property
+    def enabled(self):
+        return self.exporter.enabled
+
+    @property
+    def current(self):
+        """Returns the context of the thread's current span, or the root context"""
+        stack = getattr(self._local, 'stack', None)
+        return stack[-1].context if stack else self.root
+
+    def start_span(self, name, parent=None, attributes=None, start_time=None, context=None):
+        """
+        Starts a span under the parent context.  A context can be given for
+        spans whose id was handed out before the span was recorded.
+        """
+        if context is None:
+            context = SpanContext.new(parent.trace_id if parent else None)
+        return Span(self, name, context, parent_id=parent.span_id if parent else None,
+                    start_time=start_time, attributes=attributes)
+
+    def record(self, name, start_time, end_time, parent=None, attributes=None, context=None,
+               error=None):
+        """Records a span that has already happened, with times in nanoseconds"""
+        span = self.start_span(name, parent=parent, attributes=attributes,
+                               start_time=start_time, context=context)
+        span.end(end_time=end_time, error=error)
+        return span
+
+    @contextmanager
+    def span(self, name, parent=None, attributes=None):
+        span = self.start_span(name, parent=parent or self.current, attributes=attributes)
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(span)
+        try:
+            yield span
+        except SystemExit as e:
+            if e.code:
+                span.error = 'exit code {}'.format(e.code)
+            raise
+        except BaseException as e:
+            span.error = str(e) or type(e).__name__
+            raise
+        finally:
+            stack.pop()
+            span.end()
+
+    def flush(self):
+        self.exporter.flush()
+
+
+class NullExporter:
+    """Drops every span"""
+    enabled = False
+
+    def export(self, span):
+        pass
+
+    def flush(self):
+        pass
+
+
+class FileExporter:
+    """Writes each span as a line of OTLP JSON"""
+    enabled = True
+
+    def __init__(self, path, service_name):
+        self.path = path
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        record = span.to_otlp()
+        record['service'] = self.service_name
+        line = json.dumps(record) + '\n'
+        with self._lock:
+            try:
+                if self.path == '-':
+                    sys.stderr.write(line)
+                else:
+                    with open(self.path, 'a') as f:
+                        f.write(line)
+            except OSError as e:
+                LOGGER.debug('Unable to write span %s: %s', span.name, e)
+
+    def flush(self):
+        pass
+
+
+class OtlpExporter:
+    """
+    Sends spans to an OTLP/HTTP collector in batches from a background thread.
+    Spans are dropped rather than queued without limit if the collector cannot
+    keep up or cannot be reached.
+    """
+    enabled = True
+
+    def __init__(self, endpoint, service_name, batch_size=OTLP_BATCH_SIZE,
+                 interval=OTLP_INTERVAL, max_queued=OTLP_MAX_QUEUED):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_queued = max_queued
+        self.dropped = 0
+        self._condition = threading.Condition()
+        self._queue = []
+        self._send_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def export(self, span):
+        with self._condition:
+            if len(self._queue) >= self.max_queued:
+                self.dropped += 1
+                return
+            self._queue.append(span)
+            self._start()
+            if len(self._queue) >= self.batch_size:
+                self._condition.notify()
+
+    def flush(self):
+        while self._send_batch():
+            pass
+
+    def _start(self):
+        """Starts the sender thread, again in a forked child.  Callers must hold _condition."""
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='cfs_trace_exporter',
+                                            daemon=True)
+            self._thread.start()
+
+    def _run(self):  # pragma: no cover
+        while True:
+            with self._condition:
+                if len(self._queue) < self.batch_size:
+                    self._condition.wait(timeout=self.interval)
+            self.flush()
+
+    def _send_batch(self):
+        with self._send_lock:
+            with self._condition:
+                batch = self._queue[:self.batch_size]
+                del self._queue[:self.batch_size]
+            if not batch:
+                return False
+            body = {'resourceSpans': [{
+                'resource': {'attributes': _otlp_attributes({'service.name': self.service_name})},
+                'scopeSpans': [{'scope': {'name': 'cray.cfs'},
+                                'spans': [span.to_otlp() for span in batch]}],
+            }]}
+            try:
+                response = requests.post(self.endpoint, json=body, timeout=OTLP_TIMEOUT)
+                response.raise_for_status()
+            except Exception as e:
+                self.dropped += len(batch)
+                LOGGER.debug('Unable to export %d spans to %s: %s', len(batch), self.endpoint, e)
+            return True
+
+
+def _otlp_attributes(attributes):
+    values = []
+    for key, value in attributes.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            typed = {'boolValue': value}
+        elif isinstance(value, int):
+            typed = {'intValue': str(value)}
+        elif isinstance(value, float):
+            typed = {'doubleValue': value}
+        else:
+            typed = {'stringValue': str(value)}
+        values.append({'key': key, 'value': typed})
+    return values
+
+
+def get_exporter(service_name, environ=os.environ):
+    """Returns the span exporter configured in the environment"""
+    exporter = environ.get(EXPORTER_ENV, '').lower()
+    if exporter == 'file':
+        return FileExporter(environ.get(FILE_ENV, DEFAULT_FILE), service_name)
+    if exporter == 'otlp':
+        return OtlpExporter(environ.get(OTLP_ENDPOINT_ENV, DEFAULT_OTLP_ENDPOINT), service_name)
+    if exporter and exporter != 'none':
+        LOGGER.warning('Unknown trace exporter %r. Tracing is disabled', exporter)
+    return NullExporter()
+
+
+def get_tracer(service_name, environ=os.environ):
+    """
+    Returns a tracer configured from the environment, with the context from
+    TRACEPARENT as its root.  Any spans not yet sent are flushed at exit.
+    """
+    tracer = Tracer(service_name, exporter=get_exporter(service_name, environ),
+                    root=SpanContext.parse(environ.get(TRACEPARENT, '')))
+    if tracer.enabled:
+        atexit.register(tracer.flush)
+    return tracer
+
+
+def to_ns(timestamp):
+    """Converts a datetime, or a time in seconds, to nanoseconds since the epoch"""
+    if timestamp is None:
+        return None
+    if hasattr(timestamp, 'timestamp'):
+        timestamp = timestamp.timestamp()
+    return int(timestamp * 1e9)
@@ -0,0 +1,518 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+In-process fakes of the services the operator talks to, for benchmarks that
+run the real operator components:
+
+  FakeKafka       - the cfs-session-events topic, in memory
+  FakeCFS         - the CFS v3 sessions, configurations and options API
+  FakeIMS         - the IMS jobs API
+  FakeKubernetes  - the Kubernetes batch/v1 jobs API, including watches
+
+The HTTP fakes are served on local ports so that the real clients, with their
+connection pools, serialization and retries, are measured too.  Each counts
+the requests it receives by method and route, and can fail a fraction of
+requests to exercise the retry paths.
+"""
+from collections import Counter, namedtuple
+import datetime
+import heapq
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import itertools
+import json
+import random
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+import zlib
+
+from kafka.structs import TopicPartition
+
+from cray.cfs.operator.cfs.options import DEFAULTS as OPTION_DEFAULTS
+from cray.cfs.operator.kafka_utils import CommitPolicy
+
+TOPIC = 'cfs-session-events'
+Message = namedtuple('Message', ['offset', 'value', 'timestamp'])
+
+
+def now_iso():
+    return datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class FakeKafka:
+    """
+    An in-memory topic with the parts of KafkaWrapper and KafkaConsumer that
+    the session controller uses.  Events are keyed to partitions by session
+    name, and are copied on produce as they would be by serialization.
+    Commits are coalesced by the controller's commit policy, as they are by
+    KafkaWrapper, and each commit sent counts once.
+    """
+
+    def __init__(self, partitions=1, max_records=500):
+        self.partitions = [TopicPartition(TOPIC, i) for i in range(partitions)]
+        self.max_records = max_records
+        self.produced = 0
+        self.commits = 0
+        self.commit_policy = CommitPolicy()
+        self._condition = threading.Condition()
+        self._logs = {partition: [] for partition in self.partitions}
+        self._positions = {partition: 0 for partition in self.partitions}
+        self._committed = {partition: 0 for partition in self.partitions}
+
+    @property
+    def consumer(self):
+        return self
+
+    def __call__(self, *args, commit_policy=None, **kwargs):
+        """Stands in for the KafkaWrapper class"""
+        self.commit_policy = commit_policy or CommitPolicy()
+        return self
+
+    def produce(self, event):
+        name = (event.get('data') or {}).get('name') or ''
+        partition = self.partitions[zlib.crc32(name.encode()) % len(self.partitions)]
+        with self._condition:
+            log = self._logs[partition]
+            log.append(Message(len(log), json.loads(json.dumps(event)), int(time.time() * 1000)))
+            self.produced += 1
+            self._condition.notify_all()
+
+    def poll(self, timeout_ms=0):
+        deadline = time.monotonic() + timeout_ms / 1000
+        with self._condition:
+            while True:
+                records = {}
+                for partition, log in self._logs.items():
+                    position = self._positions[partition]
+                    if position < len(log):
+                        records[partition] = log[position:position + self.max_records]
+                        self._positions[partition] += len(records[partition])
+                if records:
+                    return records
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return {}
+                self._condition.wait(timeout=remaining)
+
+    def highwater(self, partition):
+        with self._condition:
+            return len(self._logs[partition])
+
+    def commit(self, offsets=None):
+        with self._condition:
+            self.commit_policy.add(offsets)
+            if self.commit_policy.due():
+                self._flush_commits()
+
+    def _flush_commits(self):
+        # Called with the lock held
+        offsets = self.commit_policy.pending()
+        if not offsets:
+            return
+        for partition, offset in offsets.items():
+            self._committed[partition] = max(self._committed[partition], offset)
+        self.commit_policy.committed(offsets)
+        self.commits += 1
+
+    def drained(self):
+        """True once every produced event has been consumed and committed"""
+        with self._condition:
+            return all(self._committed[partition] >= len(log)
+                       for partition, log in self._logs.items())
+
+    def close(self):
+        with self._condition:
+            self._flush_commits()
+
+
+class FakeService(ThreadingHTTPServer):
+    """A local HTTP server that routes requests to handle(method, path, query, body)"""
+    daemon_threads = True
+    name = 'service'
+
+    def __init__(self, error_rate=0.0, seed=0):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.error_rate = error_rate
+        self.calls = Counter()
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%d' % self.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, kwargs={'poll_interval': 0.05},
+                                        name=self.name, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def count(self, method, route):
+        with self._lock:
+            self.calls[(method, route)] += 1
+
+    def should_fail(self):
+        if not self.error_rate:
+            return False
+        with self._lock:
+            failed = self._random.random() < self.error_rate
+            self.errors += failed
+            return failed
+
+    def handle(self, method, path, query, body, headers):
+        """Returns (status, body, headers).  A body that is a generator is streamed."""
+        raise NotImplementedError
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def _dispatch(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        status, response, headers = self.server.handle(self.command, url.path, query, body,
+                                                       self.headers)
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if hasattr(response, '__next__'):
+            # Streamed until the generator ends, with the end marked by closing the connection
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.close_connection = True
+            try:
+                for item in response:
+                    self.wfile.write(json.dumps(item).encode() + b'\n')
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            return
+        data = b'' if response is None else json.dumps(response).encode()
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _dispatch
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeCFS(FakeService):
+    """
+    The CFS v3 API.  A fraction of the PATCH requests that set a session's job
+    fail with a 500, which the operator retries.
+    """
+    name = 'cfs'
+
+    def __init__(self, error_rate=0.0, seed=0):
+        super().__init__(error_rate=error_rate, seed=seed)
+        self.sessions = {}
+        self.configurations = {}
+        self.options = dict(OPTION_DEFAULTS, default_ansible_config='cfs-default-ansible-cfg')
+        # Times at which each session's job was set and the session completed
+        self.job_set = {}
+        self.completed = {}
+
+    def add_configuration(self, name, layers=1):
+        self.configurations[name] = {
+            'name': name,
+            'layers': [{'name': 'layer-%d' % i, 'clone_url': 'https://vcs/repo-%d.git' % i,
+                        'commit': '%040x' % i, 'playbook': 'site.yml'} for i in range(layers)],
+            'additional_inventory': {},
+        }
+
+    def create_session(self, name, configuration, target='dynamic'):
+        session = {
+            'name': name,
+            'configuration': {'name': configuration, 'limit': ''},
+            'ansible': {'config': 'cfs-default-ansible-cfg', 'limit': None, 'verbosity': 0,
+                        'passthrough': None},
+            'target': {'definition': target, 'groups': []},
+            'debug_on_failure': False,
+            'tags': {},
+            'status': {'artifacts': [], 'session': {
+                'status': 'pending', 'succeeded': 'none', 'start_time': now_iso(),
+                'job': None, 'ims_job': None}},
+        }
+        with self._lock:
+            self.sessions[name] = session
+        return json.loads(json.dumps(session))
+
+    def delete_session(self, name):
+        with self._lock:
+            session = self.sessions.pop(name, None)
+        return json.loads(json.dumps(session)) if session else None
+
+    def handle(self, method, path, query, body, headers):
+        parts = path.strip('/').split('/')
+        if parts[:2] == ['v3', 'options']:
+            self.count(method, '/v3/options')
+            return 200, self.options, None
+        if parts[:2] == ['v3', 'configurations'] and len(parts) == 3:
+            self.count(method, '/v3/configurations/{id}')
+            configuration = self.configurations.get(parts[2])
+            if configuration is None:
+                return 404, {'title': 'Not Found'}, None
+            etag = '"%s"' % parts[2]
+            if headers.get('If-None-Match') == etag:
+                return 304, None, {'ETag': etag}
+            return 200, configuration, {'ETag': etag}
+        if parts[:2] == ['v3', 'sessions'] and len(parts) == 2:
+            self.count(method, '/v3/sessions')
+            if method == 'DELETE':
+                return 204, None, None
+            status = query.get('status')
+            with self._lock:
+                sessions = [s for s in self.sessions.values()
+                            if not status or s['status']['session']['status'] == status]
+                page = json.loads(json.dumps({'sessions': sessions, 'next': None}))
+            return 200, page, None
+        if parts[:2] == ['v3', 'sessions'] and len(parts) == 3:
+            self.count(method, '/v3/sessions/{id}')
+            return self._handle_session(method, parts[2], body)
+        self.count(method, path)
+        return 404, {'title': 'Not Found'}, None
+
+    def _handle_session(self, method, name, body):
+        with self._lock:
+            session = self.sessions.get(name)
+            if session is None:
+                return 404, {'title': 'Not Found'}, None
+            if method == 'GET':
+                return 200, json.loads(json.dumps(session)), None
+            update = (body or {}).get('status', {}).get('session', {})
+            current = session['status']['session']
+            if update.get('job'):
+                if current.get('job') and current['job'] != update['job']:
+                    return 409, {'title': 'Conflict'}, None
+            if update.get('job') and self.error_rate and self._random.random() < self.error_rate:
+                self.errors += 1
+                return 500, {'title': 'Internal Server Error'}, None
+            current.update(update)
+            if update.get('job') and name not in self.job_set:
+                self.job_set[name] = time.monotonic()
+            if update.get('status') == 'complete' and name not in self.completed:
+                self.completed[name] = time.monotonic()
+            return 200, json.loads(json.dumps(session)), None
+
+
+class FakeIMS(FakeService):
+    """The IMS jobs API"""
+    name = 'ims'
+
+    def __init__(self, error_rate=0.0, seed=0):
+        super().__init__(error_rate=error_rate, seed=seed)
+        self.jobs = {}
+
+    def add_job(self, job_id, status='waiting_on_user'):
+        with self._lock:
+            self.jobs[job_id] = {'id': job_id, 'status': status, 'job_type': 'customize'}
+
+    def handle(self, method, path, query, body, headers):
+        parts = path.strip('/').split('/')
+        if parts == ['jobs']:
+            self.count(method, '/jobs')
+            with self._lock:
+                return 200, list(self.jobs.values()), None
+        if parts[0] == 'jobs' and len(parts) == 2:
+            self.count(method, '/jobs/{id}')
+            with self._lock:
+                job = self.jobs.get(parts[1])
+                if job is None:
+                    return 404, {'title': 'Not Found'}, None
+                if method == 'DELETE':
+                    del self.jobs[parts[1]]
+                    return 204, None, None
+                return 200, job, None
+        self.count(method, path)
+        return 404, {'title': 'Not Found'}, None
+
+
+class FakeKubernetes(FakeService):
+    """
+    The batch/v1 jobs API.  Created jobs start after start_delay seconds and
+    succeed runtime seconds later, and every change is delivered to watches.
+    A fraction of job creates are throttled with a 429.
+    """
+    name = 'kubernetes'
+
+    def __init__(self, error_rate=0.0, seed=0, start_delay=0.05, runtime=0.2):
+        super().__init__(error_rate=error_rate, seed=seed)
+        self.start_delay = start_delay
+        self.runtime = runtime
+        self.jobs = {}
+        # Time each session's first job was created
+        self.job_created = {}
+        self._condition = threading.Condition(self._lock)
+        self._resource_version = itertools.count(1)
+        self._version = 0
+        self._events = []
+        self._timers = []
+        self._timer_ids = itertools.count()
+        self._stopping = False
+
+    def start(self):
+        threading.Thread(target=self._run_timers, name='fake_job_lifecycle', daemon=True).start()
+        return super().start()
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        super().stop()
+
+    def handle(self, method, path, query, body, headers):
+        parts = path.strip('/').split('/')
+        # /apis/batch/v1/namespaces/{namespace}/jobs[/{name}]
+        if parts[:3] != ['apis', 'batch', 'v1'] or len(parts) < 6 or parts[5] != 'jobs':
+            self.count(method, path)
+            return 404, _status(404, 'NotFound'), None
+        if len(parts) == 6:
+            if method == 'POST':
+                self.count(method, '/apis/batch/v1/namespaces/{ns}/jobs')
+                return self._create(parts[4], body)
+            if query.get('watch') in ('true', 'True', '1'):
+                self.count('WATCH', '/apis/batch/v1/namespaces/{ns}/jobs')
+                return 200, self._watch(int(query.get('resourceVersion') or 0),
+                                        float(query.get('timeoutSeconds') or 60)), None
+            self.count(method, '/apis/batch/v1/namespaces/{ns}/jobs')
+            with self._lock:
+                job_list = {'kind': 'JobList', 'apiVersion': 'batch/v1',
+                            'metadata': {'resourceVersion': str(self._version)},
+                            'items': list(self.jobs.values())}
+                return 200, json.loads(json.dumps(job_list)), None
+        self.count(method, '/apis/batch/v1/namespaces/{ns}/jobs/{name}')
+        with self._condition:
+            job = self.jobs.get(parts[6])
+            if job is None:
+                return 404, _status(404, 'NotFound'), None
+            if method == 'DELETE':
+                del self.jobs[parts[6]]
+                self._emit('DELETED', job)
+                return 200, _status(200, 'Success'), None
+            return 200, json.loads(json.dumps(job)), None
+
+    def _create(self, namespace, job):
+        if self.should_fail():
+            return 429, _status(429, 'TooManyRequests'), {'Retry-After': '0'}
+        with self._condition:
+            name = job['metadata']['name']
+            if name in self.jobs:
+                return 409, _status(409, 'AlreadyExists'), None
+            labels = job['spec']['template']['metadata'].get('labels', {})
+            job['metadata'].update({
+                'namespace': namespace,
+                'labels': labels,
+                'uid': name,
+                'creationTimestamp': now_iso(),
+            })
+            job['status'] = {}
+            self.jobs[name] = job
+            self.job_created.setdefault(labels.get('cfsession'), time.monotonic())
+            self._emit('ADDED', job)
+            self._schedule(self.start_delay, self._start_job, name)
+            return 201, json.loads(json.dumps(job)), None
+
+    def _start_job(self, name):
+        # Called with the lock held
+        job = self.jobs.get(name)
+        if job is None:
+            return
+        job['status'] = {'startTime': now_iso(), 'active': 1}
+        self._emit('MODIFIED', job)
+        self._schedule(self.runtime, self._complete_job, name)
+
+    def _complete_job(self, name):
+        # Called with the lock held
+        job = self.jobs.get(name)
+        if job is None:
+            return
+        completed = now_iso()
+        job['status'] = {'startTime': job['status']['startTime'], 'completionTime': completed,
+                         'succeeded': 1, 'conditions': [{
+                             'type': 'Complete', 'status': 'True',
+                             'lastTransitionTime': completed}]}
+        self._emit('MODIFIED', job)
+
+    def _emit(self, event_type, job):
+        # Called with the lock held
+        self._version = next(self._resource_version)
+        job['metadata']['resourceVersion'] = str(self._version)
+        self._events.append((self._version, event_type, json.loads(json.dumps(job))))
+        self._condition.notify_all()
+
+    def _watch(self, resource_version, timeout):
+        deadline = time.monotonic() + timeout
+        position = 0
+        while True:
+            with self._condition:
+                while position < len(self._events) and self._events[position][0] <= \
+                        resource_version:
+                    position += 1
+                pending = self._events[position:]
+                position = len(self._events)
+                if not pending:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or self._stopping:
+                        return
+                    self._condition.wait(timeout=remaining)
+                    continue
+            for _, event_type, job in pending:
+                yield {'type': event_type, 'object': job}
+
+    def _schedule(self, delay, fn, *args):
+        # Called with the lock held
+        heapq.heappush(self._timers, (time.monotonic() + delay, next(self._timer_ids), fn, args))
+        self._condition.notify_all()
+
+    def _run_timers(self):
+        with self._condition:
+            while not self._stopping:
+                if not self._timers:
+                    self._condition.wait()
+                    continue
+                due, _, fn, args = self._timers[0]
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self._condition.wait(timeout=wait)
+                    continue
+                heapq.heappop(self._timers)
+                fn(*args)
+
+
+def _status(code, reason):
+    return {'kind': 'Status', 'apiVersion': 'v1', 'metadata': {}, 'code': code,
+            'reason': reason, 'status': 'Success' if code < 400 else 'Failure'}
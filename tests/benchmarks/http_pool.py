@@ -0,0 +1,99 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Micro-benchmark comparing a new requests_retry_session per call with the
+pooled session factory used by the CFS API client modules.
+
+Both are run against a local keep-alive stub server:
+
+    python -m tests.benchmarks.http_pool --requests 2000 --threads 4
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import time
+
+from requests_retry_session import requests_retry_session as base_requests_retry_session
+
+from cray.cfs.utils.clients import PooledSessionFactory
+
+BODY = b'{"name": "stub", "status": {"session": {"status": "running"}}}'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; avoid delayed-ACK stalls on kept-alive sockets
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(get_session, url, requests, threads):
+    def _request(_):
+        response = get_session().get(url)
+        response.raise_for_status()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(_request, range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    server = start_stub_server()
+    url = 'http://127.0.0.1:%d/v3/sessions/stub' % server.server_address[1]
+    try:
+        before = run(lambda: base_requests_retry_session(protocol='http'), url,
+                     args.requests, args.threads)
+        after = run(PooledSessionFactory('http'), url, args.requests, args.threads)
+    finally:
+        server.shutdown()
+    print('new session per request: %8.1f requests/s' % before)
+    print('pooled session factory:  %8.1f requests/s' % after)
+    print('speedup:                 %8.2fx' % (after / before))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Benchmark of session jobs built per second, with the cached job template and
+with the template rebuilt for every job as the builder used to do:
+
+    python -m tests.benchmarks.job_build --jobs 5000
+"""
+import argparse
+import time
+from unittest.mock import patch, Mock
+
+from kubernetes import client, config
+config.load_incluster_config = Mock()
+config.load_kube_config = Mock()
+
+from cray.cfs.operator.events import CFSSessionController  # noqa: E402
+from tests.unit.test_job_template import ENV, mock_options, session_cases  # noqa: E402
+
+
+def run(conn, jobs, cached):
+    cases = session_cases()
+    start = time.perf_counter()
+    for i in range(jobs):
+        _, session, job_id, layers, token = cases[i % len(cases)]
+        if not cached:
+            conn._job_template = None
+        conn._build_k8s_job(session, job_id, layers,
+                            client.V1EnvVar(name='VAULT_TOKEN', value=token))
+    return jobs / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jobs', type=int, default=5000)
+    args = parser.parse_args()
+
+    with patch('cray.cfs.operator.events.session_events.options', mock_options()):
+        conn = CFSSessionController(ENV)
+        before = run(conn, args.jobs, cached=False)
+        after = run(conn, args.jobs, cached=True)
+    print('template rebuilt per job: %8.1f jobs/s' % before)
+    print('cached job template:      %8.1f jobs/s' % after)
+    print('speedup:                  %8.2fx' % (after / before))
+
+
+if __name__ == '__main__':
+    main()
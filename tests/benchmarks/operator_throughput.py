@@ -0,0 +1,274 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Throughput benchmark of the operator, running the real CFSSessionController,
+CFSJobMonitor and IMSJobMonitor against the in-process fakes in
+tests.benchmarks.fakes.  A storm of session events is replayed from one of the
+profiles below, and events/sec, create-to-job latency and API call counts are
+reported:
+
+    python -m tests.benchmarks.operator_throughput --profile create-storm --sessions 1000
+
+Profiles:
+
+  create-storm  - only CREATE events, as when many nodes are configured at once
+  mixed         - CREATEs interleaved with DELETEs of sessions that have a job
+  retry-heavy   - CREATEs with CFS and Kubernetes failing a share of requests
+
+Operator settings can be changed with the usual CFS_OPERATOR_* environment
+variables.  --json writes the results as JSON, for comparing runs.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+from unittest.mock import patch, Mock
+
+from kubernetes import client, config
+config.load_incluster_config = Mock()
+config.load_kube_config = Mock()
+
+import cray.cfs.operator.cfs.configurations as configurations  # noqa: E402
+import cray.cfs.operator.cfs.options as options  # noqa: E402
+import cray.cfs.operator.cfs.sessions as sessions  # noqa: E402
+import cray.cfs.operator.events.job_events as job_events  # noqa: E402
+import cray.cfs.operator.events.session_events as session_events  # noqa: E402
+from cray.cfs.operator.events import CFSSessionController  # noqa: E402
+import cray.cfs.utils.clients.ims.jobs as ims_jobs  # noqa: E402
+from tests.benchmarks.fakes import FakeCFS, FakeIMS, FakeKafka, FakeKubernetes  # noqa: E402
+from tests.unit.test_job_template import ENV  # noqa: E402
+
+PROFILES = {
+    'create-storm': {'delete_fraction': 0.0, 'cfs_error_rate': 0.0, 'k8s_error_rate': 0.0},
+    'mixed': {'delete_fraction': 0.3, 'cfs_error_rate': 0.0, 'k8s_error_rate': 0.0},
+    'retry-heavy': {'delete_fraction': 0.0, 'cfs_error_rate': 0.2, 'k8s_error_rate': 0.1},
+}
+CONFIGURATIONS = 10
+# Retried events are normally held for seconds to minutes
+BENCHMARK_ENV = {
+    'CFS_OPERATOR_RETRY_BASE_DELAY': '0.1',
+    'CFS_OPERATOR_RETRY_MAX_DELAY': '2',
+}
+POLL_INTERVAL = 0.01  # seconds
+
+
+class Storm:
+    """Produces the session events for a profile, recording when each CREATE was sent"""
+
+    def __init__(self, kafka, cfs, ims, sessions, delete_fraction=0.0, rate=0, seed=0):
+        self.kafka = kafka
+        self.cfs = cfs
+        self.ims = ims
+        self.sessions = sessions
+        self.delete_fraction = delete_fraction
+        self.rate = rate
+        self.created = {}
+        self.deleted = set()
+        self._random = random.Random(seed)
+
+    def run(self):
+        start = time.monotonic()
+        for i in range(self.sessions):
+            if self.rate:
+                delay = start + i / self.rate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            name = 'session-{:06d}'.format(i)
+            session = self.cfs.create_session(name, 'config-{}'.format(i % CONFIGURATIONS))
+            self.created[name] = time.monotonic()
+            self.kafka.produce({'type': 'CREATE', 'data': session})
+            if self._random.random() < self.delete_fraction:
+                self._delete_one()
+
+    def _delete_one(self):
+        # Only sessions that have their job are deleted.  A session deleted before
+        # its CREATE is handled is retried until the retry budget runs out.
+        candidates = sorted(set(self.cfs.job_set) - self.deleted)
+        if not candidates:
+            return
+        name = self._random.choice(candidates)
+        session = self.cfs.delete_session(name)
+        if session is None:
+            return
+        self.deleted.add(name)
+        if self._random.random() < 0.5:
+            # Image customization sessions also leave an IMS job to clean up
+            ims_job = 'ims-' + name
+            self.ims.add_job(ims_job)
+            session['status']['session']['ims_job'] = ims_job
+        self.kafka.produce({'type': 'DELETE', 'data': session})
+
+
+def percentile(values, p):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def handled_events(controller):
+    return sum(lane['completed'] for lane in controller.event_workers.stats().values())
+
+
+def wait_for(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(POLL_INTERVAL)
+    return True
+
+
+def run(args, profile):
+    kafka = FakeKafka(partitions=args.partitions)
+    cfs = FakeCFS(error_rate=profile['cfs_error_rate'], seed=args.seed).start()
+    ims = FakeIMS(seed=args.seed).start()
+    kubernetes = FakeKubernetes(error_rate=profile['k8s_error_rate'], seed=args.seed,
+                                start_delay=args.job_start_delay,
+                                runtime=args.job_runtime).start()
+    for i in range(CONFIGURATIONS):
+        cfs.add_configuration('config-{}'.format(i), layers=3)
+
+    configuration = client.Configuration()
+    configuration.host = kubernetes.url
+    jobs_api = client.BatchV1Api(client.ApiClient(configuration))
+    env = dict(ENV, **BENCHMARK_ENV)
+    env.update({k: v for k, v in os.environ.items() if k.startswith('CFS_OPERATOR_')})
+
+    with patch.object(sessions, 'ENDPOINT', cfs.url + '/v3/sessions'), \
+            patch.object(configurations, 'ENDPOINT', cfs.url + '/v3/configurations'), \
+            patch.object(options, 'ENDPOINT', cfs.url + '/v3/options'), \
+            patch.object(ims_jobs, 'ENDPOINT', ims.url + '/jobs'), \
+            patch.object(session_events, 'k8sjobs', jobs_api), \
+            patch.object(job_events, 'k8s_jobs', jobs_api), \
+            patch.object(session_events, 'KafkaWrapper', kafka):
+        controller = CFSSessionController(env)
+        controller.run()
+        storm = Storm(kafka, cfs, ims, args.sessions, delete_fraction=profile['delete_fraction'],
+                      rate=args.rate, seed=args.seed)
+        start = time.monotonic()
+        storm.run()
+
+        events_done = wait_for(lambda: handled_events(controller) >= kafka.produced,
+                               args.timeout)
+        events_time = time.monotonic() - start
+        sessions_done = wait_for(
+            lambda: all(name in cfs.completed or name in storm.deleted
+                        for name in storm.created),
+            max(0, args.timeout - events_time))
+        sessions_time = time.monotonic() - start
+
+        latencies = [kubernetes.job_created[name] - created
+                     for name, created in storm.created.items()
+                     if name in kubernetes.job_created]
+        return {
+            'profile': args.profile,
+            'sessions': args.sessions,
+            'complete': events_done and sessions_done,
+            'events': {
+                'produced': kafka.produced,
+                'handled': handled_events(controller),
+                'retried': kafka.produced - args.sessions - len(storm.deleted),
+                'deletes': len(storm.deleted),
+                'per_second': handled_events(controller) / events_time,
+                'commits': kafka.commits,
+            },
+            'sessions_per_second': len(cfs.completed) / sessions_time,
+            'create_to_job_seconds': {
+                'count': len(latencies),
+                'p50': percentile(latencies, 50),
+                'p99': percentile(latencies, 99),
+                'max': max(latencies, default=float('nan')),
+            },
+            'job_submitter': controller.job_submitter.stats(),
+            'errors_injected': {service.name: service.errors for service in (cfs, kubernetes)},
+            'api_calls': {service.name: {'%s %s' % key: count
+                                         for key, count in sorted(service.calls.items())}
+                          for service in (cfs, ims, kubernetes)},
+        }, controller
+
+
+def report(results):
+    events = results['events']
+    latency = results['create_to_job_seconds']
+    print('profile:             %s, %d sessions%s' % (
+        results['profile'], results['sessions'],
+        '' if results['complete'] else ' (timed out)'))
+    print('events:              %d produced, %d handled, %d retried, %d deletes' % (
+        events['produced'], events['handled'], events['retried'], events['deletes']))
+    print('event throughput:    %8.1f events/s' % events['per_second'])
+    print('session throughput:  %8.1f sessions/s' % results['sessions_per_second'])
+    print('create to job:       p50 %.3f s, p99 %.3f s, max %.3f s (%d jobs)' % (
+        latency['p50'], latency['p99'], latency['max'], latency['count']))
+    print('kafka commits:       %d' % events['commits'])
+    print('job requests:        %d throttled' % results['job_submitter']['throttled'])
+    print('errors injected:     %s' % ', '.join(
+        '%s %d' % item for item in results['errors_injected'].items()))
+    for service, calls in results['api_calls'].items():
+        print('%s API calls:' % service)
+        for route, count in calls.items():
+            print('  %-52s %8d' % (route, count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='create-storm')
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--rate', type=float, default=0,
+                        help='CREATE events per second; all at once by default')
+    parser.add_argument('--partitions', type=int, default=1)
+    parser.add_argument('--delete-fraction', type=float)
+    parser.add_argument('--cfs-error-rate', type=float)
+    parser.add_argument('--k8s-error-rate', type=float)
+    parser.add_argument('--job-start-delay', type=float, default=0.05)
+    parser.add_argument('--job-runtime', type=float, default=0.2)
+    parser.add_argument('--timeout', type=float, default=600)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', metavar='FILE')
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level)
+    profile = dict(PROFILES[args.profile])
+    for key in profile:
+        if getattr(args, key) is not None:
+            profile[key] = getattr(args, key)
+
+    results, controller = run(args, profile)
+    report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    sys.stdout.flush()
+    controller.shutdown()
+    # The operator's threads run forever, as they do in the operator itself
+    os._exit(0 if results['complete'] else 1)
+
+
+if __name__ == '__main__':
+    main()
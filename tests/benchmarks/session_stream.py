@@ -0,0 +1,99 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+"""
+Memory benchmark comparing whole-page decoding of a session list with the
+streaming decoder used by iter_sessions, on a synthetic page of sessions:
+
+    python -m tests.benchmarks.session_stream --sessions 10000
+"""
+import argparse
+import time
+import tracemalloc
+
+import ujson as json
+
+from cray.cfs.utils.json_stream import iter_json_array, project
+
+FIELDS = ['name', 'status.session.job', 'status.session.status']
+CHUNK_SIZE = 64 * 1024
+
+
+def make_page(count):
+    sessions = []
+    for i in range(count):
+        sessions.append({
+            'name': 'session-{:06d}'.format(i),
+            'configuration': {'name': 'compute-config', 'limit': ''},
+            'ansible': {'config': 'cfs-default-ansible-cfg', 'limit': None, 'verbosity': 0,
+                        'passthrough': None},
+            'target': {'definition': 'image', 'groups': [
+                {'name': 'Compute', 'members': ['x3000c0s{}b0n0'.format(n) for n in range(16)]}]},
+            'status': {
+                'artifacts': [],
+                'session': {'job': 'cfs-{:032x}'.format(i), 'status': 'complete',
+                            'succeeded': 'true', 'start_time': '2026-01-01T00:00:00',
+                            'completion_time': '2026-01-01T00:10:00', 'ims_job': None},
+            },
+            'tags': {'bos_session': 'bos-{:06d}'.format(i)},
+        })
+    return json.dumps({'sessions': sessions, 'next': None}).encode('utf-8')
+
+
+def whole_page(body):
+    """The previous behaviour: body bytes, then text, then the decoded page"""
+    text = body.decode('utf-8')
+    return [project(session, FIELDS) for session in json.loads(text)['sessions']]
+
+
+def streamed(body):
+    chunks = (body[i:i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE))
+    return [project(session, FIELDS) for session in iter_json_array(chunks, 'sessions')]
+
+
+def measure(fn, body):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(body)
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(result), peak, duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sessions', type=int, default=10000)
+    args = parser.parse_args()
+
+    body = make_page(args.sessions)
+    print('page size:   %8.1f MiB, %d sessions' % (len(body) / 2 ** 20, args.sessions))
+    # The body itself is excluded from the peaks: both approaches read it from the socket
+    for name, fn in (('whole page', whole_page), ('streamed', streamed)):
+        count, peak, duration = measure(fn, body)
+        assert count == args.sessions
+        print('%-12s %8.1f MiB peak, %6.2f s' % (name + ':', peak / 2 ** 20, duration))
+
+
+if __name__ == '__main__':
+    main()
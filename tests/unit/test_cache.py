@@ -0,0 +1,132 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the cray/cfs/utils/cache.py module """
+import threading
+import time
+from unittest.mock import patch, Mock
+
+import pytest
+
+from cray.cfs.operator.cfs.configurations import get_cached_configuration, configuration_cache
+from cray.cfs.utils.cache import CacheEntry, TTLCache
+
+
+def test_cache_hits_and_misses():
+    cache = TTLCache(maxsize=2, ttl=60)
+    load = Mock(side_effect=lambda key, entry: CacheEntry(key.upper()))
+    assert(cache.get('a', load) == 'A')
+    assert(cache.get('a', load) == 'A')
+    assert(load.call_count == 1)
+    assert(cache.stats() == {'size': 1, 'hits': 1, 'misses': 1})
+
+
+def test_cache_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    load = Mock(side_effect=lambda key, entry: CacheEntry(key))
+    cache.get('a', load)
+    cache.get('b', load)
+    cache.get('a', load)
+    cache.get('c', load)
+    assert(cache.stats()['size'] == 2)
+    cache.get('a', load)
+    assert(load.call_count == 3)
+    cache.get('b', load)
+    assert(load.call_count == 4)
+
+
+def test_cache_expiry_revalidates():
+    cache = TTLCache(ttl=0)
+    first = CacheEntry('value', etag='"1"')
+    load = Mock(side_effect=[first, first])
+    assert(cache.get('a', load) == 'value')
+    assert(cache.get('a', load) == 'value')
+    # The expired entry is passed back for a conditional request
+    assert(load.call_args_list[1].args == ('a', first))
+
+
+@pytest.mark.parametrize('ttl', [60, 0])
+def test_cache_single_flight(ttl):
+    cache = TTLCache(ttl=ttl)
+    release = threading.Event()
+    calls = []
+
+    def load(key, entry):
+        calls.append(key)
+        release.wait(5)
+        return CacheEntry(key)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('a', load)))
+               for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert(calls == ['a'])
+    assert(results == ['a'] * 10)
+
+
+def test_cache_load_error():
+    cache = TTLCache(ttl=60)
+    with pytest.raises(ValueError):
+        cache.get('a', Mock(side_effect=ValueError()))
+    assert(cache.get('a', lambda key, entry: CacheEntry(1)) == 1)
+
+
+def test_cache_invalidate_during_load():
+    cache = TTLCache(ttl=60)
+    values = iter(['old', 'new'])
+
+    def load(key, entry):
+        value = next(values)
+        if value == 'old':
+            # An invalidation that arrives before the load is stored still wins
+            cache.invalidate(key)
+        return CacheEntry(value)
+    assert(cache.get('a', load) == 'new')
+    assert(cache.get('a', load) == 'new')
+
+
+def test_cache_refresh():
+    cache = TTLCache(ttl=60)
+    load = Mock(side_effect=[CacheEntry(1), CacheEntry(2)])
+    assert(cache.get('a', load) == 1)
+    cache.refresh('a', load)
+    assert(cache.get('a', load) == 2)
+    assert(load.call_count == 2)
+
+
+def test_get_cached_configuration():
+    configuration_cache.invalidate()
+    ok = Mock(status_code=200, text='{"name": "test", "layers": []}', headers={'ETag': '"1"'})
+    not_modified = Mock(status_code=304)
+    with patch('cray.cfs.operator.cfs.configurations.requests_retry_session') as cfsrequests, \
+            patch.object(configuration_cache, 'ttl', 0):
+        cfsrequests.return_value.get.side_effect = [ok, not_modified]
+        assert(get_cached_configuration('test') == {'name': 'test', 'layers': []})
+        assert(get_cached_configuration('test') == {'name': 'test', 'layers': []})
+        cfsrequests.return_value.get.assert_called_with(
+            'http://cray-cfs-api/v3/configurations/test', headers={'If-None-Match': '"1"'})
+    configuration_cache.invalidate()
@@ -0,0 +1,77 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the cray/cfs/utils/clients package """
+import threading
+from unittest.mock import patch
+
+from urllib3.util.retry import Retry
+
+from cray.cfs.utils.clients import PooledSessionFactory
+
+
+def test_pooled_session_reused_within_thread():
+    factory = PooledSessionFactory('http', pool_connections=2, pool_maxsize=7)
+    session = factory()
+    assert(factory() is session)
+    adapter = session.get_adapter('http://cray-cfs-api/v3/sessions')
+    assert(adapter.poolmanager.connection_pool_kw['maxsize'] == 7)
+
+
+def test_pooled_session_shares_adapter_across_threads():
+    factory = PooledSessionFactory('http')
+    sessions = []
+    threads = [threading.Thread(target=lambda: sessions.append(factory())) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert(sessions[0] is not sessions[1])
+    assert(sessions[0].get_adapter('http://') is sessions[1].get_adapter('http://'))
+
+
+def test_pooled_session_rebuilt_after_fork():
+    factory = PooledSessionFactory('http')
+    session = factory()
+    with patch('cray.cfs.utils.clients.os.getpid', return_value=-1):
+        forked_session = factory()
+    assert(forked_session is not session)
+    assert(forked_session.get_adapter('http://') is not session.get_adapter('http://'))
+
+
+def test_pooled_session_response_hooks():
+    factory = PooledSessionFactory('http')
+    session = factory()
+    responses = []
+    factory.add_response_hook(lambda response, *args, **kwargs: responses.append(response))
+    for hook in session.hooks['response']:
+        hook('response')
+    assert(responses == ['response'])
+
+
+def test_pooled_session_custom_retries():
+    retries = Retry(total=3, status_forcelist=[503])
+    factory = PooledSessionFactory('http', pool_maxsize=4, retries=retries)
+    adapter = factory().get_adapter('http://cray-ims/jobs')
+    assert(adapter.max_retries is retries)
+    assert(adapter.poolmanager.connection_pool_kw['maxsize'] == 4)
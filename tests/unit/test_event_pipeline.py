@@ -0,0 +1,199 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the cray/cfs/operator/events/event_pipeline.py module """
+import threading
+import time
+from unittest.mock import patch, Mock
+
+from kubernetes import config
+config.load_incluster_config = Mock()
+config.load_kube_config = Mock()
+
+from cray.cfs.operator.events import CFSSessionController  # pylint: disable=E402
+from cray.cfs.operator.events.event_pipeline import KeyedWorkerPool, Lane, OffsetTracker
+from cray.cfs.operator.events.session_events import _get_event_lane
+
+
+def test_worker_pool_keeps_key_order():
+    pool = KeyedWorkerPool(workers=4, max_pending=100)
+    pool.start()
+    results = {'a': [], 'b': []}
+    for i in range(20):
+        pool.submit('a', results['a'].append, i)
+        pool.submit('b', results['b'].append, i)
+    pool.stop()
+    assert(results['a'] == list(range(20)))
+    assert(results['b'] == list(range(20)))
+
+
+def test_worker_pool_reserve():
+    pool = KeyedWorkerPool(workers=1, max_pending=1)
+    assert(pool.reserve(timeout=0))
+    assert(not pool.reserve(timeout=0))
+    assert(not pool.submit('a', Mock(), timeout=0))
+    pool.release()
+    assert(pool.reserve(timeout=0))
+    assert(pool.submit('a', Mock(), reserved=True))
+    assert(pool.pending == 1)
+    pool.start()
+    pool.stop()
+    # Running the task frees its place
+    assert(pool.reserve(timeout=0))
+
+
+def test_worker_pool_runs_keys_in_parallel():
+    pool = KeyedWorkerPool(workers=2, max_pending=10)
+    pool.start()
+    barrier = threading.Barrier(2, timeout=5)
+    # Both tasks can only pass the barrier if they are running at the same time
+    pool.submit('a', barrier.wait)
+    pool.submit('b', barrier.wait)
+    pool.stop()
+    assert(not barrier.broken)
+
+
+def test_worker_pool_is_bounded():
+    pool = KeyedWorkerPool(workers=1, max_pending=1)
+    pool.start()
+    release = threading.Event()
+    assert(pool.submit('a', release.wait))
+    assert(not pool.submit('b', time.sleep, 0, timeout=0.1))
+    release.set()
+    assert(pool.submit('b', time.sleep, 0, timeout=5))
+    pool.stop()
+    assert(pool.pending == 0)
+
+
+def test_worker_pool_survives_task_exception():
+    pool = KeyedWorkerPool(workers=1, max_pending=10)
+    pool.start()
+    results = []
+    pool.submit('a', Mock(side_effect=Exception()))
+    pool.submit('a', results.append, 1)
+    pool.stop()
+    assert(results == [1])
+
+
+def _lane_pool():
+    return KeyedWorkerPool(workers=1, lanes=[Lane('create', weight=4, max_pending=100),
+                                             Lane('delete', weight=1, max_pending=100)])
+
+
+def test_worker_pool_lanes_are_weighted():
+    pool = _lane_pool()
+    release = threading.Event()
+    order = []
+    pool.submit('blocker', release.wait, lane='create')
+    pool.start()
+    for i in range(20):
+        pool.submit('delete-{}'.format(i), order.append, 'delete', lane='delete')
+    for i in range(10):
+        pool.submit('create-{}'.format(i), order.append, 'create', lane='create')
+    release.set()
+    pool.stop()
+    # Creates get four workers for every one given to deletes until they run out
+    assert(order[:10].count('create') == 8)
+    assert(order.count('create') == 10)
+    assert(order[-1] == 'delete')
+
+
+def test_worker_pool_lanes_keep_key_order():
+    pool = _lane_pool()
+    results = []
+    for i in range(10):
+        pool.submit('a', results.append, ('delete', i), lane='delete')
+        pool.submit('a', results.append, ('create', i), lane='create')
+    pool.start()
+    pool.stop()
+    assert([i for _, i in results] == [i for i in range(10) for _ in range(2)])
+
+
+def test_worker_pool_lanes_are_bounded_separately():
+    pool = KeyedWorkerPool(workers=1, lanes=[Lane('create', max_pending=1),
+                                             Lane('delete', max_pending=1)])
+    pool.start()
+    release = threading.Event()
+    assert(pool.submit('a', release.wait, lane='delete'))
+    assert(not pool.submit('b', time.sleep, 0, timeout=0.1, lane='delete'))
+    assert(pool.submit('c', time.sleep, 0, timeout=0.1, lane='create'))
+    release.set()
+    pool.stop()
+
+
+def test_worker_pool_lane_stats():
+    pool = _lane_pool()
+    release = threading.Event()
+    pool.submit('a', release.wait, lane='create')
+    pool.submit('b', time.sleep, 0, lane='delete')
+    stats = pool.stats()
+    assert(stats['create']['queued'] == 1 and stats['delete']['queued'] == 1)
+    pool.start()
+    time.sleep(0.05)
+    release.set()
+    pool.stop()
+    stats = pool.stats()
+    for lane in ('create', 'delete'):
+        assert(stats[lane]['queued'] == 0 and stats[lane]['running'] == 0)
+        assert(stats[lane]['completed'] == 1)
+        assert(stats[lane]['latency_seconds'] >= stats[lane]['wait_seconds'])
+    # The delete had to wait for the only worker
+    assert(stats['delete']['max_wait_seconds'] >= 0.05)
+
+
+def test_get_event_lane(create_event_v2, delete_event):
+    assert(_get_event_lane(create_event_v2) == 'create')
+    assert(_get_event_lane(delete_event) == 'delete')
+    assert(_get_event_lane('not an event') == 'create')
+
+
+def test_offset_tracker_commits_lowest_incomplete():
+    offsets = OffsetTracker()
+    for offset in range(5):
+        offsets.add('p0', offset)
+    offsets.complete('p0', 0)
+    offsets.complete('p0', 2)
+    offsets.complete('p0', 3)
+    assert(offsets.committable() == {'p0': 1})
+    offsets.mark_committed({'p0': 1})
+    assert(offsets.committable() == {})
+    offsets.complete('p0', 1)
+    offsets.complete('p0', 4)
+    assert(offsets.committable() == {'p0': 5})
+
+
+def test_consume(create_event_v2, delete_event):
+    conn = CFSSessionController({'RESOURCE_NAMESPACE': 'foo'})
+    conn.event_workers.start()
+    messages = [Mock(offset=10, value=create_event_v2), Mock(offset=11, value=delete_event)]
+    kafka = Mock()
+    kafka.consumer.poll.return_value = {'p0': messages}
+    offsets = OffsetTracker()
+    handled = []
+    with patch.object(CFSSessionController, '_handle_event',
+                      side_effect=lambda event, _: handled.append(event['type'])):
+        conn._consume(kafka, offsets)
+        conn.event_workers.stop()
+    assert(handled == ['CREATE', 'DELETE'])
+    conn._commit_offsets(kafka, offsets)
+    kafka.commit.assert_called_with({'p0': 12})
@@ -0,0 +1,184 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the cray/cfs/inventory/image module """
+from concurrent.futures import Future
+from unittest.mock import patch, Mock
+
+import yaml
+
+from kubernetes import config
+config.load_incluster_config = Mock()
+config.load_kube_config = Mock()
+
+import cray.cfs.inventory.image as image_inventory  # noqa: E402
+from cray.cfs.inventory.image import ImageRootInventory, IMAGE_HOST_GROUP  # noqa: E402
+
+IMAGES = ['image-1', 'image-2', 'image-3']
+SESSION = {
+    'name': 'session-1',
+    'configuration': {'name': 'config-1'},
+    'target': {'definition': 'image', 'groups': [
+        {'name': 'Compute', 'members': IMAGES[:2]},
+        {'name': 'Application', 'members': IMAGES[2:]}]},
+}
+
+
+def containers():
+    return [(image, 'job-' + image, 'name-' + image, image + '.ims', 22) for image in IMAGES]
+
+
+def make_inventory(tmp_path, streaming):
+    inventory = ImageRootInventory(SESSION, inventory_file=str(tmp_path / 'hosts' / 'inv.yaml'),
+                                   namespace='services', streaming=streaming)
+    inventory.inventory_dir = str(tmp_path / 'hosts')
+    return inventory
+
+
+def generate(inventory, tmp_path, on_ready=None):
+    def request_ssh_containers(*args, **kwargs):
+        for container in containers():
+            if on_ready:
+                on_ready(container[0])
+            yield container
+
+    with patch.object(ImageRootInventory, '_upload_public_key', return_value='key'), \
+            patch.object(ImageRootInventory, '_remove_public_key'), \
+            patch.object(ImageRootInventory, '_request_ssh_containers',
+                         side_effect=request_ssh_containers), \
+            patch.object(image_inventory, 'configuration_requires_dkms', return_value=False), \
+            patch.object(image_inventory, 'IMAGE_TO_JOB_FILE', str(tmp_path / 'i2j.yaml')), \
+            patch.object(image_inventory, 'READY_DIR', str(tmp_path / 'ready')):
+        return inventory.generate()
+
+
+def test_generate(tmp_path):
+    inventory = generate(make_inventory(tmp_path, streaming=False), tmp_path)
+    assert(sorted(inventory[IMAGE_HOST_GROUP]['hosts']) == IMAGES)
+    assert(sorted(inventory['Compute']['hosts']) == IMAGES[:2])
+    assert(inventory[IMAGE_HOST_GROUP]['hosts']['image-3']['ansible_host'] == 'image-3.ims')
+    assert(not (tmp_path / 'ready').exists())
+
+
+def test_generate_streaming(tmp_path):
+    seen = []
+
+    def on_ready(image):
+        # Each image is written and listed before the next one is ready
+        ready = sorted(path.name for path in (tmp_path / 'ready').glob('*')) \
+            if (tmp_path / 'ready').exists() else []
+        written = yaml.safe_load((tmp_path / 'hosts' / 'inv.yaml').read_text()) \
+            if ready else {IMAGE_HOST_GROUP: {'hosts': {}}}
+        assert(sorted(written[IMAGE_HOST_GROUP]['hosts']) == ready)
+        seen.append(ready)
+
+    inventory = generate(make_inventory(tmp_path, streaming=True), tmp_path, on_ready=on_ready)
+    assert(seen == [[], IMAGES[:1], IMAGES[:2]])
+    assert(sorted(path.name for path in (tmp_path / 'ready').glob('*')) == IMAGES)
+    assert((tmp_path / 'ready' / 'image-1').read_text() == 'image-1\n')
+    i2j = yaml.safe_load((tmp_path / 'i2j.yaml').read_text())
+    assert(i2j['name-image-3'] == {'job_id': 'job-image-3', 'image_id': 'image-3'})
+    assert(sorted(inventory[IMAGE_HOST_GROUP]['hosts']) == IMAGES)
+    # No temporary files are left behind
+    assert(not list(tmp_path.glob('.*.tmp')))
+
+
+def mock_ims_session(images):
+    def get(url):
+        image_id = url.rsplit('/images', 1)[1].lstrip('/')
+        if not image_id:
+            return Mock(status_code=200, json=Mock(return_value=images))
+        found = [image for image in images if image['id'] == image_id]
+        return Mock(status_code=200 if found else 404,
+                    json=Mock(return_value=found[0] if found else None))
+    return Mock(get=Mock(side_effect=get))
+
+
+def test_get_ims_api_probes_once():
+    session = Mock()
+    with patch.object(image_inventory, '_ims_api', None), \
+            patch.object(image_inventory, 'ims_sessions', return_value=session):
+        assert(image_inventory.get_IMS_API()[2] is session)
+        assert(image_inventory.get_IMS_API()[2] is session)
+    session.get.assert_called_once_with('http://cray-ims:80/healthz/ready')
+
+
+def test_get_image_names_per_image_and_caches():
+    images = [{'id': image, 'name': 'name-' + image} for image in IMAGES]
+    session = mock_ims_session(images)
+    with patch.object(image_inventory, '_image_names', {}), \
+            patch.object(image_inventory, 'get_IMS_API', return_value=('ims', 80, session)), \
+            patch.object(image_inventory, 'ims_sessions', return_value=session):
+        assert(image_inventory.get_image_names(IMAGES[:2] + ['missing']) ==
+               {image: 'name-' + image for image in IMAGES[:2]})
+        assert(sorted(call.args[0] for call in session.get.call_args_list) ==
+               ['http://ims:80/images/image-1', 'http://ims:80/images/image-2',
+                'http://ims:80/images/missing'])
+        # Known names are not read again
+        session.get.reset_mock()
+        assert(image_inventory.get_image_names(IMAGES) ==
+               {image: 'name-' + image for image in IMAGES})
+        session.get.assert_called_once_with('http://ims:80/images/image-3')
+
+
+def test_get_image_names_lists_above_threshold():
+    images = [{'id': image, 'name': 'name-' + image} for image in IMAGES]
+    session = mock_ims_session(images)
+    with patch.object(image_inventory, '_image_names', {}), \
+            patch.object(image_inventory, 'IMAGE_NAMES_LIST_THRESHOLD', 2), \
+            patch.object(image_inventory, 'get_IMS_API', return_value=('ims', 80, session)), \
+            patch.object(image_inventory, 'ims_sessions', return_value=session):
+        assert(image_inventory.get_image_names(IMAGES) ==
+               {image: 'name-' + image for image in IMAGES})
+    session.get.assert_called_once_with('http://ims:80/images')
+
+
+def test_get_archive_names():
+    target = {'image_map': [{'source_id': 'image-1', 'result_name': 'mapped'}]}
+    with patch.object(image_inventory, 'get_image_names',
+                      return_value={'image-2': 'name-image-2'}) as get_image_names:
+        archive_names = ImageRootInventory._get_archive_names(IMAGES, 'session-1', target)
+    get_image_names.assert_called_once_with(IMAGES[1:])
+    assert(archive_names == {'image-1': 'mapped', 'image-2': 'name-image-2_cfs_session-1'})
+
+
+def test_request_ssh_containers_timeout():
+    ready = Future()
+    ready.set_result(containers()[0])
+    session = Mock()
+    waiter = Mock()
+    waiter.return_value.wait.side_effect = \
+        lambda ims_id, job_id: ready if ims_id == 'image-1' else Future()
+    archive_names = {image: 'name-' + image for image in IMAGES[:2]}
+    with patch.object(image_inventory, 'get_IMS_API', return_value=('ims', 80, session)), \
+            patch.object(image_inventory, 'ims_sessions', return_value=session), \
+            patch.object(image_inventory, 'SSHContainerWaiter', waiter), \
+            patch.object(ImageRootInventory, '_get_archive_names', return_value=archive_names), \
+            patch.object(ImageRootInventory, '_request_ims_ssh',
+                         side_effect=lambda host, port, ims_id, *args: 'job-' + ims_id):
+        results = list(ImageRootInventory._request_ssh_containers(
+            IMAGES, 'session-1', 'key', SESSION['target'], timeout=0.2))
+    assert(results == containers()[:1])
+    # The IMS job for the image that was not ready is deleted, and the waiter is stopped
+    session.delete.assert_called_once_with('http://ims:80/jobs/job-image-2')
+    waiter.return_value.close.assert_called_once()
@@ -0,0 +1,156 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the cray/cfs/operator/events/job_builder.py module """
+from concurrent.futures import ThreadPoolExecutor
+import copy
+from unittest.mock import patch, Mock
+
+from kubernetes import client, config
+config.load_incluster_config = Mock()
+config.load_kube_config = Mock()
+
+from cray.cfs.operator.events import CFSSessionController  # pylint: disable=E402
+from cray.cfs.operator.events.job_builder import _get_ttl_seconds  # pylint: disable=E402
+from cray.cfs.utils.tracing import SpanContext, TRACEPARENT_ANNOTATION  # pylint: disable=E402
+
+from test_job_template import ENV, session_cases, mock_options  # pylint: disable=E402
+
+STRESS_JOBS = 4000
+STRESS_WORKERS = 16
+
+
+def _stress_case(i):
+    """Returns a session that differs from every other case in each per-session field"""
+    _, base, _, layers, _ = session_cases()[i % 3]
+    session = copy.deepcopy(base)
+    session['name'] = 'session-{}'.format(i)
+    session['configuration'] = {'name': 'config-{}'.format(i), 'limit': str(i)}
+    session['ansible']['config'] = 'ansible-cfg-{}'.format(i % 50)
+    layers = copy.deepcopy(layers)
+    layers[0][1]['commit'] = 'commit-{}'.format(i)
+    return session, 'cfs-job-{}'.format(i), layers, 'token-{}'.format(i)
+
+
+def _check_job(i, job):
+    session, job_id, layers, token = _stress_case(i)
+    pod = job.spec.template
+    assert(job.metadata.name == job_id)
+    assert(pod.metadata.name == job_id)
+    assert(pod.metadata.labels['cfsession'] == session['name'])
+    assert(pod.metadata.labels['configuration'] == session['configuration']['name'])
+    volumes = {volume.name: volume for volume in pod.spec.volumes}
+    assert(volumes['ansible-config'].config_map.name == session['ansible']['config'])
+
+    containers = pod.spec.init_containers + pod.spec.containers
+    per_session = {
+        'SESSION_NAME': session['name'],
+        'SESSION_CONFIGURATION_NAME': session['configuration']['name'],
+        'SESSION_CONFIGURATION_LIMIT': session['configuration']['limit'],
+        'VAULT_TOKEN': token,
+        'INVENTORY_TYPE': session['target']['definition'],
+    }
+    for container in containers:
+        for env in container.env:
+            if env.name in per_session:
+                assert(env.value == per_session[env.name])
+    ansible = [c for c in pod.spec.containers if c.name == 'ansible'][0]
+    assert('commit-{}'.format(i) in ansible.args[0])
+
+
+def test_concurrent_builds_do_not_share_session_state():
+    with patch('cray.cfs.operator.events.session_events.options', mock_options()):
+        conn = CFSSessionController(ENV)
+
+        def build(i):
+            session, job_id, layers, token = _stress_case(i)
+            return conn._build_k8s_job(session, job_id, layers,
+                                       client.V1EnvVar(name='VAULT_TOKEN', value=token))
+
+        with ThreadPoolExecutor(max_workers=STRESS_WORKERS) as executor:
+            jobs = list(executor.map(build, range(STRESS_JOBS)))
+    for i, job in enumerate(jobs):
+        _check_job(i, job)
+
+
+def test_builder_reads_options_once():
+    options = mock_options()
+    with patch('cray.cfs.operator.events.session_events.options', options):
+        conn = CFSSessionController(ENV)
+        _, session, job_id, layers, _ = session_cases()[1]
+        job = conn._build_k8s_job(session, job_id, layers,
+                                  client.V1EnvVar(name='VAULT_TOKEN', value=''))
+    assert(job.spec.ttl_seconds_after_finished == 7 * 86400)
+    options.refresh.assert_not_called()
+
+
+def test_builder_passes_trace_context():
+    env = dict(ENV, CFS_TRACE_EXPORTER='otlp', CFS_TRACE_OTLP_ENDPOINT='http://collector/v1/traces')
+    trace = SpanContext.new()
+    with patch('cray.cfs.operator.events.session_events.options', mock_options()):
+        conn = CFSSessionController(env)
+        _, session, job_id, layers, _ = session_cases()[1]
+        job = conn._build_k8s_job(session, job_id, layers,
+                                  client.V1EnvVar(name='VAULT_TOKEN', value=''),
+                                  trace_context=trace)
+        untraced = conn._build_k8s_job(session, job_id, layers,
+                                       client.V1EnvVar(name='VAULT_TOKEN', value=''))
+    assert(job.metadata.annotations == {TRACEPARENT_ANNOTATION: trace.traceparent})
+    assert(job.spec.template.metadata.annotations == job.metadata.annotations)
+    pod = job.spec.template.spec
+    for container in pod.init_containers + pod.containers:
+        env = {var.name: var.value for var in container.env}
+        assert(env['TRACEPARENT'] == trace.traceparent)
+        assert(env['CFS_TRACE_EXPORTER'] == 'otlp')
+    assert(untraced.metadata.annotations is None)
+    pod = untraced.spec.template.spec
+    for container in pod.init_containers + pod.containers:
+        assert('TRACEPARENT' not in [var.name for var in container.env])
+
+
+def test_builder_passes_image_settings():
+    env = dict(ENV, CFS_INVENTORY_STREAMING='true', CFS_IMAGE_SETUP_TIMEOUT='600')
+    with patch('cray.cfs.operator.events.session_events.options', mock_options()):
+        conn = CFSSessionController(env)
+        jobs = {name: conn._build_k8s_job(session, job_id, layers,
+                                          client.V1EnvVar(name='VAULT_TOKEN', value=''))
+                for name, session, job_id, layers, _ in session_cases()}
+    for name, job in jobs.items():
+        containers = {c.name: {var.name: var.value for var in c.env}
+                      for c in job.spec.template.spec.containers}
+        for container in ('inventory', 'ansible'):
+            if name == 'image':
+                assert(containers[container]['CFS_INVENTORY_STREAMING'] == 'true')
+                assert(containers[container]['CFS_IMAGE_SETUP_TIMEOUT'] == '600')
+            else:
+                assert('CFS_INVENTORY_STREAMING' not in containers[container])
+        if name == 'image':
+            assert(containers['teardown']['CFS_IMAGE_SETUP_TIMEOUT'] == '600')
+
+
+def test_get_ttl_seconds():
+    assert(_get_ttl_seconds('') == 0)
+    assert(_get_ttl_seconds('30m') == 1800)
+    assert(_get_ttl_seconds('2H') == 7200)
+    assert(_get_ttl_seconds('1w') == 604800)
+    assert(_get_ttl_seconds('7x') == 0)
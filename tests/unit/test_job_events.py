@@ -1,7 +1,7 @@
 #
 # MIT License
 #
-# (C) Copyright 2019-2022 Hewlett Packard Enterprise Development LP
+# (C) Copyright 2019-2022, 2026 Hewlett Packard Enterprise Development LP
 #
 # Permission is hereby granted, free of charge, to any person obtaining a
 # copy of this software and associated documentation files (the "Software"),
@@ -22,35 +22,178 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 #
 """ Test the cray/cfs/operator/v1/job_events.py module """
+import datetime
 from unittest.mock import patch, Mock
 
-from kubernetes.client import BatchV1Api
+from kubernetes.client import BatchV1Api, CoreV1Api
+from kubernetes.client.rest import ApiException
 from kubernetes import config
 config.load_incluster_config = Mock()
 config.load_kube_config = Mock()
 
+from cray.cfs.operator.cfs.status_writer import SessionStatusWriter
 from cray.cfs.operator.events.session_events import CFSJobMonitor
+from cray.cfs.utils.tracing import SpanContext, TRACEPARENT_ANNOTATION
 
 
 def test__sync_sessions(session_complete, session_running):
-    with patch('cray.cfs.operator.cfs.sessions.get_sessions') as get_sessions:
-        get_sessions.return_value = [session_complete, session_running]
+    with patch('cray.cfs.operator.cfs.sessions.iter_sessions') as iter_sessions:
+        iter_sessions.return_value = [session_complete, session_running]
         monitor = CFSJobMonitor({'RESOURCE_NAMESPACE': 'foo'})
         monitor._sync_sessions()
         assert(len(monitor.sessions) == 1)
         assert(list(monitor.sessions.keys())[0] == session_running['name'])
 
 
-def test_monitor_sessions(read_job_mock, session_waiting_for_start, session_waiting_for_complete):
-    with patch.object(BatchV1Api, 'read_namespaced_job', read_job_mock):
-        with patch('cray.cfs.operator.cfs.sessions.update_session_status'):
-            with patch('cray.cfs.operator.cfs.sessions.get_session'):
-                monitor = CFSJobMonitor({'RESOURCE_NAMESPACE': 'foo'})
-                sessions = [session_waiting_for_start, session_waiting_for_complete]
-                monitor.sessions = {session['name']: session for session in sessions}
-                monitor.monitor_sessions()
-                assert(len(monitor.sessions) == 1)
-                assert(list(monitor.sessions.keys())[0] == session_waiting_for_start['name'])
+def test__sync_sessions_incremental():
+    with patch('cray.cfs.operator.cfs.sessions.iter_sessions', return_value=[]) as iter_sessions:
+        monitor = CFSJobMonitor({'RESOURCE_NAMESPACE': 'foo'})
+        monitor._sync_sessions()
+        parameters = [c.kwargs['parameters'] for c in iter_sessions.call_args_list]
+        assert(parameters == [{'status': 'pending'}, {'status': 'running'}])
+
+        iter_sessions.reset_mock()
+        monitor._last_sync -= 60 * 4.5
+        monitor._sync_sessions()
+        parameters = [c.kwargs['parameters'] for c in iter_sessions.call_args_list]
+        assert(parameters == [{'status': 'pending', 'max_age': '6m'},
+                              {'status': 'running', 'max_age': '6m'}])
+
+        iter_sessions.reset_mock()
+        monitor._sync_sessions(full=True)
+        parameters = [c.kwargs['parameters'] for c in iter_sessions.call_args_list]
+        assert(parameters == [{'status': 'pending'}, {'status': 'running'}])
+
+
+def test_monitor_sessions(job_started, job_completed, session_waiting_for_start,
+                          session_waiting_for_complete, session_waiting_for_fail):
+    jobs = Mock()
+    jobs.items = [job_started, job_completed]
+    with patch.object(BatchV1Api, 'list_namespaced_job', return_value=jobs):
+        with patch.object(BatchV1Api, 'read_namespaced_job',
+                          side_effect=ApiException(status=404)) as read_job:
+            with patch('cray.cfs.operator.cfs.sessions.update_session_status') as update:
+                with patch('cray.cfs.operator.cfs.sessions.get_session'):
+                    monitor = CFSJobMonitor({'RESOURCE_NAMESPACE': 'foo'})
+                    sessions = [session_waiting_for_start, session_waiting_for_complete,
+                                session_waiting_for_fail]
+                    for session in sessions:
+                        monitor.add_session(session)
+                    monitor.informer.relist()
+                    # Completed sessions are monitored until their completion is written
+                    assert(len(monitor.sessions) == 3)
+                    monitor.status_writer.flush()
+                    assert(list(monitor.sessions.keys()) == [session_waiting_for_start['name']])
+                    # Only the job missing from the informer is read from the API
+                    read_job.assert_called_once()
+                    update.assert_any_call(session_waiting_for_fail['name'],
+                                           data={'status': 'complete', 'succeeded': 'unknown'})
+
+
+def test_handle_job_event(job_completed, session_waiting_for_complete):
+    with patch('cray.cfs.operator.cfs.sessions.update_session_status') as update:
+        monitor = CFSJobMonitor({'RESOURCE_NAMESPACE': 'foo'})
+        monitor.add_session(session_waiting_for_complete)
+        monitor.informer.handle_event('BOOKMARK', job_completed)
+        update.assert_not_called()
+        monitor.informer.handle_event('MODIFIED', job_completed)
+        monitor.status_writer.flush()
+        update.assert_called_once()
+        assert(not monitor.sessions)
+        assert(not monitor._session_jobs)
+
+
+def test_completion_outlasts_cfs_outage(job_completed, session_waiting_for_complete):
+    writer = SessionStatusWriter(window=60, max_attempts=2)
+    with patch('cray.cfs.operator.cfs.sessions.update_session_status',
+               side_effect=Exception('CFS is unavailable')) as update:
+        monitor = CFSJobMonitor({'RESOURCE_NAMESPACE': 'foo'}, status_writer=writer)
+        monitor.informer.handle_event('ADDED', job_completed)
+        monitor.add_session(session_waiting_for_complete)
+        # Checks while the completion is being retried do not queue it again
+        monitor.informer.handle_event('MODIFIED', job_completed)
+        assert(writer.stats()['updates'] == 1)
+        for _ in range(2):
+            writer.flush()
+        assert(writer.stats()['dropped'] == 1)
+        # The completion was given up on, so the session is still monitored
+        assert(list(monitor.sessions) == [session_waiting_for_complete['name']])
+
+        update.side_effect = None
+        monitor.monitor_sessions()
+        writer.flush()
+        assert(update.call_count == 3)
+        assert(update.call_args.kwargs['data']['status'] == 'complete')
+        assert(not monitor.sessions)
+
+
+def test_session_start_time_observed(session_waiting_for_start):
+    job = Mock()
+    job.status.start_time = datetime.datetime(2026, 1, 1, 0, 0, 30, tzinfo=datetime.timezone.utc)
+    job.status.completion_time = None
+    job.status.failed = None
+    session_waiting_for_start['status']['session']['status'] = 'pending'
+    session_waiting_for_start['status']['session']['start_time'] = '2026-01-01T00:00:00'
+    with patch('cray.cfs.operator.metrics.SESSION_START_SECONDS') as start_seconds, \
+            patch('cray.cfs.operator.cfs.sessions.update_session_status'):
+        monitor = CFSJobMonitor({'RESOURCE_NAMESPACE': 'foo'})
+        monitor._update_from_job(session_waiting_for_start, job)
+        start_seconds.observe.assert_called_once_with(30)
+        monitor._update_from_job(session_waiting_for_start, job)
+        start_seconds.observe.assert_called_once()
+        monitor.status_writer.flush()
+
+
+def test_session_traced_on_completion(session_waiting_for_complete):
+    trace = SpanContext.new()
+    start = datetime.datetime(2026, 1, 1, 0, 0, 10, tzinfo=datetime.timezone.utc)
+    job = Mock()
+    job.metadata.name = 'complete'
+    job.metadata.annotations = {TRACEPARENT_ANNOTATION: trace.traceparent}
+    job.metadata.creation_timestamp = start
+    job.status.start_time = start + datetime.timedelta(seconds=1)
+    job.status.completion_time = start + datetime.timedelta(seconds=60)
+    job.status.failed = None
+    pod = Mock()
+    pod.metadata.creation_timestamp = start + datetime.timedelta(seconds=1)
+    pod.status.conditions = [Mock(type='PodScheduled', status='True',
+                                  last_transition_time=start + datetime.timedelta(seconds=3))]
+    clone = Mock()
+    clone.name = 'git-clone'
+    clone.state.terminated = Mock(started_at=start + datetime.timedelta(seconds=5),
+                                  finished_at=start + datetime.timedelta(seconds=9),
+                                  exit_code=0, reason='Completed')
+    pod.status.init_container_statuses = [clone]
+    pod.status.container_statuses = []
+    session_waiting_for_complete['status']['session']['start_time'] = '2026-01-01T00:00:00'
+    exporter = Mock(enabled=True)
+    with patch('cray.cfs.operator.cfs.sessions.update_session_status'), \
+            patch.object(CoreV1Api, 'list_namespaced_pod', return_value=Mock(items=[pod])):
+        monitor = CFSJobMonitor({'RESOURCE_NAMESPACE': 'foo'})
+        monitor.tracer.exporter = exporter
+        assert(monitor._update_from_job(session_waiting_for_complete, job))
+        monitor.status_writer.flush()
+    spans = {call.args[0].name: call.args[0] for call in exporter.export.call_args_list}
+    assert(sorted(spans) == ['cfs.session', 'container.git-clone', 'job.start',
+                             'pod.scheduling'])
+    session = spans.pop('cfs.session')
+    assert(session.context == trace)
+    assert(session.parent_id is None)
+    assert((session.end_time - session.start_time) / 1e9 == 70)
+    assert(all(span.parent_id == trace.span_id for span in spans.values()))
+    assert(spans['container.git-clone'].end_time - spans['container.git-clone'].start_time ==
+           4 * 10 ** 9)
+
+
+def test_handle_job_event_before_add_session(job_completed, session_waiting_for_complete):
+    with patch('cray.cfs.operator.cfs.sessions.update_session_status') as update:
+        monitor = CFSJobMonitor({'RESOURCE_NAMESPACE': 'foo'})
+        monitor.informer.handle_event('ADDED', job_completed)
+        update.assert_not_called()
+        monitor.add_session(session_waiting_for_complete)
+        monitor.status_writer.flush()
+        update.assert_called_once()
+        assert(not monitor.sessions)
 
 
 def test_session_complete(read_job_mock, session_no_job, session_missing_job,
@@ -81,6 +224,7 @@ def test_session_complete(read_job_mock, session_no_job, session_missing_job,
 
                 complete = monitor.session_complete(session_waiting_for_fail)
                 assert(complete)
+                monitor.status_writer.flush()
 
 
 def test_cleanup_jobs(job_completed, job_started, session_waiting_for_complete):
@@ -88,9 +232,35 @@ def test_cleanup_jobs(job_completed, job_started, session_waiting_for_complete):
     jobs.items = [job_completed, job_started]
     with patch.object(BatchV1Api, 'list_namespaced_job', return_value=jobs):
         with patch.object(BatchV1Api, 'delete_namespaced_job'):
-            with patch('cray.cfs.operator.cfs.sessions.get_sessions',
-                       return_value=[session_waiting_for_complete]):
+            with patch('cray.cfs.operator.cfs.sessions.iter_sessions',
+                       return_value=iter([session_waiting_for_complete])):
                 monitor = CFSJobMonitor({'RESOURCE_NAMESPACE': 'foo'})
                 monitor.cleanup_jobs()
-                BatchV1Api.delete_namespaced_job.assert_called_once()
+                BatchV1Api.delete_namespaced_job.assert_called_once_with('start', 'foo')
 
+
+def test_cleanup_jobs_parallel():
+    jobs = Mock()
+    jobs.items = []
+    for i in range(50):
+        job = Mock()
+        job.metadata.name = 'job-{}'.format(i)
+        jobs.items.append(job)
+    sessions = []
+    for i in range(0, 50, 2):
+        session = {'name': 'session-{}'.format(i),
+                   'status': {'session': {'job': 'job-{}'.format(i)}}}
+        sessions.append(session)
+
+    def delete_job(job_name, namespace):
+        if job_name == 'job-1':
+            raise ApiException(status=404)
+    with patch.object(BatchV1Api, 'list_namespaced_job', return_value=jobs):
+        with patch.object(BatchV1Api, 'delete_namespaced_job', side_effect=delete_job):
+            with patch('cray.cfs.operator.cfs.sessions.iter_sessions',
+                       return_value=iter(sessions)):
+                monitor = CFSJobMonitor({'RESOURCE_NAMESPACE': 'foo',
+                                         'CFS_OPERATOR_CLEANUP_CONCURRENCY': '4'})
+                assert(monitor._find_orphaned_jobs(['job-0', 'job-1']) == {'job-1'})
+                assert(monitor._delete_jobs({'job-{}'.format(i) for i in range(1, 50, 2)}) == 24)
+                assert(BatchV1Api.delete_namespaced_job.call_count == 25)
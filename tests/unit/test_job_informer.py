@@ -0,0 +1,130 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the cray/cfs/operator/events/job_informer.py module """
+from unittest.mock import patch, Mock
+
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+
+from cray.cfs.operator.events.job_informer import JobInformer
+
+
+def _job(name, session_name, resource_version='1'):
+    job = Mock()
+    job.metadata.name = name
+    job.metadata.labels = {'cfsession': session_name and session_name[:60]}
+    job.metadata.resource_version = resource_version
+    job.spec.template.spec.containers = [
+        client.V1Container(name='inventory', env=[
+            client.V1EnvVar(name='SESSION_NAME', value=session_name)])]
+    return job
+
+
+def _job_list(*jobs, resource_version='10'):
+    result = Mock()
+    result.items = list(jobs)
+    result.metadata.resource_version = resource_version
+    return result
+
+
+def test_relist_indexes_jobs():
+    api = Mock()
+    api.list_namespaced_job.return_value = _job_list(_job('a', 's1'), _job('b', 's1'),
+                                                     _job('c', 's2'))
+    informer = JobInformer(api, 'services')
+    assert(not informer.has_synced)
+    informer.relist()
+    assert(informer.has_synced)
+    assert(sorted(informer.list_names()) == ['a', 'b', 'c'])
+    assert(sorted(informer.by_session('s1')) == ['a', 'b'])
+    assert(informer.get('c').metadata.name == 'c')
+    assert(informer.stats()['cache_size'] == 3)
+
+
+def test_by_session_checks_full_name():
+    prefix = 's' * 60
+    informer = JobInformer(Mock(), 'services')
+    informer.handle_event('ADDED', _job('a', prefix + '-1'))
+    informer.handle_event('ADDED', _job('b', prefix + '-2'))
+    informer.handle_event('ADDED', _job('c', prefix))
+    assert(informer.by_session(prefix + '-1') == ['a'])
+    assert(informer.by_session(prefix) == ['c'])
+
+
+def test_stats_relist_age():
+    api = Mock()
+    api.list_namespaced_job.return_value = _job_list()
+    informer = JobInformer(api, 'services')
+    assert(informer.stats()['relist_age_seconds'] is None)
+    with patch('cray.cfs.operator.events.job_informer.time.monotonic', return_value=100):
+        informer.relist()
+    # Watch events do not count as a relist
+    with patch('cray.cfs.operator.events.job_informer.time.monotonic', return_value=130):
+        informer.handle_event('ADDED', _job('a', 's1'))
+        assert(informer.stats()['relist_age_seconds'] == 30)
+
+
+def test_relist_dispatches_differences():
+    api = Mock()
+    events = []
+    syncs = []
+    informer = JobInformer(api, 'services')
+    informer.add_handler(lambda event_type, job: events.append((event_type, job.metadata.name)))
+    informer.add_sync_handler(lambda: syncs.append(True))
+    api.list_namespaced_job.return_value = _job_list(_job('a', 's1'), _job('b', 's2'))
+    informer.relist()
+    api.list_namespaced_job.return_value = _job_list(_job('a', 's1', '2'), _job('c', 's3'))
+    events.clear()
+    informer.relist()
+    assert(sorted(events) == [('ADDED', 'c'), ('DELETED', 'b'), ('MODIFIED', 'a')])
+    assert(informer.by_session('s2') == [])
+    assert(len(syncs) == 2)
+
+
+def test_handle_event():
+    informer = JobInformer(Mock(), 'services')
+    events = []
+    informer.add_handler(lambda event_type, job: events.append(event_type))
+    job = _job('a', 's1', '5')
+    informer.handle_event('ADDED', job)
+    assert(informer.by_session('s1') == ['a'])
+    informer.handle_event('BOOKMARK', _job('x', None, '6'))
+    assert(informer.list_names() == ['a'])
+    informer.handle_event('DELETED', job)
+    assert(informer.get('a') is None)
+    assert(informer.by_session('s1') == [])
+    assert(events == ['ADDED', 'DELETED'])
+    assert(informer._resource_version == '5')
+
+
+def test_watch_returns_on_expired():
+    def stream(*args, **kwargs):
+        yield {'type': 'MODIFIED', 'object': _job('a', 's1', '7')}
+        raise ApiException(status=410)
+    informer = JobInformer(Mock(), 'services')
+    with patch('cray.cfs.operator.events.job_informer.watch.Watch') as watch:
+        watch.return_value.stream.side_effect = stream
+        informer.watch(60)
+    assert(informer.get('a') is not None)
+    assert(informer._resource_version == '7')
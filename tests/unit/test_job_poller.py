@@ -0,0 +1,169 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the cray/cfs/utils/job_poller.py module """
+from concurrent.futures import Future, TimeoutError
+import threading
+from unittest.mock import Mock
+
+import pytest
+import requests
+
+from cray.cfs.utils.job_poller import chain, IMSJobPoller, IMSJobNotFound
+
+
+class FakeIMS:
+    """Moves each job to waiting_on_user after a number of reads of the job list"""
+
+    def __init__(self, job_ids, ready_after):
+        self.statuses = {job_id: 'creating' for job_id in job_ids}
+        self.ready_after = ready_after
+        self.reads = 0
+        self.lock = threading.Lock()
+
+    def get_jobs(self):
+        with self.lock:
+            self.reads += 1
+            for job_id, reads in self.ready_after.items():
+                if self.reads >= reads:
+                    self.statuses[job_id] = 'waiting_on_user'
+            return [{'id': job_id, 'status': status} for job_id, status in self.statuses.items()]
+
+
+def ready(job):
+    return job['status'] == 'waiting_on_user'
+
+
+def test_jobs_are_polled_together():
+    job_ids = ['job-{}'.format(i) for i in range(40)]
+    ims = FakeIMS(job_ids, {job_id: 1 + i % 3 for i, job_id in enumerate(job_ids)})
+    poller = IMSJobPoller(ims.get_jobs, min_interval=0.01, max_interval=0.01)
+    futures = [poller.watch(job_id, ready) for job_id in job_ids]
+    jobs = [future.result(timeout=5) for future in futures]
+    poller.stop()
+    assert([job['id'] for job in jobs] == job_ids)
+    # One request per poll, not per job
+    assert(ims.reads <= 4)
+    assert(poller.polls == ims.reads)
+
+
+def test_single_job_is_read_directly():
+    get_jobs = Mock()
+    get_job = Mock(return_value={'id': 'job-1', 'status': 'waiting_on_user'})
+    poller = IMSJobPoller(get_jobs, get_job=get_job, min_interval=0.01)
+    assert(poller.watch('job-1', ready).result(timeout=5)['id'] == 'job-1')
+    poller.stop()
+    get_job.assert_called_with('job-1')
+    get_jobs.assert_not_called()
+
+
+def test_missing_job_fails():
+    poller = IMSJobPoller(Mock(return_value=[{'id': 'job-1', 'status': 'creating'}]),
+                          min_interval=0.01)
+    future = poller.watch('job-2', ready)
+    with pytest.raises(IMSJobNotFound):
+        future.result(timeout=5)
+    poller.stop()
+
+
+def test_transient_poll_errors_are_retried():
+    unavailable = requests.exceptions.HTTPError(response=Mock(status_code=503))
+    get_jobs = Mock(side_effect=[requests.exceptions.ConnectionError(), unavailable,
+                                 [{'id': 'job-1', 'status': 'waiting_on_user'},
+                                  {'id': 'job-2', 'status': 'waiting_on_user'}]])
+    poller = IMSJobPoller(get_jobs, min_interval=0.01)
+    futures = [poller.watch('job-1', ready), poller.watch('job-2', ready)]
+    # No watch fails while IMS is unavailable
+    assert([future.result(timeout=5)['id'] for future in futures] == ['job-1', 'job-2'])
+    poller.stop()
+    assert(get_jobs.call_count == 3)
+
+
+def test_poll_errors_fail_watches():
+    poller = IMSJobPoller(Mock(side_effect=ValueError('bad response')), min_interval=0.01)
+    future = poller.watch('job-1', ready)
+    with pytest.raises(ValueError):
+        future.result(timeout=5)
+    poller.stop()
+
+
+def test_job_errors_fail_only_that_job():
+    forbidden = requests.exceptions.HTTPError(response=Mock(status_code=403))
+
+    def get_job(job_id):
+        if job_id == 'job-2':
+            raise forbidden
+        return {'id': job_id, 'status': 'waiting_on_user'}
+    poller = IMSJobPoller(Mock(), get_job=get_job, min_interval=0.01)
+    futures = [poller.watch('job-1', ready), poller.watch('job-2', ready)]
+    assert(futures[0].result(timeout=5)['id'] == 'job-1')
+    with pytest.raises(requests.exceptions.HTTPError):
+        futures[1].result(timeout=5)
+    poller.stop()
+
+
+def test_watch_timeout():
+    poller = IMSJobPoller(Mock(side_effect=requests.exceptions.ConnectionError()),
+                          min_interval=0.01, max_interval=0.01)
+    future = poller.watch('job-1', ready, timeout=0.05)
+    with pytest.raises(TimeoutError):
+        future.result(timeout=5)
+    poller.stop()
+
+
+def test_small_sets_are_read_per_job():
+    get_jobs = Mock(return_value=[{'id': 'job-{}'.format(i), 'status': 'creating'}
+                                  for i in range(3)])
+    get_job = Mock(side_effect=lambda job_id: None if job_id == 'missing' else
+                   {'id': job_id, 'status': 'creating'})
+    poller = IMSJobPoller(get_jobs, get_job=get_job, list_threshold=2)
+    jobs, errors = poller._poll(['job-0', 'missing'])
+    assert(sorted(jobs) == ['job-0'])
+    assert(errors == {})
+    get_jobs.assert_not_called()
+    # Above the threshold, the job list is read instead
+    jobs, _ = poller._poll(['job-0', 'job-1', 'job-2'])
+    assert(sorted(jobs) == ['job-0', 'job-1', 'job-2'])
+    get_jobs.assert_called_once()
+    assert(get_job.call_count == 2)
+
+
+def test_interval_backs_off_until_a_change():
+    poller = IMSJobPoller(Mock(), min_interval=1, max_interval=4, backoff=2)
+    waits = [poller._next_interval(changed) for changed in (True, False, False, False, True)]
+    assert(waits == [1, 2, 4, 4, 1])
+
+
+def test_chain():
+    first, second = Future(), Future()
+    chained = chain(first, lambda result: second if result == 1 else None)
+    first.set_result(1)
+    assert(not chained.done())
+    second.set_result(2)
+    assert(chained.result() == 2)
+
+    first = Future()
+    chained = chain(first, Mock())
+    first.set_exception(ValueError('failed'))
+    with pytest.raises(ValueError):
+        chained.result()
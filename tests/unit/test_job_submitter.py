@@ -0,0 +1,227 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the cray/cfs/operator/events/job_submitter.py module """
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+from kubernetes import client, config
+config.load_incluster_config = Mock()
+config.load_kube_config = Mock()
+
+from cray.cfs.operator.events.job_submitter import JobSubmitter, CREATE, DELETE, \
+    when_all  # pylint: disable=E402
+from cray.cfs.operator.events.retry import RetryPolicy  # pylint: disable=E402
+
+NAMESPACE = 'services'
+JOBS_PATH = '/apis/batch/v1/namespaces/{}/jobs'.format(NAMESPACE)
+
+
+class FakeJobsHandler(BaseHTTPRequestHandler):
+    """A minimal stand-in for the Kubernetes batch/v1 jobs API"""
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        job = json.loads(body)
+        with self.server.api(job['metadata']['name'], 'create') as throttled:
+            if throttled:
+                self._send(429, {'kind': 'Status', 'code': 429}, {'Retry-After': '0'})
+            else:
+                self.server.jobs.add(job['metadata']['name'])
+                self._send(201, job)
+
+    def do_DELETE(self):
+        name = self.path.split('?')[0].rsplit('/', 1)[-1]
+        with self.server.api(name, 'delete') as throttled:
+            if throttled:
+                self._send(429, {'kind': 'Status', 'code': 429}, {'Retry-After': '0'})
+            elif name in self.server.jobs:
+                self.server.jobs.discard(name)
+                self._send(200, {'kind': 'Status', 'apiVersion': 'v1', 'status': 'Success'})
+            else:
+                self._send(404, {'kind': 'Status', 'code': 404})
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeJobsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, throttle=0, latency=0.01):
+        super().__init__(('127.0.0.1', 0), FakeJobsHandler)
+        self.throttle = throttle
+        self.latency = latency
+        self.jobs = set()
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def api(self, name, kind):
+        server = self
+
+        class Request:
+            def __enter__(self):
+                with server._lock:
+                    server.requests.append((kind, name))
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                    throttled = server.throttle > 0
+                    if throttled:
+                        server.throttle -= 1
+                time.sleep(server.latency)
+                return throttled
+
+            def __exit__(self, *args):
+                with server._lock:
+                    server.in_flight -= 1
+        return Request()
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self.server_address[1])
+
+
+@pytest.fixture
+def fake_api():
+    server = FakeJobsServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    configuration = client.Configuration(host=server.url)
+    yield server, client.BatchV1Api(client.ApiClient(configuration))
+    server.shutdown()
+    server.server_close()
+
+
+def _job(name):
+    return client.V1Job(api_version='batch/v1', kind='Job',
+                        metadata=client.V1ObjectMeta(name=name),
+                        spec=client.V1JobSpec(template=client.V1PodTemplateSpec()))
+
+
+def test_creates_are_bounded(fake_api):
+    server, jobs_api = fake_api
+    on_result = Mock()
+    submitter = JobSubmitter(jobs_api, NAMESPACE, max_in_flight=4, on_result=on_result)
+    futures = [submitter.create('session-{}'.format(i), _job('job-{}'.format(i)))
+               for i in range(40)]
+    submitter.stop()
+    assert(all(f.result().metadata.name == 'job-{}'.format(i) for i, f in enumerate(futures)))
+    assert(server.jobs == {'job-{}'.format(i) for i in range(40)})
+    assert(1 < server.max_in_flight <= 4)
+    assert(on_result.call_count == 40)
+    for call in on_result.call_args_list:
+        kind, session_name, job_id, result, error = call.args
+        assert(kind == CREATE and error is None)
+        assert(session_name[len('session-'):] == job_id[len('job-'):])
+
+
+def test_throttled_requests_back_off(fake_api):
+    server, jobs_api = fake_api
+    server.throttle = 5
+    submitter = JobSubmitter(jobs_api, NAMESPACE, max_in_flight=8,
+                             backoff=RetryPolicy(max_attempts=10, base_delay=0, max_delay=0))
+    futures = [submitter.create('session-{}'.format(i), _job('job-{}'.format(i)))
+               for i in range(20)]
+    submitter.stop()
+    assert(all(f.exception() is None for f in futures))
+    assert(len(server.jobs) == 20)
+    assert(submitter.stats()['throttled'] == 5)
+    # The limit recovers once the API server stops throttling
+    assert(submitter.stats()['limit'] == 8)
+
+
+def test_throttled_too_often(fake_api):
+    server, jobs_api = fake_api
+    server.throttle = 100
+    on_result = Mock()
+    submitter = JobSubmitter(jobs_api, NAMESPACE, on_result=on_result,
+                             backoff=RetryPolicy(max_attempts=2, base_delay=0, max_delay=0))
+    future = submitter.create('session-1', _job('job-1'))
+    assert(future.exception(timeout=10).status == 429)
+    assert(len(server.requests) == 3)
+    assert(on_result.call_args.args[4].status == 429)
+
+
+def test_throttled_limit_is_cut_once_per_backoff():
+    submitter = JobSubmitter(Mock(), NAMESPACE, max_in_flight=8)
+    for _ in range(4):
+        submitter._acquire()
+    for _ in range(4):
+        submitter._release(throttle_delay=60)
+    assert(submitter.stats() == {'in_flight': 0, 'limit': 4, 'throttled': 4})
+
+
+def test_throttle_delay():
+    submitter = JobSubmitter(Mock(), NAMESPACE,
+                             backoff=RetryPolicy(base_delay=4, max_delay=30))
+    assert(submitter._get_throttle_delay(Mock(headers={'Retry-After': '7'}), 0) == 7)
+    assert(submitter._get_throttle_delay(Mock(headers={'Retry-After': '700'}), 0) == 30)
+    assert(2 <= submitter._get_throttle_delay(Mock(headers={}), 0) <= 4)
+    assert(2 <= submitter._get_throttle_delay(Mock(headers=None), 0) <= 4)
+
+
+def test_delete_waits_for_create(fake_api):
+    server, jobs_api = fake_api
+    server.latency = 0.1
+    submitter = JobSubmitter(jobs_api, NAMESPACE)
+    submitter.create('session-1', _job('job-1'))
+    deleted = submitter.delete('session-1', 'job-1')
+    assert(deleted.exception(timeout=10) is None)
+    assert(server.requests == [('create', 'job-1'), ('delete', 'job-1')])
+    assert(server.jobs == set())
+
+
+def test_delete_not_found(fake_api):
+    _, jobs_api = fake_api
+    on_result = Mock()
+    submitter = JobSubmitter(jobs_api, NAMESPACE, on_result=on_result)
+    assert(submitter.delete('session-1', 'job-1').exception(timeout=10).status == 404)
+    kind, _, job_id, _, error = on_result.call_args.args
+    assert((kind, job_id, error.status) == (DELETE, 'job-1', 404))
+
+
+def test_when_all():
+    assert(when_all([]).done())
+    futures = [Future(), Future()]
+    combined = when_all(futures)
+    futures[0].set_result(1)
+    assert(not combined.done())
+    futures[1].set_exception(ValueError())
+    assert(combined.done())
@@ -0,0 +1,135 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the cray/cfs/operator/events/job_template.py module """
+import copy
+import json
+import os
+from unittest.mock import patch, Mock
+
+from kubernetes import client, config
+config.load_incluster_config = Mock()
+config.load_kube_config = Mock()
+
+from cray.cfs.operator.events import CFSSessionController  # pylint: disable=E402
+
+# Jobs built for these sessions by the builder before the job template was added
+EXPECTED_JOBS = os.path.join(os.path.dirname(__file__), 'data', 'session_jobs.json')
+
+ENV = {
+    'CRAY_CFS_CONFIGMAP_PUBLIC_KEY': 'cray-configmap-ca-public-key',
+    'CRAY_CFS_CA_PUBLIC_KEY': 'certificate_authority.crt',
+    'CRAY_CFS_UTIL_IMAGE': 'cray-cfs-utils:1.0',
+    'CRAY_CFS_AEE_IMAGE': 'cray-aee:1.0',
+    'RESOURCE_NAMESPACE': 'services',
+    'CRAY_CFS_SERVICE_ACCOUNT': 'cray-cfs',
+    'CFS_OPERATOR_LOG_LEVEL': 'INFO',
+    'CRAY_CFS_TRUST_KEY_SECRET': 'cfs-trust-key',
+    'CRAY_CFS_TRUST_CERT_SECRET': 'cfs-trust-cert',
+    'CRAY_CFS_ANSIBLE_CONTAINER_LIMITS': '{"cpu": "4", "memory": "8Gi"}',
+    'CRAY_CFS_ANSIBLE_CONTAINER_REQUESTS': '{"cpu": "500m", "memory": "1Gi"}',
+}
+BASE_SESSION = {
+    'name': 'batcher-5b7d5e3b',
+    'configuration': {'name': 'compute-config', 'limit': ''},
+    'ansible': {'config': 'cfs-default-ansible-cfg', 'verbosity': 0, 'limit': None,
+                'passthrough': None},
+    'target': {'definition': 'dynamic', 'groups': []},
+    'debug_on_failure': False,
+    'status': {'session': {'status': 'pending'}},
+}
+LAYERS = [('0', {'clone_url': 'https://vcs/repo-a.git', 'commit': 'abc', 'playbook': 'site.yml',
+                 'layer': '0'}),
+          ('1', {'clone_url': 'https://vcs/repo-b.git', 'commit': 'def', 'playbook': 'ncn.yml',
+                 'layer': '1'})]
+
+
+def session_cases():
+    node = copy.deepcopy(BASE_SESSION)
+    node['ansible']['verbosity'] = 2
+    node['ansible']['limit'] = 'x3000c0s1b0n0,x3000c0s3b0n0'
+
+    image = copy.deepcopy(BASE_SESSION)
+    image['name'] = 'image-customization-' + 'x' * 60
+    image['target'] = {'definition': 'image', 'groups': [
+        {'name': 'Compute', 'members': ['8f2e1e14-6c59-4d8b-9a0b-1b2c3d4e5f60']},
+        {'name': 'Application', 'members': ['0b1c2d3e-4f50-6172-8394-a5b6c7d8e9f0']}]}
+    image['ansible']['config'] = 'custom-ansible-cfg'
+    image['ansible']['passthrough'] = '--extra-vars "foo=bar baz=1"'
+    image['debug_on_failure'] = True
+    image['configuration']['limit'] = '1'
+
+    debug = copy.deepcopy(BASE_SESSION)
+    debug['name'] = 'debug-session'
+    debug['configuration'] = {'name': 'debug_ping', 'limit': ''}
+    debug_layers = [('debug', {'clone_url': '', 'playbook': 'ping.yaml', 'layer': '_debug'})]
+    return [('node', node, 'cfs-11111111-2222-3333-4444-555555555555', LAYERS, ''),
+            ('image', image, 'cfs-66666666-7777-8888-9999-000000000000', LAYERS[1:], 'hvs.token'),
+            ('debug', debug, 'cfs-aaaaaaaa-bbbb-cccc-dddd-eeeeeeeeeeee', debug_layers, '')]
+
+
+def build_jobs(conn):
+    jobs = {}
+    for name, session, job_id, layers, token in session_cases():
+        job = conn._build_k8s_job(session, job_id, layers,
+                                  client.V1EnvVar(name='VAULT_TOKEN', value=token))
+        jobs[name] = client.ApiClient().sanitize_for_serialization(job)
+    return jobs
+
+
+def mock_options():
+    return Mock(default_ansible_config='cfs-default-ansible-cfg', session_ttl='7d',
+                debug_wait_time=3600)
+
+
+def test_job_template_matches_previous_builder():
+    with open(EXPECTED_JOBS) as f:
+        expected = json.load(f)
+    with patch('cray.cfs.operator.events.session_events.options', mock_options()), \
+            patch.dict('os.environ', {'VAULT_ADDR': 'http://cray-vault.vault:8200'}):
+        conn = CFSSessionController(ENV)
+        # Build twice so that the second pass uses the cached template
+        assert(build_jobs(conn) == expected)
+        assert(build_jobs(conn) == expected)
+
+
+def test_job_template_follows_environment():
+    with patch('cray.cfs.operator.events.session_events.options', mock_options()):
+        conn = CFSSessionController(ENV)
+        with patch.dict('os.environ', {'VAULT_ADDR': 'http://vault-a'}):
+            first = conn._get_job_template()
+            assert(conn._get_job_template() is first)
+            assert(first.env_vars['VAULT_ADDR'].value == 'http://vault-a')
+        with patch.dict('os.environ', {'VAULT_ADDR': 'http://vault-b'}):
+            assert(conn._get_job_template().env_vars['VAULT_ADDR'].value == 'http://vault-b')
+
+
+def test_job_template_volumes_by_ansible_config():
+    conn = CFSSessionController(ENV)
+    template = conn._get_job_template()
+    volumes_a = template.volumes('config-a')
+    volumes_b = template.volumes('config-b')
+    assert(volumes_a['ANSIBLE_CONFIG'].config_map.name == 'config-a')
+    assert(volumes_b['ANSIBLE_CONFIG'].config_map.name == 'config-b')
+    assert(template.volumes('config-a')['ANSIBLE_CONFIG'] is volumes_a['ANSIBLE_CONFIG'])
+    assert(volumes_a['CA_PUBKEY'] is volumes_b['CA_PUBKEY'])
@@ -0,0 +1,93 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the cray/cfs/utils/json_stream.py module """
+import json
+from unittest.mock import patch, Mock
+
+import pytest
+
+from cray.cfs.operator.cfs.sessions import iter_sessions
+from cray.cfs.utils.json_stream import iter_json_array, project, StreamDecodeError
+
+
+def _chunks(data, size):
+    data = data.encode('utf-8')
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('size', [1, 3, 7, 64, 100000])
+def test_iter_json_array(size):
+    page = {
+        'next': {'after': 'session-2', 'limit': 3},
+        'sessions': [{'name': 'session-{}'.format(i), 'count': 10 ** i, 'note': 'café "x"'}
+                     for i in range(3)],
+        'total': 12345,
+    }
+    other = {}
+    items = list(iter_json_array(_chunks(json.dumps(page), size), 'sessions', other=other))
+    assert(items == page['sessions'])
+    assert(other == {'next': page['next'], 'total': 12345})
+
+
+def test_iter_json_array_empty():
+    other = {}
+    assert(list(iter_json_array([b'{"sessions": [], "next": null}'], 'sessions', other)) == [])
+    assert(other == {'next': None})
+    assert(list(iter_json_array([b' {} '], 'sessions')) == [])
+
+
+def test_iter_json_array_truncated():
+    with pytest.raises(StreamDecodeError):
+        list(iter_json_array([b'{"sessions": [{"name": "a"}, {"na'], 'sessions'))
+    with pytest.raises(StreamDecodeError):
+        list(iter_json_array([b'Internal Server Error'], 'sessions'))
+
+
+def test_project():
+    session = {'name': 'a', 'status': {'session': {'job': 'j', 'status': 'running'},
+                                       'artifacts': []}}
+    assert(project(session, ['name', 'status.session.job', 'missing', 'name.x']) ==
+           {'name': 'a', 'status': {'session': {'job': 'j'}}})
+
+
+def test_iter_sessions_pages():
+    pages = {
+        None: {'sessions': [{'name': 'a', 'tags': {}}], 'next': {'after': 'a'}},
+        'a': {'sessions': [{'name': 'b', 'tags': {}}], 'next': None},
+    }
+
+    def get(url, params=None, stream=False):
+        response = Mock()
+        response.__enter__ = Mock(return_value=response)
+        response.__exit__ = Mock(return_value=False)
+        body = json.dumps(pages[params.get('after')])
+        response.iter_content.return_value = _chunks(body, 5)
+        return response
+    with patch('cray.cfs.operator.cfs.sessions.requests_retry_session') as cfsrequests:
+        cfsrequests.return_value.get.side_effect = get
+        stats = {}
+        sessions = list(iter_sessions(stats=stats, fields=['name']))
+    assert(sessions == [{'name': 'a'}, {'name': 'b'}])
+    assert(stats['sessions'] == 2)
+    assert(stats['bytes'] > 0)
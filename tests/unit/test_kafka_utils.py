@@ -0,0 +1,89 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the cray/cfs/operator/kafka_utils.py module """
+from unittest.mock import patch, Mock
+
+from kubernetes import config
+config.load_incluster_config = Mock()
+config.load_kube_config = Mock()
+
+from cray.cfs.operator.kafka_utils import CommitPolicy, KafkaWrapper  # pylint: disable=E402
+
+
+def _kafka(policy, assignment=('p0', 'p1')):
+    kafka = KafkaWrapper.__new__(KafkaWrapper)
+    kafka.commit_policy = policy
+    kafka.consumer = Mock()
+    kafka.consumer.assignment.return_value = set(assignment)
+    return kafka
+
+
+def test_commit_policy_default_commits_every_time():
+    kafka = _kafka(CommitPolicy())
+    kafka.commit({'p0': 1})
+    kafka.commit({'p0': 2})
+    assert(kafka.consumer.commit.call_count == 2)
+    assert(kafka.commit_policy.saved == 0)
+
+
+def test_commit_policy_coalesces_by_count():
+    kafka = _kafka(CommitPolicy(max_messages=5, max_interval_ms=60000))
+    kafka.commit({'p0': 1})
+    for offset in range(2, 6):
+        kafka.commit({'p0': offset})
+    assert(kafka.consumer.commit.call_count == 1)
+    kafka.commit({'p0': 10})
+    assert(kafka.consumer.commit.call_count == 2)
+    committed = kafka.consumer.commit.call_args[0][0]
+    assert(committed['p0'].offset == 10)
+    assert(kafka.commit_policy.requested == 6)
+    assert(kafka.commit_policy.saved == 4)
+
+
+def test_commit_policy_coalesces_by_time():
+    with patch('cray.cfs.operator.kafka_utils.time.monotonic', return_value=0):
+        kafka = _kafka(CommitPolicy(max_messages=1000, max_interval_ms=1000))
+        kafka.commit({'p0': 1})
+        kafka.commit()
+    assert(kafka.consumer.commit.call_count == 0)
+    with patch('cray.cfs.operator.kafka_utils.time.monotonic', return_value=2):
+        kafka.commit()
+    assert(kafka.consumer.commit.call_count == 1)
+
+
+def test_flush_skips_revoked_partitions():
+    kafka = _kafka(CommitPolicy(max_messages=1000, max_interval_ms=60000), assignment=['p1'])
+    kafka.commit({'p0': 5, 'p1': 7})
+    kafka.flush_commits()
+    committed = kafka.consumer.commit.call_args[0][0]
+    assert(list(committed.keys()) == ['p1'])
+    assert(kafka.commit_policy.pending() == {})
+
+
+def test_close_flushes_commits():
+    kafka = _kafka(CommitPolicy(max_messages=1000, max_interval_ms=60000))
+    kafka.commit({'p0': 3})
+    kafka.close()
+    kafka.consumer.commit.assert_called_once()
+    kafka.consumer.close.assert_called_once_with(autocommit=False)
@@ -0,0 +1,97 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the cray/cfs/operator/metrics.py module """
+import datetime
+from unittest.mock import Mock
+
+from prometheus_client import CollectorRegistry, generate_latest
+
+from cray.cfs.operator import metrics
+from cray.cfs.operator.cfs.sessions import parse_time
+
+
+def test_http_endpoint():
+    assert(metrics.http_endpoint('/v3/sessions') == '/v3/sessions')
+    assert(metrics.http_endpoint('/v3/sessions/session-1') == '/v3/sessions/{id}')
+    assert(metrics.http_endpoint('/v3/sessions/session-1/') == '/v3/sessions/{id}')
+    assert(metrics.http_endpoint('/jobs/job-1/logs') == '/jobs/{id}/{id}')
+    assert(metrics.http_endpoint('/') == '/')
+
+
+def test_observe_http_response():
+    response = Mock()
+    response.request.url = 'http://cray-cfs-api/v3/sessions/session-1'
+    response.request.method = 'PATCH'
+    response.elapsed = datetime.timedelta(seconds=0.5)
+    labels = ('cray-cfs-api', 'PATCH', '/v3/sessions/{id}')
+    before = _sample('cfs_operator_http_request_duration_seconds_count', labels)
+    metrics.observe_http_response(response)
+    assert(_sample('cfs_operator_http_request_duration_seconds_count', labels) == before + 1)
+
+
+def test_observe_http_response_never_raises():
+    metrics.observe_http_response(None)
+
+
+def test_collector():
+    controller = Mock()
+    controller.event_workers.stats.return_value = {
+        'create': {'queued': 3, 'running': 2, 'completed': 10, 'wait_seconds': 1.5,
+                   'max_wait_seconds': 1.0, 'latency_seconds': 4.0}}
+    controller.job_monitor.sessions = {'session-1': {}, 'session-2': {}}
+    controller.job_monitor.informer.stats.return_value = {'cache_size': 5,
+                                                          'relist_age_seconds': None}
+    controller.job_submitter.stats.return_value = {'in_flight': 1, 'limit': 10, 'throttled': 2}
+    controller.status_writer.stats.return_value = {'updates': 7, 'patches': 4, 'dropped': 0,
+                                                   'pending': 1}
+    controller.commit_stats.return_value = {'requested': 20, 'sent': 4, 'saved': 16}
+    cache = Mock()
+    cache.name = 'configurations'
+    cache.stats.return_value = {'size': 2, 'hits': 9, 'misses': 3}
+    registry = CollectorRegistry()
+    registry.register(metrics.OperatorCollector(controller, caches=[cache]))
+    output = generate_latest(registry).decode()
+    assert('cfs_operator_event_lane_queued{lane="create"} 3.0' in output)
+    assert('cfs_operator_event_lane_completed_total{lane="create"} 10.0' in output)
+    assert('cfs_operator_monitored_sessions 2.0' in output)
+    assert('cfs_operator_job_informer_jobs 5.0' in output)
+    assert('cfs_operator_job_informer_sync_age_seconds' not in output)
+    assert('cfs_operator_job_requests_throttled_total 2.0' in output)
+    assert('cfs_operator_status_patches_total 4.0' in output)
+    assert('cfs_operator_kafka_commits_saved_total 16.0' in output)
+    assert('cfs_operator_cache_hits_total{cache="configurations"} 9.0' in output)
+
+
+def test_parse_time():
+    assert(parse_time('2026-01-01T00:00:00') ==
+           datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc))
+    assert(parse_time('2026-01-01T00:00:00Z') ==
+           datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc))
+    assert(parse_time('') is None)
+    assert(parse_time('not a time') is None)
+
+
+def _sample(name, labels):
+    return metrics.REGISTRY.get_sample_value(
+        name, dict(zip(('service', 'method', 'endpoint'), labels))) or 0
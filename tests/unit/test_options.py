@@ -0,0 +1,78 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the cray/cfs/operator/cfs/options.py module """
+import json
+from unittest.mock import patch, Mock
+
+from requests.exceptions import ConnectionError
+
+from cray.cfs.operator.cfs.options import Options, DEFAULTS
+
+
+def _options_response(**options):
+    data = dict(DEFAULTS)
+    data.update(options)
+    return Mock(text=json.dumps(data))
+
+
+def test_refresh_only_when_stale():
+    options = Options(max_staleness=60)
+    with patch('cray.cfs.operator.cfs.options.requests_retry_session') as cfsrequests:
+        cfsrequests.return_value.get.return_value = _options_response()
+        options.refresh()
+        options.refresh()
+        assert(cfsrequests.return_value.get.call_count == 1)
+        options._last_update -= 61
+        options.refresh()
+        assert(cfsrequests.return_value.get.call_count == 2)
+
+
+def test_refresh_retries_after_failure():
+    options = Options(max_staleness=60)
+    with patch('cray.cfs.operator.cfs.options.requests_retry_session') as cfsrequests:
+        cfsrequests.return_value.get.side_effect = ConnectionError()
+        options.refresh()
+        cfsrequests.return_value.get.side_effect = None
+        cfsrequests.return_value.get.return_value = _options_response()
+        options.refresh()
+        assert(cfsrequests.return_value.get.call_count == 2)
+
+
+def test_subscribers():
+    options = Options()
+    changes = []
+    ttl_changes = []
+    options.subscribe(lambda *args: changes.append(args))
+    options.subscribe(lambda *args: ttl_changes.append(args), key='session_ttl')
+    options.subscribe(Mock(side_effect=ValueError()))
+    with patch('cray.cfs.operator.cfs.options.requests_retry_session') as cfsrequests:
+        cfsrequests.return_value.get.return_value = _options_response()
+        options.update()
+        assert(changes == [])
+        cfsrequests.return_value.get.return_value = _options_response(session_ttl='2d',
+                                                                      logging_level='DEBUG')
+        options.update()
+    assert(sorted(changes) == [('logging_level', 'INFO', 'DEBUG'), ('session_ttl', '7d', '2d')])
+    assert(ttl_changes == [('session_ttl', '7d', '2d')])
+    assert(DEFAULTS['session_ttl'] == '7d')
@@ -0,0 +1,132 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the cray/cfs/inventory/image/readiness.py module """
+import socket
+import threading
+import time
+from unittest.mock import patch, Mock
+
+import pytest
+
+from kubernetes import config
+config.load_incluster_config = Mock()
+config.load_kube_config = Mock()
+
+from cray.cfs.inventory import CFSInventoryError  # noqa: E402
+from cray.cfs.inventory.image.readiness import SSHContainerWaiter, ssh_banner_ready  # noqa: E402
+from cray.cfs.inventory.image.readiness import wait_for_ssh  # noqa: E402
+
+SESSION = 'session-1'
+WAIT_FOR_SSH = 'cray.cfs.inventory.image.readiness.wait_for_ssh'
+
+
+def ims_job(job_id, status='waiting_on_user', session=SESSION):
+    return {
+        'id': job_id,
+        'status': status,
+        'image_root_archive_name': 'image-' + job_id,
+        'ssh_containers': [{'name': session, 'connection_info': {
+            'cluster.local': {'host': job_id + '.ims', 'port': 22}}}],
+    }
+
+
+def serve_once(banner):
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+
+    def accept():
+        conn, _ = server.accept()
+        conn.sendall(banner)
+        conn.close()
+        server.close()
+    threading.Thread(target=accept, daemon=True).start()
+    return server.getsockname()[1]
+
+
+def test_ssh_banner_ready():
+    assert(ssh_banner_ready('127.0.0.1', serve_once(b'SSH-2.0-OpenSSH_9.6\r\n'), timeout=5))
+    assert(not ssh_banner_ready('127.0.0.1', serve_once(b'HTTP/1.1 400\r\n'), timeout=5))
+
+
+def test_ssh_banner_not_ready_when_closed():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    assert(not ssh_banner_ready('127.0.0.1', port, timeout=1))
+
+
+def test_wait_for_ssh_checks_the_banner_first():
+    with patch('cray.cfs.inventory.image.readiness.ssh_banner_ready',
+               side_effect=[False, False, True]) as banner, \
+            patch('cray.cfs.inventory.image.readiness.ssh_command_ready',
+                  return_value=True) as command:
+        wait_for_ssh('host', 22, min_delay=0, max_delay=0)
+    assert(banner.call_count == 3)
+    command.assert_called_once()
+
+
+def test_wait_for_ssh_gives_up_at_deadline():
+    with patch('cray.cfs.inventory.image.readiness.ssh_banner_ready', return_value=False):
+        with pytest.raises(CFSInventoryError):
+            wait_for_ssh('host', 22, min_delay=0.01, max_delay=0.01,
+                         deadline=time.monotonic() + 0.05)
+
+
+def test_wait_for_ssh_stops():
+    stopped = threading.Event()
+    with patch('cray.cfs.inventory.image.readiness.ssh_banner_ready',
+               side_effect=lambda *args: stopped.set()) as banner:
+        start = time.monotonic()
+        with pytest.raises(CFSInventoryError):
+            wait_for_ssh('host', 22, min_delay=60, max_delay=60, stopped=stopped)
+    assert(time.monotonic() - start < 5)
+    banner.assert_called_once()
+
+
+def test_waiter_returns_connection_info():
+    get_jobs = Mock(return_value=[ims_job('job-1'), ims_job('job-2')])
+    with patch(WAIT_FOR_SSH) as wait:
+        waiter = SSHContainerWaiter(SESSION, get_jobs)
+        futures = [waiter.wait('image-1', 'job-1'), waiter.wait('image-2', 'job-2')]
+        results = [future.result(timeout=5) for future in futures]
+        waiter.close()
+    assert(results == [('image-1', 'job-1', 'image-job-1', 'job-1.ims', 22),
+                       ('image-2', 'job-2', 'image-job-2', 'job-2.ims', 22)])
+    assert(wait.call_count == 2)
+
+
+@pytest.mark.parametrize('job', [
+    ims_job('job-1', status='error'),
+    ims_job('job-1', status='success'),
+    ims_job('job-1', session='other-session'),
+])
+def test_waiter_fails_without_container(job):
+    with patch(WAIT_FOR_SSH) as wait:
+        waiter = SSHContainerWaiter(SESSION, Mock(), get_job=Mock(return_value=job))
+        with pytest.raises(CFSInventoryError):
+            waiter.wait('image-1', 'job-1').result(timeout=5)
+        waiter.close()
+    wait.assert_not_called()
@@ -0,0 +1,65 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the cray/cfs/operator/events/retry.py module """
+from unittest.mock import patch, Mock
+
+from cray.cfs.operator.events.retry import RetryPolicy, RetryScheduler
+
+
+def test_retry_policy_backoff():
+    policy = RetryPolicy(base_delay=1, max_delay=60)
+    for attempt in range(10):
+        delay = policy.get_delay(attempt)
+        expected = min(60, 2 ** attempt)
+        assert(expected / 2 <= delay <= expected)
+
+
+def test_retry_policy_exhausted():
+    policy = RetryPolicy(max_attempts=10, max_duration=600)
+    assert(not policy.exhausted(11, 60))
+    assert(not policy.exhausted(5, 6000))
+    assert(policy.exhausted(11, 601))
+
+
+def test_retry_scheduler_runs_due_in_order():
+    scheduler = RetryScheduler()
+    results = []
+    with patch('cray.cfs.operator.events.retry.time.monotonic', return_value=100):
+        scheduler.schedule(5, results.append, 'second')
+        scheduler.schedule(1, results.append, 'first')
+        scheduler.schedule(30, results.append, 'later')
+    with patch('cray.cfs.operator.events.retry.time.monotonic', return_value=110):
+        wait = scheduler.run_due()
+    assert(results == ['first', 'second'])
+    assert(wait == 20)
+    assert(len(scheduler) == 1)
+
+
+def test_retry_scheduler_survives_exception():
+    scheduler = RetryScheduler()
+    results = []
+    scheduler.schedule(0, Mock(side_effect=Exception()))
+    scheduler.schedule(0, results.append, 1)
+    assert(scheduler.run_due() is None)
+    assert(results == [1])
@@ -22,18 +22,27 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 #
 """ Test the cray/cfs/operator/v1/session_events.py module """
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
 import logging
+import threading
+import time
 from unittest.mock import patch, Mock
 
 from kubernetes.client import BatchV1Api
 from kubernetes.client.rest import ApiException
+from requests.exceptions import HTTPError
 
 from kubernetes import config
 config.load_incluster_config = Mock()
 config.load_kube_config = Mock()
 
 from cray.cfs.operator.events import CFSSessionController  # pylint: disable=E402
+from cray.cfs.operator.events.event_pipeline import OffsetTracker
+from cray.cfs.operator.cfs.configurations import configuration_cache
 from cray.cfs.operator.events.job_events import CFSJobMonitor
+from cray.cfs.operator.events import session_events
+from cray.cfs.operator.events.job_submitter import DEFAULT_MAX_IN_FLIGHT
 
 
 def test__handle_added(create_event_v2):
@@ -46,11 +55,26 @@ def test__handle_added(create_event_v2):
                 cfs_job.assert_called_once()
 
 
+def test__handle_added_traced(create_event_v2):
+    """ CREATE events start a trace that is passed on to the session's job """
+    exporter = Mock(enabled=True)
+    with patch.object(CFSSessionController, '_create_k8s_job') as cfs_job:
+        with patch('cray.cfs.operator.cfs.sessions.update_session_status'):
+            conn = CFSSessionController({'RESOURCE_NAMESPACE': 'foo'})
+            conn.tracer.exporter = exporter
+            conn._handle_event(create_event_v2, Mock())
+    trace = cfs_job.call_args.kwargs['trace']
+    spans = [call.args[0] for call in exporter.export.call_args_list]
+    assert(spans[-1].name == 'operator.handle_added')
+    assert(all(span.context.trace_id == trace.trace_id for span in spans))
+    assert(all(span.parent_id == trace.span_id for span in spans))
+
+
 def test__handle_deleted(delete_event):
     """ Test the cray.cfs.operator.events.session_events._handle_deleted method """
     with patch.object(BatchV1Api, 'delete_namespaced_job') as delete:
         conn = CFSSessionController({'RESOURCE_NAMESPACE': 'foo'})
-        conn._handle_event(delete_event, Mock())
+        conn._handle_event(delete_event, Mock()).result(timeout=10)
         delete.assert_called_once()
 
 
@@ -58,7 +82,7 @@ def test__handle_deleted_failed(delete_event):
     """ Test the cray.cfs.operator.events.session_events._handle_deleted method """
     with patch.object(BatchV1Api, 'delete_namespaced_job', side_effect=ApiException()) as delete:
         conn = CFSSessionController({'RESOURCE_NAMESPACE': 'foo'})
-        conn._handle_event(delete_event, Mock())
+        conn._handle_event(delete_event, Mock()).result(timeout=10)
         delete.assert_called_once()
 
 
@@ -68,25 +92,26 @@ def test__create_k8s_job(session_data_v2, job_id, k8s_api_response, config_respo
     caplog.set_level(logging.DEBUG)
     # Successful response
     with patch.object(BatchV1Api, 'create_namespaced_job', return_value=k8s_api_response()):
-        with patch('cray.cfs.operator.events.session_events.get_configuration',
+        with patch('cray.cfs.operator.events.session_events.get_cached_configuration',
                    return_value=config_response):
             with patch('cray.cfs.operator.events.session_events.options',
                        mock_options):
                 conn = CFSSessionController(aee_env)
-                conn._create_k8s_job(session_data_v2, job_id)
+                conn._create_k8s_job(session_data_v2, job_id).exception(timeout=10)
                 BatchV1Api.create_namespaced_job.assert_called_once()
     for record in caplog.records:
         assert 'Job request created' in record.message
 
     # Some other API error
     caplog.clear()
-    with patch.object(BatchV1Api, 'create_namespaced_job', side_effect=ApiException(status=500)):
-        with patch('cray.cfs.operator.events.session_events.get_configuration',
+    with patch.object(BatchV1Api, 'create_namespaced_job', side_effect=ApiException(status=500)), \
+            patch('cray.cfs.operator.cfs.sessions.update_session_status'):
+        with patch('cray.cfs.operator.events.session_events.get_cached_configuration',
                    return_value=config_response):
             with patch('cray.cfs.operator.events.session_events.options',
                        mock_options):
                 conn = CFSSessionController(aee_env)
-                conn._create_k8s_job(session_data_v2, job_id)
+                conn._create_k8s_job(session_data_v2, job_id).exception(timeout=10)
                 BatchV1Api.create_namespaced_job.assert_called_once()
     for record in caplog.records:
         assert 'Unable to create Job' in record.message
@@ -101,18 +126,19 @@ def test__v1_create_k8s_job(session_data_v1, job_id,
         with patch('cray.cfs.operator.events.session_events.options',
                    mock_options):
             conn = CFSSessionController(aee_env)
-            conn._create_k8s_job(session_data_v1, job_id)
+            conn._create_k8s_job(session_data_v1, job_id).exception(timeout=10)
             BatchV1Api.create_namespaced_job.assert_called_once()
     for record in caplog.records:
         assert 'Job request created' in record.message
 
     # Some other API error
     caplog.clear()
-    with patch.object(BatchV1Api, 'create_namespaced_job', side_effect=ApiException(status=500)):
+    with patch.object(BatchV1Api, 'create_namespaced_job', side_effect=ApiException(status=500)), \
+            patch('cray.cfs.operator.cfs.sessions.update_session_status'):
         with patch('cray.cfs.operator.events.session_events.options',
                    mock_options):
             conn = CFSSessionController(aee_env)
-            conn._create_k8s_job(session_data_v1, job_id)
+            conn._create_k8s_job(session_data_v1, job_id).exception(timeout=10)
             BatchV1Api.create_namespaced_job.assert_called_once()
     for record in caplog.records:
         assert 'Unable to create Job' in record.message
@@ -125,12 +151,209 @@ def test__create_k8s_job_image_customization(session_data_v2, job_id, k8s_api_re
     # Successful response
     session_data_v2['target']['definition'] = 'image'
     with patch.object(BatchV1Api, 'create_namespaced_job', return_value=k8s_api_response()):
-        with patch('cray.cfs.operator.events.session_events.get_configuration',
+        with patch('cray.cfs.operator.events.session_events.get_cached_configuration',
                    return_value=config_response):
             with patch('cray.cfs.operator.events.session_events.options',
                        mock_options):
                 conn = CFSSessionController(aee_env)
-                conn._create_k8s_job(session_data_v2, job_id)
+                conn._create_k8s_job(session_data_v2, job_id).exception(timeout=10)
                 BatchV1Api.create_namespaced_job.assert_called_once()
     for record in caplog.records:
         assert 'Job request created' in record.message
+
+
+def test__send_retry(create_event_v2):
+    """ Test the cray.cfs.operator.events.session_events._send_retry method """
+    kafka = Mock()
+    conn = CFSSessionController({'RESOURCE_NAMESPACE': 'foo'})
+    with patch('cray.cfs.operator.events.session_events.time.sleep') as sleep:
+        conn._send_retry(create_event_v2, kafka)
+        sleep.assert_not_called()
+    kafka.produce.assert_called_once_with(create_event_v2)
+    assert(create_event_v2['attempt_count'] == 0)
+    assert(create_event_v2['not_before'] > create_event_v2['attempt_start'])
+
+
+def test__send_retry_exhausted(create_event_v2):
+    """ Test the cray.cfs.operator.events.session_events._send_retry method """
+    kafka = Mock()
+    conn = CFSSessionController({'RESOURCE_NAMESPACE': 'foo',
+                                 'CFS_OPERATOR_RETRY_MAX_ATTEMPTS': '1',
+                                 'CFS_OPERATOR_RETRY_MAX_DURATION': '0'})
+    create_event_v2['attempt_count'] = 1
+    create_event_v2['attempt_start'] = 0
+    conn._send_retry(create_event_v2, kafka)
+    kafka.produce.assert_not_called()
+
+
+def test__consume_delays_retries(create_event_v2):
+    """ Test the cray.cfs.operator.events.session_events._consume method """
+    create_event_v2['not_before'] = time.time() + 60
+    kafka = Mock()
+    kafka.consumer.poll.return_value = {'p0': [Mock(offset=3, value=create_event_v2)]}
+    offsets = OffsetTracker()
+    conn = CFSSessionController({'RESOURCE_NAMESPACE': 'foo'})
+    with patch.object(conn.event_workers, 'submit') as submit:
+        conn._consume(kafka, offsets)
+        submit.assert_not_called()
+    assert(len(conn.retry_scheduler) == 1)
+    # The delayed event must not be committed until it has been handled
+    kafka.commit.assert_called_once_with({'p0': 3})
+
+
+def test__consume_delayed_retries_take_lane_places(create_event_v2):
+    """ Test the cray.cfs.operator.events.session_events._consume method """
+    create_event_v2['not_before'] = time.time() + 2
+    kafka = Mock()
+    kafka.consumer.poll.return_value = {'p0': [Mock(offset=3, value=create_event_v2)]}
+    conn = CFSSessionController({'RESOURCE_NAMESPACE': 'foo',
+                                 'CFS_OPERATOR_MAX_PENDING_EVENTS': '1'})
+    conn._consume(kafka, OffsetTracker())
+    assert(not conn.event_workers.reserve('create', timeout=0))
+    # Once due, the retry is queued in the place it already holds, without waiting
+    with patch('cray.cfs.operator.events.retry.time.monotonic',
+               return_value=time.monotonic() + 3):
+        conn.retry_scheduler.run_due()
+    assert(conn.event_workers.pending == 1)
+
+
+def test__consume_requeues_long_retries(create_event_v2):
+    """ Test the cray.cfs.operator.events.session_events._consume method """
+    create_event_v2['not_before'] = time.time() + 60
+    kafka = Mock()
+    kafka.consumer.poll.return_value = {'p0': [Mock(offset=3, value=create_event_v2)]}
+    offsets = OffsetTracker()
+    conn = CFSSessionController({'RESOURCE_NAMESPACE': 'foo'})
+    conn._consume(kafka, offsets)
+    kafka.produce.side_effect = [Exception('kafka is down'), None]
+    for hold in (6, 12):
+        with patch('cray.cfs.operator.events.retry.time.monotonic',
+                   return_value=time.monotonic() + hold):
+            conn.retry_scheduler.run_due()
+    # The event is back on the topic, so its offset no longer holds up commits
+    kafka.produce.assert_called_with(create_event_v2)
+    assert(kafka.produce.call_count == 2)
+    assert(offsets.committable() == {'p0': 4})
+    assert(conn.event_workers.reserve('create', timeout=0))
+
+
+def test__get_configuration_shared(session_data_v2, aee_env):
+    """ Sessions created together share one read of their configuration """
+    session_data_v2['status']['session']['start_time'] = \
+        datetime.now(timezone.utc).isoformat(timespec='seconds')
+    configuration_cache.invalidate()
+
+    def get(url, headers):
+        time.sleep(0.1)
+        return Mock(status_code=200, text='{"name": "test", "layers": [{"name": "a"}]}',
+                    headers={})
+    conn = CFSSessionController(aee_env)
+    with patch('cray.cfs.operator.cfs.configurations.requests_retry_session') as cfsrequests:
+        cfsrequests.return_value.get.side_effect = get
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            configs = list(executor.map(lambda _: conn._get_configuration(session_data_v2),
+                                        range(8)))
+        for cfs_config in configs + [conn._get_configuration(session_data_v2)]:
+            # Layers are labeled on a copy, leaving the cached configuration unchanged
+            assert(conn._get_configuration_data(session_data_v2, cfs_config) ==
+                   [('0', {'name': 'a', 'layer': '0'})])
+            assert(conn._get_vault_token_env(cfs_config).value == '')
+        assert(cfsrequests.return_value.get.call_count == 1)
+        assert(configs[0] == {'name': 'test', 'layers': [{'name': 'a'}]})
+    configuration_cache.invalidate()
+
+
+def test__lookup_vault_token_cached(aee_env):
+    secrets = Mock()
+    secrets.to_dict.return_value = {'items': [{'data': {'token': 'and0'}}]}
+    secrets.metadata.resource_version = '7'
+    login = Mock()
+    login.json.return_value = {'auth': {'client_token': 'token', 'lease_duration': 3600}}
+    tapms = {'status': {'tenantkms': {'transitname': 'transit'}}}
+    configuration = {'tenant_name': 'tenant1'}
+    done = threading.Event()
+    with patch('cray.cfs.operator.events.session_events.CRD_CLIENT') as crd_client, \
+            patch('cray.cfs.operator.events.session_events.CORE_CLIENT') as core_client, \
+            patch('cray.cfs.operator.events.session_events.requests.put',
+                  return_value=login) as put, \
+            patch('cray.cfs.operator.events.tenant_tokens.watch') as watch:
+        crd_client.get_namespaced_custom_object.return_value = tapms
+        core_client.list_namespaced_secret.return_value = secrets
+        watch.Watch.return_value.stream.side_effect = lambda *args, **kwargs: done.wait(5) and []
+        conn = CFSSessionController(aee_env)
+        for _ in range(5):
+            assert(conn._lookup_vault_token(configuration) == 'token')
+        put.assert_called_once_with('http://cray-vault.vault.svc:8200/v1/auth/kubernetes/login',
+                                    data={'jwt': 'jwt', 'role': 'transit'})
+        # The token is reused for at most a tenth of its lease
+        assert(conn.tenant_tokens.tokens._entries['tenant1'].ttl == 300)
+        # The tenant's secrets are watched from the version listed before the login
+        stream = watch.Watch.return_value.stream
+        while not stream.called:
+            time.sleep(0.01)
+        assert(stream.call_args.kwargs['resource_version'] == '7')
+        done.set()
+        conn.shutdown()
+        assert(conn.tenant_tokens._watches == {})
+
+
+def test__process_event_waits_for_job_requests(create_event_v2):
+    """ The offset of an event is only completed once its job requests are done """
+    offsets = OffsetTracker()
+    offsets.add('p0', 3)
+    pending = Future()
+    conn = CFSSessionController({'RESOURCE_NAMESPACE': 'foo'})
+    with patch.object(conn, '_handle_event', return_value=pending):
+        conn._process_event(Mock(offset=3, value=create_event_v2), 'p0', Mock(), offsets)
+    assert(offsets.committable() == {'p0': 3})
+    pending.set_result(None)
+    assert(offsets.committable() == {'p0': 4})
+
+
+def test__job_request_done_create(aee_env):
+    conn = CFSSessionController(aee_env)
+    with patch.object(CFSJobMonitor, 'add_session') as add_session, \
+            patch('cray.cfs.operator.cfs.sessions.update_session_status') as update:
+        conn._job_request_done('create', 'session-1', 'job-1', Mock(), None)
+        assert(add_session.call_args.args[0]['status']['session']['job'] == 'job-1')
+        update.assert_not_called()
+        add_session.reset_mock()
+
+        # A job that could not be created fails the session
+        conn._job_request_done('create', 'session-1', 'job-1', None, ApiException(status=500))
+        conn.status_writer.flush()
+        update.assert_called_once_with('session-1', data={'status': 'complete',
+                                                          'succeeded': 'false'})
+        add_session.assert_not_called()
+
+
+def test__handle_added_conflict(create_event_v2):
+    """ A CREATE event is not retried if the session's job has already been set """
+    response = Mock(status_code=409)
+    with patch('cray.cfs.operator.cfs.sessions.update_session_status',
+               side_effect=HTTPError(response=response)) as update:
+        with patch.object(CFSSessionController, '_create_k8s_job') as cfs_job:
+            conn = CFSSessionController({'RESOURCE_NAMESPACE': 'foo'})
+            with patch.object(conn, '_send_retry') as send_retry:
+                conn._handle_event(create_event_v2, Mock())
+                send_retry.assert_not_called()
+            update.assert_called_once()
+            cfs_job.assert_not_called()
+
+
+def test_k8s_pool_fits_job_requests():
+    """ The Kubernetes client keeps a connection for every job request in flight """
+    assert(session_events._api_client.configuration.connection_pool_maxsize >=
+           DEFAULT_MAX_IN_FLIGHT + session_events.K8S_POOL_HEADROOM)
+
+
+def test_commit_stats_survive_reconnects():
+    """ Commit counts are kept when the Kafka consumer and its policy are replaced """
+    conn = CFSSessionController({'RESOURCE_NAMESPACE': 'foo'})
+    policy = conn._get_commit_policy()
+    policy.add({'p0': 1})
+    policy.committed({'p0': 1})
+    policy.add({'p0': 2})
+    policy = conn._get_commit_policy()
+    policy.add({'p0': 3})
+    assert(conn.commit_stats() == {'requested': 3, 'sent': 1, 'saved': 2})
@@ -0,0 +1,188 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the cray/cfs/operator/cfs/status_writer.py module """
+import threading
+import time
+from unittest.mock import patch, Mock
+
+import pytest
+from requests.exceptions import HTTPError
+
+from cray.cfs.operator.cfs.status_writer import SessionStatusWriter, merge_status
+
+UPDATE = 'cray.cfs.operator.cfs.sessions.update_session_status'
+
+
+def test_merge_status():
+    assert(merge_status({'status': 'running'}, {'status': 'complete', 'succeeded': 'true'}) ==
+           {'status': 'complete', 'succeeded': 'true'})
+    # The status never moves backwards
+    assert(merge_status({'status': 'complete', 'succeeded': 'true'}, {'status': 'running'}) ==
+           {'status': 'complete', 'succeeded': 'true'})
+    assert(merge_status({'job': 'job-1'}, {'status': 'running'}) ==
+           {'job': 'job-1', 'status': 'running'})
+
+
+def test_updates_are_coalesced():
+    with patch(UPDATE) as update:
+        writer = SessionStatusWriter(window=60)
+        for i in range(100):
+            writer.update('session-{}'.format(i), {'status': 'running'})
+            writer.update('session-{}'.format(i), {'status': 'complete', 'succeeded': 'true'})
+        update.assert_not_called()
+        writer.flush()
+    assert(update.call_count == 100)
+    for call in update.call_args_list:
+        assert(call.kwargs['data'] == {'status': 'complete', 'succeeded': 'true'})
+    assert(writer.stats() == {'updates': 200, 'patches': 100, 'dropped': 0, 'pending': 0})
+
+
+def test_updates_are_sent_after_window():
+    sent = threading.Event()
+    with patch(UPDATE, side_effect=lambda *args, **kwargs: sent.set()) as update:
+        writer = SessionStatusWriter(window=0.05)
+        writer.update('session-1', {'status': 'running'})
+        assert(sent.wait(timeout=5))
+        update.assert_called_once_with('session-1', data={'status': 'running'})
+
+
+def test_updates_are_sent_concurrently():
+    barrier = threading.Barrier(5, timeout=5)
+    with patch(UPDATE, side_effect=lambda *args, **kwargs: barrier.wait()):
+        writer = SessionStatusWriter(window=60, concurrency=5)
+        for i in range(5):
+            writer.update('session-{}'.format(i), {'status': 'running'})
+        writer.flush()
+    assert(writer.stats()['patches'] == 5)
+
+
+def test_failed_updates_are_retried():
+    with patch(UPDATE, side_effect=[Exception(), None]) as update:
+        writer = SessionStatusWriter(window=60)
+        writer.update('session-1', {'status': 'running'})
+        writer.flush()
+        # Newer updates win over the one being retried
+        writer.update('session-1', {'status': 'complete', 'succeeded': 'false'})
+        writer.flush()
+    assert(update.call_args.kwargs['data'] == {'status': 'complete', 'succeeded': 'false'})
+    assert(writer.stats()['patches'] == 1)
+
+
+def test_failed_updates_are_dropped():
+    not_found = HTTPError(response=Mock(status_code=404))
+    with patch(UPDATE, side_effect=not_found) as update:
+        writer = SessionStatusWriter(window=60)
+        writer.update('session-1', {'status': 'running'})
+        writer.flush()
+        assert(update.call_count == 1)
+        assert(writer.stats()['pending'] == 0)
+
+    with patch(UPDATE, side_effect=Exception()) as update:
+        writer = SessionStatusWriter(window=60, max_attempts=3)
+        writer.update('session-1', {'status': 'running'})
+        for _ in range(5):
+            writer.flush()
+        assert(update.call_count == 3)
+        assert(writer.stats()['dropped'] == 1)
+
+
+def test_sync_update():
+    with patch(UPDATE, return_value={'name': 'session-1'}) as update:
+        writer = SessionStatusWriter(window=60)
+        writer.update('session-1', {'status': 'running'})
+        assert(writer.update('session-1', {'job': 'job-1'}, sync=True) == {'name': 'session-1'})
+        update.assert_called_once_with('session-1', data={'status': 'running', 'job': 'job-1'})
+        assert(writer.stats()['pending'] == 0)
+
+    conflict = HTTPError(response=Mock(status_code=409))
+    with patch(UPDATE, side_effect=conflict):
+        writer = SessionStatusWriter(window=60)
+        writer.update('session-1', {'status': 'running'})
+        with pytest.raises(HTTPError):
+            writer.update('session-1', {'job': 'job-1'}, sync=True)
+        # Unsent updates are kept when the synchronous update fails
+        assert(writer.stats()['pending'] == 1)
+
+
+def test_stop_flushes():
+    with patch(UPDATE) as update:
+        writer = SessionStatusWriter(window=60)
+        writer.update('session-1', {'status': 'running'})
+        start = time.monotonic()
+        writer.stop()
+        assert(time.monotonic() - start < 5)
+        update.assert_called_once()
+
+
+def test_failed_updates_back_off():
+    done = []
+    with patch(UPDATE, side_effect=[Exception(), Exception(), Exception(), None]) as update:
+        writer = SessionStatusWriter(window=0.01, retry_delay=0.05, max_retry_delay=0.1)
+        start = time.monotonic()
+        writer.update('session-1', {'status': 'complete'}, on_done=done.append)
+        deadline = start + 5
+        while not done and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # Retried after 0.05, 0.1 and then the 0.1 cap, rather than every window
+        assert(update.call_count == 4)
+        assert(time.monotonic() - start >= 0.25)
+        assert(done == [True])
+
+
+def test_dropped_update_callback():
+    done = []
+    with patch(UPDATE, side_effect=Exception()):
+        writer = SessionStatusWriter(window=60, max_attempts=2)
+        writer.update('session-1', {'status': 'complete'}, on_done=done.append)
+        writer.flush()
+        assert(done == [])
+        writer.flush()
+    assert(done == [False])
+
+
+def test_stop_retries_failed_updates():
+    with patch(UPDATE, side_effect=[Exception(), None]) as update:
+        writer = SessionStatusWriter(window=60, retry_delay=0.01)
+        writer.update('session-1', {'status': 'complete'})
+        writer.stop(timeout=5)
+    # The update that failed during the final flush is still written
+    assert(update.call_count == 2)
+    assert(writer.stats()['patches'] == 1)
+
+
+def test_stop_gives_up_at_timeout():
+    done = []
+    with patch(UPDATE, side_effect=Exception()), \
+            patch('cray.cfs.operator.cfs.status_writer.LOGGER') as logger:
+        writer = SessionStatusWriter(window=60, retry_delay=0.01, max_retry_delay=0.01,
+                                     max_attempts=1000)
+        writer.update('session-1', {'status': 'complete'}, on_done=done.append)
+        start = time.monotonic()
+        writer.stop(timeout=0.1)
+    assert(time.monotonic() - start < 5)
+    assert(done == [False])
+    assert(writer.stats()['pending'] == 0)
+    logger.warning.assert_called_with(
+        "Status update for CFS Session=%s was not written before stopping: %s",
+        'session-1', {'status': 'complete'})
@@ -0,0 +1,93 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the cray/cfs/teardown module """
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from unittest.mock import patch, Mock
+
+import pytest
+
+import cray.cfs.teardown.__main__ as teardown
+from cray.cfs.utils.job_poller import IMSJobPoller
+
+
+class FakeIMS:
+    """Gives each job a resultant image after it has been finished and read again"""
+
+    def __init__(self, job_ids):
+        self.jobs = {job_id: {'id': job_id, 'status': 'waiting_on_user',
+                              'resultant_image_id': None, 'ssh_containers': []}
+                     for job_id in job_ids}
+        self.finished = []
+        self.reads = 0
+        self.lock = threading.Lock()
+
+    def get_jobs(self):
+        with self.lock:
+            self.reads += 1
+            for job_id in self.finished:
+                self.jobs[job_id].update(status='success', resultant_image_id='result-' + job_id)
+            return [dict(job) for job in self.jobs.values()]
+
+    def finish(self, job, cfs_name, key, completion_flag='complete'):
+        with self.lock:
+            self.finished.append(job['id'])
+
+
+@pytest.fixture
+def pipeline():
+    ims = FakeIMS(['job-{}'.format(i) for i in range(20)])
+    poller = IMSJobPoller(ims.get_jobs, min_interval=0.01, max_interval=0.01)
+    executor = ThreadPoolExecutor(max_workers=4)
+    with patch.object(teardown, '_finish_the_job', side_effect=ims.finish):
+        yield ims, poller, executor
+    executor.shutdown()
+    poller.stop()
+
+
+def test_do_success(pipeline):
+    ims, poller, executor = pipeline
+    futures = {job_id: teardown.do_success(job_id, 'session', Mock(), poller, executor)
+               for job_id in ims.jobs}
+    for job_id, future in futures.items():
+        assert(teardown._get_result('image', future.result(timeout=5)) == 'result-' + job_id)
+    assert(sorted(ims.finished) == sorted(ims.jobs))
+    # All of the jobs are read together
+    assert(ims.reads < len(ims.jobs))
+
+
+def test_do_failed(pipeline):
+    ims, poller, executor = pipeline
+    futures = [teardown.do_failed(job_id, 'session', Mock(), poller, executor)
+               for job_id in ims.jobs]
+    assert([future.result(timeout=5) for future in futures] == [None] * len(futures))
+    assert(sorted(ims.finished) == sorted(ims.jobs))
+
+
+def test_get_result_error():
+    assert(teardown._result_ready({'status': 'error'}))
+    assert(not teardown._result_ready({'status': 'packaging_artifacts',
+                                       'resultant_image_id': None}))
+    with pytest.raises(RuntimeError):
+        teardown._get_result('image', {'id': 'job', 'status': 'error'})
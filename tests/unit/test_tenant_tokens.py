@@ -0,0 +1,154 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the cray/cfs/operator/events/tenant_tokens.py module """
+import threading
+import time
+from unittest.mock import patch, Mock
+
+from kubernetes import config
+from kubernetes.client.rest import ApiException
+config.load_incluster_config = Mock()
+config.load_kube_config = Mock()
+
+from cray.cfs.operator.events.tenant_tokens import TenantTokenCache  # pylint: disable=E402
+from cray.cfs.utils.cache import CacheEntry
+
+
+def _secrets(resource_version='1'):
+    secrets = Mock()
+    secrets.metadata.resource_version = resource_version
+    return secrets
+
+
+def _stream(done, events=()):
+    """A watch stream that returns the events, then blocks until done is set"""
+    events = list(events)
+
+    def stream(*args, **kwargs):
+        if events:
+            return [events.pop(0)]
+        done.wait(5)
+        return []
+    return stream
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert(condition())
+
+
+def test_tenant_tokens_one_watch_per_tenant():
+    done = threading.Event()
+    login = Mock(side_effect=lambda tenant: CacheEntry(tenant, ttl=60))
+    list_secrets = Mock(return_value=_secrets())
+    tokens = TenantTokenCache(login, list_secrets, ttl=60)
+    with patch('cray.cfs.operator.events.tenant_tokens.watch') as watch:
+        watch.Watch.return_value.stream.side_effect = _stream(done)
+        for _ in range(5):
+            assert(tokens.get('tenant1') == 'tenant1')
+        assert(tokens.get('tenant2') == 'tenant2')
+        assert(login.call_count == 2)
+        assert(list_secrets.call_count == 2)
+        assert(sorted(tokens._watches) == ['tenant1', 'tenant2'])
+        threads = list(tokens._watches.values())
+        done.set()
+        tokens.stop()
+    assert(not any(thread.is_alive() for thread in threads))
+    assert(tokens._watches == {})
+
+
+def test_tenant_tokens_secret_change():
+    done = threading.Event()
+    logins = iter(['old', 'new'])
+    login = Mock(side_effect=lambda tenant: CacheEntry(next(logins), ttl=60))
+    changed = {'type': 'MODIFIED', 'object': _secrets('2')}
+    tokens = TenantTokenCache(login, Mock(return_value=_secrets()), ttl=60)
+    with patch('cray.cfs.operator.events.tenant_tokens.watch') as watch:
+        released = threading.Event()
+
+        def stream(*args, **kwargs):
+            # Wait for the first login, then report a change
+            released.wait(5)
+            return _stream(done, [changed])()
+        watch.Watch.return_value.stream.side_effect = stream
+        assert(tokens.get('tenant1') == 'old')
+        released.set()
+        _wait_for(lambda: tokens.tokens.stats()['size'] == 0)
+        assert(tokens.get('tenant1') == 'new')
+        assert(watch.Watch.return_value.stream.call_args.kwargs['resource_version'] == '2')
+        done.set()
+        tokens.stop()
+
+
+def test_tenant_tokens_renewed_while_used():
+    login = Mock(side_effect=[CacheEntry('1', ttl=1), CacheEntry('2', ttl=60)])
+    tokens = TenantTokenCache(login, Mock(), ttl=60, renew_at=0.05)
+    with patch.object(tokens, '_watch'):
+        assert(tokens.get('tenant1') == '1')
+        assert(tokens.get('tenant1') == '1')
+        # The token is renewed in the background, without waiting for it to expire
+        time.sleep(0.1)
+        tokens.renewals.run_due()
+        assert(login.call_count == 2)
+        assert(tokens.get('tenant1') == '2')
+        assert(login.call_count == 2)
+
+
+def test_tenant_tokens_dropped_when_idle():
+    login = Mock(side_effect=lambda tenant: CacheEntry('token', ttl=60))
+    tokens = TenantTokenCache(login, Mock(), ttl=60, renew_at=0)
+    with patch.object(tokens, '_watch'):
+        tokens.get('tenant1')
+        tokens._watches['tenant1'] = Mock()
+        tokens.renewals.run_due()
+    # A tenant that was not used since its last login is no longer watched or renewed
+    assert(login.call_count == 1)
+    assert(tokens._watches == {})
+    assert(tokens.stats()['size'] == 0)
+    assert(len(tokens.renewals) == 0)
+
+
+def test_tenant_tokens_watch_forbidden():
+    login = Mock(side_effect=lambda tenant: CacheEntry('token', ttl=60))
+    # Listing is allowed, but watching is not
+    list_secrets = Mock(side_effect=lambda namespace, **kwargs:
+                        _raise(ApiException(status=403)) if kwargs.get('watch') else _secrets())
+    tokens = TenantTokenCache(login, list_secrets, ttl=60)
+    with patch('cray.cfs.operator.events.tenant_tokens.LOGGER') as logger:
+        assert(tokens.get('tenant1') == 'token')
+        _wait_for(lambda: not tokens._watches)
+        assert(tokens.get('tenant1') == 'token')
+        assert(tokens.get('tenant2') == 'token')
+        tokens.stop()
+    # The token is kept until it expires, and no more watches are started
+    assert(login.call_count == 2)
+    assert(tokens.stats()['size'] == 2)
+    assert(tokens._watches == {})
+    logger.warning.assert_called_once()
+
+
+def _raise(error):
+    raise error
@@ -0,0 +1,171 @@
+#
+# MIT License
+#
+# (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the cray/cfs/utils/tracing.py module """
+import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import json
+import threading
+
+import pytest
+
+from cray.cfs.utils import tracing
+from cray.cfs.utils.tracing import SpanContext, Tracer
+
+
+class ListExporter:
+    enabled = True
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+    def flush(self):
+        pass
+
+
+def test_traceparent_round_trip():
+    context = SpanContext.new()
+    assert(SpanContext.parse(context.traceparent) == context)
+    child = SpanContext.new(context.trace_id)
+    assert(child.trace_id == context.trace_id)
+    assert(child.span_id != context.span_id)
+    assert(SpanContext.parse('') is None)
+    assert(SpanContext.parse(None) is None)
+    assert(SpanContext.parse('00-abc-def-01') is None)
+    assert(SpanContext.parse('00-{}-{}-01'.format('g' * 32, '1' * 16)) is None)
+
+
+def test_spans_nest_under_root():
+    root = SpanContext.new()
+    exporter = ListExporter()
+    tracer = Tracer('test', exporter=exporter, root=root)
+    with tracer.span('outer') as outer:
+        with tracer.span('inner', attributes={'repo': 'a'}):
+            pass
+    inner_span, outer_span = exporter.spans
+    assert(outer_span is outer)
+    assert(outer_span.parent_id == root.span_id)
+    assert(inner_span.parent_id == outer_span.context.span_id)
+    assert({span.context.trace_id for span in exporter.spans} == {root.trace_id})
+    assert(inner_span.end_time >= inner_span.start_time)
+    assert(tracer.current == root)
+
+
+def test_span_records_errors():
+    exporter = ListExporter()
+    tracer = Tracer('test', exporter=exporter)
+    with pytest.raises(ValueError):
+        with tracer.span('fails'):
+            raise ValueError('bad repo')
+    with pytest.raises(SystemExit):
+        with tracer.span('exits'):
+            raise SystemExit(0)
+    with pytest.raises(SystemExit):
+        with tracer.span('exits_with_error'):
+            raise SystemExit(2)
+    assert([span.error for span in exporter.spans] == ['bad repo', None, 'exit code 2'])
+    assert(exporter.spans[0].to_otlp()['status'] == {'code': 2, 'message': 'bad repo'})
+
+
+def test_record_with_reserved_context():
+    exporter = ListExporter()
+    tracer = Tracer('test', exporter=exporter)
+    context = SpanContext.new()
+    span = tracer.record('cfs.session', 1000, 2000, context=context,
+                         attributes={'succeeded': True, 'attempts': 2, 'missing': None})
+    otlp = span.to_otlp()
+    assert(otlp['spanId'] == context.span_id)
+    assert('parentSpanId' not in otlp)
+    assert(otlp['startTimeUnixNano'] == '1000')
+    assert(otlp['attributes'] == [{'key': 'succeeded', 'value': {'boolValue': True}},
+                                  {'key': 'attempts', 'value': {'intValue': '2'}}])
+
+
+def test_file_exporter(tmpdir):
+    path = str(tmpdir.join('spans.jsonl'))
+    environ = {'CFS_TRACE_EXPORTER': 'file', 'CFS_TRACE_FILE': path}
+    tracer = tracing.get_tracer('cfs-clone', environ)
+    with tracer.span('clone'):
+        pass
+    with open(path) as f:
+        spans = [json.loads(line) for line in f]
+    assert([(span['name'], span['service']) for span in spans] == [('clone', 'cfs-clone')])
+
+
+def test_get_tracer_disabled():
+    tracer = tracing.get_tracer('cfs-operator', {})
+    assert(not tracer.enabled)
+    tracer = tracing.get_tracer('cfs-operator', {'CFS_TRACE_EXPORTER': 'zipkin'})
+    assert(not tracer.enabled)
+
+
+def test_get_tracer_root_from_environment():
+    context = SpanContext.new()
+    tracer = tracing.get_tracer('cfs-inventory', {'TRACEPARENT': context.traceparent})
+    assert(tracer.root == context)
+
+
+def test_otlp_exporter():
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers['Content-Length']))
+            received.append((self.path, json.loads(body)))
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05},
+                     daemon=True).start()
+    try:
+        endpoint = 'http://127.0.0.1:{}/v1/traces'.format(server.server_port)
+        exporter = tracing.OtlpExporter(endpoint, 'cfs-teardown', batch_size=2, interval=60)
+        tracer = Tracer('cfs-teardown', exporter=exporter)
+        for name in ('a', 'b', 'c'):
+            tracer.record(name, 1, 2)
+        tracer.flush()
+    finally:
+        server.shutdown()
+        server.server_close()
+    spans = [span['name'] for _, body in received
+             for span in body['resourceSpans'][0]['scopeSpans'][0]['spans']]
+    assert(sorted(spans) == ['a', 'b', 'c'])
+    assert(all(path == '/v1/traces' for path, _ in received))
+    resource = received[0][1]['resourceSpans'][0]['resource']
+    assert(resource['attributes'] == [{'key': 'service.name',
+                                       'value': {'stringValue': 'cfs-teardown'}}])
+    assert(exporter.dropped == 0)
+
+
+def test_to_ns():
+    assert(tracing.to_ns(None) is None)
+    assert(tracing.to_ns(1.5) == 1500000000)
+    assert(tracing.to_ns(datetime.datetime(1970, 1, 1, 0, 0, 2, tzinfo=datetime.timezone.utc)) ==
+           2000000000)